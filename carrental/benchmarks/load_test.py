@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+"""End-to-end HTTP load test for the Renty API.
+
+Boots the project against a seeded SQLite database (or targets --base-url),
+replays an agent workload mix from many concurrent clients and reports
+throughput and p50/p95/p99 latency per endpoint. With --baseline the run is
+compared against a stored report and exits non-zero on regression, so it can
+be used as a CI gate.
+
+    python benchmarks/load_test.py --clients 16 --duration 30
+    python benchmarks/load_test.py --save-baseline benchmarks/baseline.json
+    python benchmarks/load_test.py --baseline benchmarks/baseline.json
+
+Only the standard library is used on the client side.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# (action, weight) - roughly what a branch agent does during a shift
+WORKLOAD = [
+    ('list_cars', 30),
+    ('dashboard_refresh', 20),
+    ('create_rental', 15),
+    ('add_violation', 5),
+    ('complete_rental', 12),
+    ('download_invoice', 8),
+    ('rental_history', 10),
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, wall_time):
+        endpoints = {}
+        total = 0
+        for endpoint, values in sorted(self.latencies.items()):
+            values.sort()
+            total += len(values)
+            endpoints[endpoint] = {
+                'count': len(values),
+                'errors': self.errors[endpoint],
+                'throughput_rps': round(len(values) / wall_time, 2),
+                'mean_ms': round(sum(values) / len(values) * 1000, 2),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+            }
+        return {
+            'duration_s': round(wall_time, 2),
+            'requests': total,
+            'throughput_rps': round(total / wall_time, 2) if wall_time else 0,
+            'errors': sum(self.errors.values()),
+            'endpoints': endpoints,
+        }
+
+
+class Client(threading.Thread):
+    """One simulated agent working with its own slice of the fleet, so
+    concurrent clients never race for the same car."""
+
+    def __init__(self, base_url, car_ids, customer_ids, recorder, deadline, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.free_cars = list(car_ids)
+        self.customer_ids = customer_ids
+        self.recorder = recorder
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.active_rentals = []
+        self.invoices = []
+        actions, weights = zip(*WORKLOAD)
+        self.actions, self.weights = actions, weights
+
+    def call(self, endpoint, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                content = response.read()
+                ok = response.status < 400
+        except urllib.error.HTTPError as exc:
+            content, ok = exc.read(), False
+        except (urllib.error.URLError, OSError):
+            content, ok = b'', False
+        self.recorder.record(endpoint, time.perf_counter() - start, ok)
+        if ok and method == 'POST':
+            try:
+                return json.loads(content)
+            except ValueError:
+                return None
+        return None
+
+    def run(self):
+        while time.perf_counter() < self.deadline:
+            action = self.rng.choices(self.actions, self.weights)[0]
+            getattr(self, action)()
+
+    def list_cars(self):
+        self.call('GET /api/cars/', 'GET', '/api/cars/')
+
+    def dashboard_refresh(self):
+        self.call('GET /api/dashboard/stats/', 'GET', '/api/dashboard/stats/')
+        self.call('GET /api/cars/available/', 'GET', '/api/cars/available/')
+
+    def rental_history(self):
+        customer_id = self.rng.choice(self.customer_ids)
+        self.call('GET /api/rentals/history/?customer_id', 'GET', f'/api/rentals/history/?customer_id={customer_id}')
+
+    def create_rental(self):
+        if not self.free_cars:
+            return self.list_cars()
+        car_id = self.free_cars.pop()
+        start = date.today() + timedelta(days=1)
+        result = self.call('POST /api/rentals/create/', 'POST', '/api/rentals/create/', {
+            'customer_id': self.rng.choice(self.customer_ids),
+            'car_id': car_id,
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=self.rng.randint(1, 7))).isoformat(),
+        })
+        if result and result.get('rental_id'):
+            self.active_rentals.append((result['rental_id'], car_id))
+        else:
+            self.free_cars.insert(0, car_id)
+
+    def add_violation(self):
+        if not self.active_rentals:
+            return self.list_cars()
+        rental_id, _ = self.rng.choice(self.active_rentals)
+        self.call('POST /api/violations/add/', 'POST', '/api/violations/add/', {
+            'rental_id': rental_id,
+            'violation_type': 'speeding',
+            'description': 'Load test violation',
+            'fine_amount': self.rng.randint(200, 2000),
+        })
+
+    def complete_rental(self):
+        if not self.active_rentals:
+            return self.create_rental()
+        rental_id, car_id = self.active_rentals.pop(0)
+        result = self.call('POST /api/rentals/complete/', 'POST', '/api/rentals/complete/', {'rental_id': rental_id})
+        if result and result.get('invoice_id'):
+            self.invoices.append(result['invoice_id'])
+            self.free_cars.insert(0, car_id)
+
+    def download_invoice(self):
+        if not self.invoices:
+            return self.complete_rental()
+        invoice_id = self.rng.choice(self.invoices)
+        self.call('GET /api/invoices/<id>/pdf/', 'GET', f'/api/invoices/{invoice_id}/pdf/')
+
+
+def manage(args, env):
+    subprocess.run([sys.executable, 'manage.py', *args], cwd=PROJECT_DIR, env=env, check=True)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(base_url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Server exited during startup')
+        try:
+            urllib.request.urlopen(base_url + '/api/dashboard/stats/', timeout=2).read()
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    raise RuntimeError('Server did not start in time')
+
+
+def boot_server(args):
+    env = {
+        **os.environ,
+        'DJANGO_DB_ENGINE': 'sqlite',
+        'DJANGO_DB_NAME': str(Path(args.db).resolve()),
+        'DJANGO_DEBUG': '0',
+        'DJANGO_QUERY_INSPECTION': '0',
+        'DJANGO_LOG_LEVEL': 'WARNING',
+    }
+    if args.reseed or not Path(args.db).exists():
+        Path(args.db).unlink(missing_ok=True)
+        manage(['migrate', '-v0'], env)
+        manage(['seed_fleet', '--cars', str(args.seed_cars), '--customers', str(args.seed_customers),
+                '--years', str(args.seed_years), '--seed', str(args.seed)], env)
+
+    port = free_port()
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', 'carrental.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(args.workers), '--threads', '4', '--log-level', 'warning']
+    else:
+        command = [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload']
+    process = subprocess.Popen(command, cwd=PROJECT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_for_server(base_url, process)
+    except RuntimeError:
+        process.terminate()
+        raise
+    return base_url, process
+
+
+def fetch_ids(base_url):
+    with urllib.request.urlopen(base_url + '/api/cars/available/', timeout=120) as response:
+        cars = [car['id'] for car in json.loads(response.read())['data']]
+    with urllib.request.urlopen(base_url + '/api/customers/', timeout=120) as response:
+        customers = [customer['id'] for customer in json.loads(response.read())['data']]
+    return cars, customers
+
+
+def run_load(base_url, clients, duration, seed):
+    car_ids, customer_ids = fetch_ids(base_url)
+    if not car_ids or not customer_ids:
+        raise RuntimeError('Need available cars and customers; seed the database first')
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+    threads = [
+        Client(base_url, car_ids[i::clients], customer_ids, recorder, deadline, seed + i)
+        for i in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.report(time.perf_counter() - started)
+
+
+def compare(report, baseline, tolerance, min_samples=20):
+    """Return a list of regressions: p95 slower or throughput lower than tolerated.
+
+    Endpoints with fewer than ``min_samples`` requests in either run are too
+    noisy to judge and are skipped.
+    """
+    regressions = []
+    for endpoint, base in baseline.get('endpoints', {}).items():
+        current = report['endpoints'].get(endpoint)
+        if current is None or min(current['count'], base['count']) < min_samples:
+            continue
+        if current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+    if report['throughput_rps'] < baseline.get('throughput_rps', 0) * (1 - tolerance):
+        regressions.append(f"throughput {report['throughput_rps']} rps vs baseline {baseline['throughput_rps']} rps")
+    return regressions
+
+
+def print_report(report):
+    print(f"{'endpoint':45} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, stats in report['endpoints'].items():
+        print(f"{endpoint:45} {stats['count']:>7} {stats['errors']:>5} {stats['throughput_rps']:>8} "
+              f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}")
+    print(f"total: {report['requests']} requests, {report['errors']} errors, "
+          f"{report['throughput_rps']} rps over {report['duration_s']}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--base-url', help='Target an already running server instead of booting one')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run the workload')
+    parser.add_argument('--server', choices=['runserver', 'gunicorn'], default='runserver')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--db', default=str(PROJECT_DIR / 'bench.sqlite3'), help='SQLite file for the seeded database')
+    parser.add_argument('--reseed', action='store_true', help='Recreate the benchmark database')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--seed-cars', type=int, default=500)
+    parser.add_argument('--seed-customers', type=int, default=5000)
+    parser.add_argument('--seed-years', type=float, default=2)
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--baseline', help='Compare against this stored report and fail on regression')
+    parser.add_argument('--save-baseline', help='Store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown (0.25 = 25%%)')
+    parser.add_argument('--min-samples', type=int, default=20, help='Ignore endpoints with fewer requests than this')
+    args = parser.parse_args(argv)
+
+    process = None
+    base_url = args.base_url
+    if not base_url:
+        base_url, process = boot_server(args)
+    try:
+        report = run_load(base_url.rstrip('/'), args.clients, args.duration, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    print_report(report)
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(report, indent=2) + '\n')
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance,
+                              args.min_samples)
+        if regressions:
+            print('Performance regressions:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print('No regressions against baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
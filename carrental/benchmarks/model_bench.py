@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""Microbenchmarks for the model-level hot paths that run on every booking and invoice.
+
+Each benchmark is timed against small, medium and huge seeded SQLite
+datasets (built once with ``seed_fleet`` and cached under benchmarks/.data/),
+recording min/median/mean time per call and the number of queries per call.
+Results are written as stable, diff-friendly JSON to
+benchmarks/results/<commit>.json, so regressions show up when two commits'
+files are compared.
+
+    python benchmarks/model_bench.py
+    python benchmarks/model_bench.py --sizes small medium --compare benchmarks/results/<old>.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = Path(__file__).resolve().parent / '.data'
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+DATASETS = {
+    'small': {'cars': 20, 'customers': 200, 'years': 0.5},
+    'medium': {'cars': 300, 'customers': 5000, 'years': 2},
+    'huge': {'cars': 3000, 'customers': 50000, 'years': 3},
+}
+
+
+def dataset_env(size, seed):
+    return {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'carrental.settings',
+        'DJANGO_DB_ENGINE': 'sqlite',
+        'DJANGO_DB_NAME': str(DATA_DIR / f'{size}-{seed}.sqlite3'),
+        'DJANGO_DEBUG': '0',
+        'DJANGO_QUERY_INSPECTION': '0',
+        'DJANGO_LOG_LEVEL': 'WARNING',
+    }
+
+
+def ensure_dataset(size, seed):
+    env = dataset_env(size, seed)
+    if Path(env['DJANGO_DB_NAME']).exists():
+        return env
+    DATA_DIR.mkdir(exist_ok=True)
+    spec = DATASETS[size]
+    manage = [sys.executable, 'manage.py']
+    try:
+        subprocess.run([*manage, 'migrate', '-v0'], cwd=PROJECT_DIR, env=env, check=True)
+        subprocess.run([*manage, 'seed_fleet', '--cars', str(spec['cars']), '--customers', str(spec['customers']),
+                        '--years', str(spec['years']), '--seed', str(seed)],
+                       cwd=PROJECT_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    except subprocess.CalledProcessError:
+        Path(env['DJANGO_DB_NAME']).unlink(missing_ok=True)
+        raise
+    return env
+
+
+def time_call(func, min_time, max_rounds):
+    for _ in range(3):
+        func()
+    timings = []
+    budget_end = time.perf_counter() + min_time
+    while len(timings) < max_rounds and (len(timings) < 5 or time.perf_counter() < budget_end):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmarks(min_time, max_rounds):
+    """Executed in a child process whose environment points at one dataset."""
+    sys.path.insert(0, str(PROJECT_DIR))
+    import django
+    django.setup()
+
+    from datetime import date, timedelta
+    from django.core.exceptions import ValidationError
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+    from rentcars.models import Car, Invoice, Rental
+
+    car = Car.objects.filter(available=True).first() or Car.objects.first()
+    start = date.today() + timedelta(days=30)
+    # An active rental without an invoice, with violations where possible
+    rental = (Rental.objects.filter(status='active', invoice__isnull=True, violations__isnull=False).first()
+              or Rental.objects.filter(invoice__isnull=True).first())
+    model_term = car.model[:3]
+
+    def rental_clean():
+        candidate = Rental(customer_id=rental.customer_id, car=car, start_date=start,
+                           end_date=start + timedelta(days=3))
+        try:
+            candidate.clean()
+        except ValidationError:
+            pass
+
+    def rental_save():
+        with transaction.atomic():
+            Rental(customer_id=rental.customer_id, car=car, start_date=start,
+                   end_date=start + timedelta(days=3)).save()
+            transaction.set_rollback(True)
+
+    def invoice_save():
+        with transaction.atomic():
+            Invoice(rental=Rental.objects.get(pk=rental.pk)).save()
+            transaction.set_rollback(True)
+
+    def rental_final_amount():
+        return rental.final_amount
+
+    def available_cars_by_model():
+        return list(Car.available_cars_by_model(model_term))
+
+    benchmarks = {
+        'Rental.clean': rental_clean,
+        'Rental.save': rental_save,
+        'Invoice.save': invoice_save,
+        'Rental.final_amount': rental_final_amount,
+        'Car.available_cars_by_model': available_cars_by_model,
+    }
+    results = {}
+    for name, func in benchmarks.items():
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        timings = time_call(func, min_time, max_rounds)
+        results[name] = {
+            'queries': len(queries),
+            'rounds': len(timings),
+            'min_us': round(min(timings) * 1e6, 1),
+            'median_us': round(statistics.median(timings) * 1e6, 1),
+            'mean_us': round(statistics.fmean(timings) * 1e6, 1),
+        }
+    results['_rows'] = {
+        'cars': Car.objects.count(),
+        'rentals': Rental.objects.count(),
+    }
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(current, previous, tolerance):
+    regressions = []
+    for size, benches in current['datasets'].items():
+        for name, stats in benches.items():
+            old = previous.get('datasets', {}).get(size, {}).get(name)
+            if name.startswith('_') or not old:
+                continue
+            if stats['median_us'] > old['median_us'] * (1 + tolerance):
+                regressions.append(f"{size} {name}: median {stats['median_us']}us vs {old['median_us']}us")
+            if stats['queries'] > old['queries']:
+                regressions.append(f"{size} {name}: {stats['queries']} queries vs {old['queries']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-time', type=float, default=0.5, help='Seconds to spend timing each benchmark')
+    parser.add_argument('--max-rounds', type=int, default=500)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='Previous result file; exit 1 if slower or more queries')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        json.dump(run_benchmarks(args.min_time, args.max_rounds), sys.stdout)
+        return 0
+
+    commit = current_commit()
+    report = {'commit': commit, 'datasets': {}}
+    for size in args.sizes:
+        env = ensure_dataset(size, args.seed)
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', '--min-time', str(args.min_time), '--max-rounds', str(args.max_rounds)],
+            cwd=PROJECT_DIR, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        report['datasets'][size] = json.loads(output)
+        for name, stats in report['datasets'][size].items():
+            if not name.startswith('_'):
+                print(f"{size:7} {name:30} {stats['median_us']:>12}us median {stats['queries']:>3} queries")
+
+    output_path = Path(args.output) if args.output else RESULTS_DIR / f'{commit}.json'
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+    print(f'Results written to {output_path}')
+
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text()), args.tolerance)
+        if regressions:
+            print('Performance regressions:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,12 +10,20 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -23,7 +31,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = "secrete-key"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool("DJANGO_DEBUG", True)
 
 ALLOWED_HOSTS = ["*"]
 
@@ -41,13 +49,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "rentcars.middleware.RequestTimingMiddleware",
+    "rentcars.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "rentcars.routers.ReplicaPinningMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "rentcars.middleware.QueryInspectionMiddleware",
+    "rentcars.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "carrental.urls"
@@ -73,12 +86,67 @@ WSGI_APPLICATION = "carrental.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Select the backend with DJANGO_DB_ENGINE=sqlite|postgres (default: sqlite).
+# PostgreSQL reads DJANGO_DB_NAME/USER/PASSWORD/HOST/PORT. Set DJANGO_DB_POOL=1
+# to use psycopg's connection pool, otherwise DJANGO_DB_CONN_MAX_AGE keeps
+# persistent connections open for that many seconds. DJANGO_DB_NAME also
+# overrides the SQLite file path.
+
+DB_ENGINE = os.environ.get("DJANGO_DB_ENGINE", "sqlite").lower()
+
+if DB_ENGINE in ("postgres", "postgresql"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DJANGO_DB_NAME", "carrental"),
+            "USER": os.environ.get("DJANGO_DB_USER", "postgres"),
+            "PASSWORD": os.environ.get("DJANGO_DB_PASSWORD", ""),
+            "HOST": os.environ.get("DJANGO_DB_HOST", "127.0.0.1"),
+            "PORT": os.environ.get("DJANGO_DB_PORT", "5432"),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
+    }
+    if env_bool("DJANGO_DB_POOL"):
+        # Django's pool support requires CONN_MAX_AGE = 0
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DJANGO_DB_POOL_MIN", "2")),
+            "max_size": int(os.environ.get("DJANGO_DB_POOL_MAX", "10")),
+            "timeout": int(os.environ.get("DJANGO_DB_POOL_TIMEOUT", "10")),
+        }
+    else:
+        DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DJANGO_DB_CONN_MAX_AGE", "60"))
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DJANGO_DB_NAME", BASE_DIR / "db.sqlite3"),
+            # Wait for the write lock instead of failing with "database is locked",
+            # and take it up front so concurrent writers don't deadlock on upgrade
+            "OPTIONS": {"timeout": 20, "transaction_mode": "IMMEDIATE"},
+        }
     }
-}
+
+# Optional read replica. For PostgreSQL set DJANGO_DB_REPLICA_HOST (and
+# optionally DJANGO_DB_REPLICA_PORT/USER/PASSWORD); for SQLite point
+# DJANGO_DB_REPLICA_NAME at a second database file as a local stand-in.
+# Reads fall back to "default" when no replica is configured.
+if os.environ.get("DJANGO_DB_REPLICA_HOST") or os.environ.get("DJANGO_DB_REPLICA_NAME"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "OPTIONS": {**DATABASES["default"].get("OPTIONS", {})},
+        "TEST": {"MIRROR": "default"},
+    }
+    for key in ("NAME", "HOST", "PORT", "USER", "PASSWORD"):
+        value = os.environ.get(f"DJANGO_DB_REPLICA_{key}")
+        if value:
+            DATABASES["replica"][key] = value
+
+DATABASE_ROUTERS = ["rentcars.routers.ReplicaRouter"]
+
+# Seconds a client keeps reading from the primary after a write
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get("DJANGO_DB_REPLICA_STICKY_SECONDS", "5"))
 
 
 # Password validation
@@ -123,7 +191,79 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cache backend; the car catalog version lives here, so multi-process
+# deployments need a shared backend (e.g. django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", ""),
+    },
+    # Version counters of the catalog snapshot and cached reports (see
+    # rentcars/catalog.py). They must be shared by every server process and
+    # incremented atomically: the default locked file cache covers all workers
+    # on one host; use Redis when running on several hosts (the database cache
+    # does not increment atomically).
+    "versions": {
+        "BACKEND": os.environ.get("DJANGO_VERSION_CACHE_BACKEND", "rentcars.version_cache.LockedFileBasedCache"),
+        "LOCATION": os.environ.get("DJANGO_VERSION_CACHE_LOCATION", str(BASE_DIR / "cache" / "versions")),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Admin-only API endpoints also accept this token in the X-Admin-Token header
+ADMIN_API_TOKEN = os.environ.get("DJANGO_ADMIN_API_TOKEN", "")
+
+# API responses: "auto" uses orjson when installed, "stdlib" forces the json module
+JSON_RENDERER = os.environ.get("DJANGO_JSON_RENDERER", "auto")
+# Bodies smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.environ.get("DJANGO_COMPRESSION_MIN_SIZE", "1024"))
+
+# Parquet/Arrow snapshots written by `manage.py export_analytics` and /api/analytics/export/
+ANALYTICS_EXPORT_DIR = os.environ.get("DJANGO_ANALYTICS_EXPORT_DIR", BASE_DIR / "analytics")
+# Each run re-reads this window before its cut-off so rows committed late are not lost;
+# it must exceed the longest write transaction
+ANALYTICS_EXPORT_OVERLAP_SECONDS = int(os.environ.get("DJANGO_ANALYTICS_EXPORT_OVERLAP_SECONDS", "600"))
+
+# Request profiling: admins can send "X-Profile: 1", and a random fraction of
+# requests can be sampled. Stacks are kept in a ring of PROFILING_MAX_FILES files.
+PROFILING_SAMPLE_RATE = float(os.environ.get("DJANGO_PROFILING_SAMPLE_RATE", "0"))
+PROFILING_INTERVAL = float(os.environ.get("DJANGO_PROFILING_INTERVAL", "0.005"))
+PROFILING_DIR = Path(os.environ.get("DJANGO_PROFILING_DIR", BASE_DIR / "profiles"))
+PROFILING_MAX_FILES = int(os.environ.get("DJANGO_PROFILING_MAX_FILES", "50"))
+
+# N+1 detection: log SQL shapes repeated QUERY_REPEAT_THRESHOLD times in one
+# request. @query_budget violations raise instead of warn when strict
+# (rentcars.runner.QueryBudgetTestRunner enables this for the test suite).
+QUERY_INSPECTION = env_bool("DJANGO_QUERY_INSPECTION", DEBUG)
+QUERY_REPEAT_THRESHOLD = int(os.environ.get("DJANGO_QUERY_REPEAT_THRESHOLD", "5"))
+QUERY_BUDGET_STRICT = env_bool("DJANGO_QUERY_BUDGET_STRICT", False)
+
+TEST_RUNNER = "rentcars.runner.QueryBudgetTestRunner"
+
+# Background jobs (rentcars.jobs, `manage.py run_workers`)
+JOB_WORKERS = int(os.environ.get("DJANGO_JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.environ.get("DJANGO_JOB_POLL_INTERVAL", "1.0"))
+JOB_RETRY_BASE_SECONDS = 5
+JOB_RETRY_MAX_SECONDS = 600
+JOB_LOCK_TIMEOUT = 600  # seconds before a running job is assumed orphaned
+
+# Logging
+# Request timing lines are emitted on the "rentcars.requests" logger.
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "rentcars": {
+            "handlers": ["console"],
+            "level": os.environ.get("DJANGO_LOG_LEVEL", "INFO"),
+        },
+    },
+}
@@ -2,13 +2,236 @@ import sys
 import os
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import traceback
 import webbrowser # <-- ADDED IMPORT
+from datetime import datetime
 from PyQt5.QtWidgets import *
-from PyQt5.QtCore import Qt, pyqtSignal, QDate, QTimer
+from PyQt5.QtCore import (Qt, pyqtSignal, QDate, QTimer, QObject, QRunnable, QThreadPool, QAbstractTableModel,
+                          QModelIndex, QEvent, QSize)
 from PyQt5.QtGui import *
 
 # API Base URL - Make sure your backend server is running at this address
-API_BASE = "http://127.0.0.1:8000"
+API_BASE = os.environ.get("RENTY_API_BASE", "http://127.0.0.1:8000").rstrip("/")
+# Idempotent calls (GET, PUT, DELETE) are retried with backoff on connection
+# errors and 502/503/504; other calls only when the connection was never made.
+API_RETRIES = int(os.environ.get("RENTY_API_RETRIES", "3"))
+# Compressed responses help on slow links but cost CPU on both ends: opt-in
+API_GZIP = os.environ.get("RENTY_API_GZIP", "").lower() in ("1", "true", "yes")
+
+# --- Background API client ---
+
+class ApiReply:
+    """A finished HTTP response, read and JSON-decoded on the worker thread."""
+    def __init__(self, status_code, headers, text, data):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self._data = data
+
+    @classmethod
+    def from_response(cls, response):
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return cls(response.status_code, response.headers, response.text, data)
+
+    def json(self):
+        if self._data is None:
+            raise ValueError(f"Response is not JSON (status {self.status_code})")
+        return self._data
+
+
+class ApiRequest(QObject):
+    """One API call, performed on a pool thread.
+
+    finished(ApiReply) or failed(error message) is emitted on the GUI thread,
+    unless the request was cancelled first: a cancelled request's result is
+    dropped (the HTTP call itself still runs to completion or timeout).
+    """
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    settled = pyqtSignal()
+    _completed = pyqtSignal(object, str)
+
+    # Listings that carry an ETag (the server's catalog version) are kept per
+    # URL, so an unchanged catalog comes back as an empty 304.
+    etag_cache = {}
+
+    def __init__(self, session, method, url, revalidate=False, **kwargs):
+        super().__init__()
+        self.session = session
+        self.method = method
+        self.url = url
+        self.revalidate = revalidate
+        self.kwargs = kwargs
+        self.cancelled = False
+        self._completed.connect(self._deliver, Qt.QueuedConnection)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        """Perform the call; runs on a pool thread."""
+        try:
+            reply, error = (None if self.cancelled else self.send()), ""
+        except Exception as e:
+            reply, error = None, str(e) or e.__class__.__name__
+        try:
+            self._completed.emit(reply, error)
+        except RuntimeError:
+            pass  # The request was deleted while the application shut down
+
+    def send(self):
+        cache_key = (self.url, repr(self.kwargs.get('params')))
+        cached = self.etag_cache.get(cache_key) if self.revalidate else None
+        kwargs = dict(self.kwargs)
+        if cached:
+            kwargs['headers'] = {**kwargs.get('headers', {}), 'If-None-Match': cached[0]}
+        response = self.session.request(self.method, self.url, **kwargs)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        reply = ApiReply.from_response(response)
+        if self.revalidate and response.status_code == 200 and response.headers.get('ETag'):
+            self.etag_cache[cache_key] = (response.headers['ETag'], reply)
+        return reply
+
+    def _deliver(self, reply, error):
+        if not self.cancelled:
+            if error:
+                self.failed.emit(error)
+            elif reply is not None:
+                self.finished.emit(reply)
+        self.settled.emit()
+
+
+class _ApiRunnable(QRunnable):
+    def __init__(self, request):
+        super().__init__()
+        self.request = request
+
+    def run(self):
+        self.request.run()
+
+
+def make_session(pool_size, retries=API_RETRIES, gzip=API_GZIP):
+    """A keep-alive requests.Session holding up to pool_size connections to the API."""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                  allowed_methods=Retry.DEFAULT_ALLOWED_METHODS, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate" if gzip else "identity"
+    return session
+
+
+class ApiClient(QObject):
+    """Runs API calls on a QThreadPool and hands the results back through signals.
+
+    All calls share one keep-alive session whose pool has a connection per
+    worker thread, so a refresh cycle reuses a handful of connections.
+    Calls made with the same key by the same owner supersede each other:
+    starting one cancels the previous, so only the latest result is shown.
+    Pending calls are also cancelled when their owner (by default the object
+    of a bound on_success method) is destroyed.
+    """
+    def __init__(self, base_url=API_BASE, max_threads=4, session=None, parent=None):
+        super().__init__(parent)
+        self.base_url = base_url.rstrip("/")
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.session = session or make_session(max_threads)
+        self._pending = set()
+        self._latest = {}
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, on_success=None, on_error=None, key=None, owner=None, **kwargs):
+        request = ApiRequest(self.session, method, self.url(path), **kwargs)
+        if owner is None:
+            owner = getattr(on_success, '__self__', None)
+        on_error = on_error or (lambda message: print(f"Request to {path} failed: {message}"))
+        request.failed.connect(on_error)
+        if on_success is not None:
+            request.finished.connect(lambda reply: self._call(on_success, on_error, reply))
+        if isinstance(owner, QObject):
+            owner.destroyed.connect(request.cancel)
+        if key is not None:
+            key = (id(owner), key)
+            if key in self._latest:
+                self._latest[key].cancel()
+            self._latest[key] = request
+        request.settled.connect(lambda: self._forget(request, key))
+        self._pending.add(request)
+        self.pool.start(_ApiRunnable(request))
+        return request
+
+    @staticmethod
+    def _call(on_success, on_error, reply):
+        try:
+            on_success(reply)
+        except Exception as e:
+            # An exception escaping a slot would abort the application
+            traceback.print_exc()
+            on_error(str(e))
+
+    def _forget(self, request, key):
+        self._pending.discard(request)
+        if key is not None and self._latest.get(key) is request:
+            del self._latest[key]
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request('DELETE', path, **kwargs)
+
+    def when_settled(self, calls, callback):
+        """Call callback() once every request in calls has finished, failed or been cancelled."""
+        remaining = [len(calls)]
+        def settled():
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                callback()
+        for call in calls:
+            call.settled.connect(settled)
+        if not calls:
+            callback()
+
+    def cancel(self, key, owner=None):
+        """Cancel the pending call started with this key and owner, if any."""
+        request = self._latest.get((id(owner), key))
+        if request is not None:
+            request.cancel()
+
+    def cancel_all(self):
+        for request in self._pending:
+            request.cancel()
+
+    def close(self):
+        """Drop pending results and close the pooled connections."""
+        self.cancel_all()
+        self.session.close()
+
+
+_api_client = None
+
+def api():
+    """The shared ApiClient, created on first use (after the QApplication)."""
+    global _api_client
+    if _api_client is None:
+        _api_client = ApiClient()
+    return _api_client
 
 # --- Custom Widgets ---
 
@@ -121,6 +344,106 @@ class ModernInput(QLineEdit):
         """)
         self.setMinimumHeight(50)
 
+# --- Table Models ---
+
+class TableColumn:
+    """One column of a RecordTableModel.
+
+    value(record) extracts the raw cell value; text(value) formats it for
+    display and color(value) may return a foreground color (hex string).
+    """
+    def __init__(self, header, value, text=str, color=None):
+        self.header = header
+        self.value = value
+        self.text = text
+        self.color = color
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Read-only table over a list of API records, stored column by column.
+
+    Values are extracted once per refresh into one list per column and only
+    formatted when the view asks for a cell, so a table holds no per-cell
+    items or widgets and paints just the visible rows.
+    """
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.records = []
+        self.values = [[] for _ in columns]
+        self._colors = {}
+
+    def set_records(self, records):
+        self.beginResetModel()
+        self.records = list(records)
+        self.values = [[column.value(record) for record in self.records] for column in self.columns]
+        self.endResetModel()
+
+    def record(self, row):
+        return self.records[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        if role == Qt.DisplayRole:
+            return column.text(self.values[index.column()][index.row()])
+        if role == Qt.ForegroundRole and column.color:
+            color = column.color(self.values[index.column()][index.row()])
+            if color:
+                return self._colors.setdefault(color, QColor(color))
+        if role == Qt.UserRole:
+            return self.records[index.row()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        return self.columns[section].header if orientation == Qt.Horizontal else str(section + 1)
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Paints a push button in each cell of a column and emits clicked(row) when one is pressed."""
+    clicked = pyqtSignal(int)
+
+    def __init__(self, text, color, hover_color, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.color = QColor(color)
+        self.hover_color = QColor(hover_color)
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)  # Cell background and selection
+        rect = option.rect.adjusted(4, 4, -4, -4)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.hover_color if option.state & QStyle.State_MouseOver else self.color)
+        painter.drawRoundedRect(rect, 3, 3)
+        font = QFont(option.font)
+        font.setPixelSize(11)
+        painter.setFont(font)
+        painter.setPen(QColor("white"))
+        painter.drawText(rect, Qt.AlignCenter, self.text)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(option.fontMetrics.horizontalAdvance(self.text) + 28, 30)
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton
+                and option.rect.contains(event.pos())):
+            self.clicked.emit(index.row())
+            return True
+        return False
+
+
 # --- Customer Profile Widgets ---
 
 class CustomerProfileCard(QFrame):
@@ -446,148 +769,136 @@ class CustomerProfileDialog(QDialog):
     
     def load_rental_history(self):
         """Load customer rental history from API."""
-        try:
-            customer_id = self.customer_data.get('id')
-            if not customer_id:
-                return
-                
-            # Get all rentals and filter by customer
-            response = requests.get(f"{API_BASE}/api/rentals/history/", timeout=5)
-            if response.status_code == 200:
-                all_rentals = response.json().get('data', [])
-                # Filter by customer name (API returns customer names as strings)
-                customer_name = self.customer_data.get('full_name', '').strip()
-                rentals = []
-                for rental in all_rentals:
-                    rental_customer = rental.get('customer', '').strip()
-                    if rental_customer.lower() == customer_name.lower():
-                        rentals.append(rental)
+        customer_id = self.customer_data.get('id')
+        if not customer_id:
+            return
+        # Totals come from the customer's server-side counters, plus the latest rentals
+        api().get(f"/api/customers/{customer_id}/summary/", params={'limit': 50}, timeout=5,
+                  key='history', on_success=self.show_rental_history,
+                  on_error=lambda message: print(f"Could not load rental history: {message}"))
+
+    def show_rental_history(self, response):
+        if response.status_code == 200:
+            summary = response.json().get('data', {})
+        else:
+            summary = {}
+            print(f"Failed to load customer summary: {response.status_code}")
+        rentals = summary.get('recent_rentals', [])
+        
+        # Update summary cards
+        total_rentals = summary.get('rentals_count', 0)
+        total_spent = float(summary.get('lifetime_spend', 0))
+        active_rentals = summary.get('active_rentals', 0)
+        
+        # Find and update the value labels in each card
+        for label in self.total_rentals_card.findChildren(QLabel):
+            if label.objectName() == "value_label":
+                label.setText(str(total_rentals))
+                break
+        else:
+            # Fallback: update the last label (usually the value)
+            labels = self.total_rentals_card.findChildren(QLabel)
+            if labels:
+                labels[-1].setText(str(total_rentals))
+        
+        for label in self.total_spent_card.findChildren(QLabel):
+            if label.objectName() == "value_label":
+                label.setText(f"{total_spent:.2f} AED")
+                break
+        else:
+            labels = self.total_spent_card.findChildren(QLabel)
+            if labels:
+                labels[-1].setText(f"{total_spent:.2f} AED")
+        
+        for label in self.active_rentals_card.findChildren(QLabel):
+            if label.objectName() == "value_label":
+                label.setText(str(active_rentals))
+                break
+        else:
+            labels = self.active_rentals_card.findChildren(QLabel)
+            if labels:
+                labels[-1].setText(str(active_rentals))
+        
+        # Populate table
+        self.history_table.setRowCount(len(rentals))
+        self.history_table.setColumnCount(6)
+        self.history_table.setHorizontalHeaderLabels([
+            "Car", "Start Date", "End Date", "Total Price", "Status", "Car Photos"
+        ])
+        
+        for row, rental in enumerate(rentals):
+            car_info = rental.get('car', '')
+            if isinstance(car_info, str):
+                # Car is a string like "Hyundai Optrasee 2017 (ASR-5555)"
+                car_text = car_info
             else:
-                rentals = []
-                print(f"Failed to load rental data: {response.status_code}")
-            
-            # Update summary cards
-            total_rentals = len(rentals)
-            total_spent = sum(float(rental.get('total_price', 0)) for rental in rentals)
-            active_rentals = sum(1 for rental in rentals if rental.get('status') == 'active')
-            
-            # print(f"Debug: Found {total_rentals} rentals, {active_rentals} active, total spent: {total_spent}")
-            # print(f"Debug: API response status: {response.status_code}")
-            # print(f"Debug: Raw response data: {response.json() if response.status_code == 200 else 'No data'}")
-            # print(f"Debug: Customer name being filtered: '{customer_name}'")
+                # Car is an object with separate fields
+                car_text = f"{car_info.get('brand', '')} {car_info.get('model', '')} ({car_info.get('license_plate', '')})"
             
-            # Find and update the value labels in each card
-            for label in self.total_rentals_card.findChildren(QLabel):
-                if label.objectName() == "value_label":
-                    label.setText(str(total_rentals))
-                    break
-            else:
-                # Fallback: update the last label (usually the value)
-                labels = self.total_rentals_card.findChildren(QLabel)
-                if labels:
-                    labels[-1].setText(str(total_rentals))
+            self.history_table.setItem(row, 0, QTableWidgetItem(car_text))
+            self.history_table.setItem(row, 1, QTableWidgetItem(rental.get('start_date', 'N/A')))
+            self.history_table.setItem(row, 2, QTableWidgetItem(rental.get('end_date', 'N/A')))
+            self.history_table.setItem(row, 3, QTableWidgetItem(f"{rental.get('total_price', 0)} AED"))
             
-            for label in self.total_spent_card.findChildren(QLabel):
-                if label.objectName() == "value_label":
-                    label.setText(f"{total_spent:.2f} AED")
-                    break
+            # Status with color
+            status = rental.get('status', 'unknown')
+            status_item = QTableWidgetItem(status.title())
+            if status == 'active':
+                status_item.setForeground(QColor("#28a745"))
+            elif status == 'completed':
+                status_item.setForeground(QColor("#17a2b8"))
             else:
-                labels = self.total_spent_card.findChildren(QLabel)
-                if labels:
-                    labels[-1].setText(f"{total_spent:.2f} AED")
+                status_item.setForeground(QColor("#dc3545"))
+            self.history_table.setItem(row, 4, status_item)
             
-            for label in self.active_rentals_card.findChildren(QLabel):
-                if label.objectName() == "value_label":
-                    label.setText(str(active_rentals))
-                    break
-            else:
-                labels = self.active_rentals_card.findChildren(QLabel)
-                if labels:
-                    labels[-1].setText(str(active_rentals))
+            # Action buttons layout
+            action_widget = QWidget()
+            action_layout = QHBoxLayout(action_widget)
+            action_layout.setContentsMargins(5, 2, 5, 2)
+            action_layout.setSpacing(5)
             
-            # Populate table
-            self.history_table.setRowCount(len(rentals))
-            self.history_table.setColumnCount(6)
-            self.history_table.setHorizontalHeaderLabels([
-                "Car", "Start Date", "End Date", "Total Price", "Status", "Car Photos"
-            ])
+            # Car photos button
+            photos_btn = QPushButton("📷")
+            photos_btn.setFixedSize(30, 25)
+            photos_btn.setStyleSheet("""
+                QPushButton {
+                    background: #f6ad55;
+                    color: white;
+                    border: none;
+                    border-radius: 4px;
+                    font-size: 12px;
+                }
+                QPushButton:hover {
+                    background: #dd6b20;
+                }
+            """)
+            photos_btn.clicked.connect(lambda checked, car=car_text: self.show_car_photos_from_string(car))
+            action_layout.addWidget(photos_btn)
             
-            for row, rental in enumerate(rentals):
-                car_info = rental.get('car', '')
-                if isinstance(car_info, str):
-                    # Car is a string like "Hyundai Optrasee 2017 (ASR-5555)"
-                    car_text = car_info
-                else:
-                    # Car is an object with separate fields
-                    car_text = f"{car_info.get('brand', '')} {car_info.get('model', '')} ({car_info.get('license_plate', '')})"
-                
-                self.history_table.setItem(row, 0, QTableWidgetItem(car_text))
-                self.history_table.setItem(row, 1, QTableWidgetItem(rental.get('start_date', 'N/A')))
-                self.history_table.setItem(row, 2, QTableWidgetItem(rental.get('end_date', 'N/A')))
-                self.history_table.setItem(row, 3, QTableWidgetItem(f"{rental.get('total_price', 0)} AED"))
-                
-                # Status with color
-                status = rental.get('status', 'unknown')
-                status_item = QTableWidgetItem(status.title())
-                if status == 'active':
-                    status_item.setForeground(QColor("#28a745"))
-                elif status == 'completed':
-                    status_item.setForeground(QColor("#17a2b8"))
-                else:
-                    status_item.setForeground(QColor("#dc3545"))
-                self.history_table.setItem(row, 4, status_item)
-                
-                # Action buttons layout
-                action_widget = QWidget()
-                action_layout = QHBoxLayout(action_widget)
-                action_layout.setContentsMargins(5, 2, 5, 2)
-                action_layout.setSpacing(5)
-                
-                # Car photos button
-                photos_btn = QPushButton("📷")
-                photos_btn.setFixedSize(30, 25)
-                photos_btn.setStyleSheet("""
+            # Complete rental button (only for active rentals)
+            if status == 'active':
+                complete_btn = QPushButton("✅")
+                complete_btn.setFixedSize(30, 25)
+                complete_btn.setStyleSheet("""
                     QPushButton {
-                        background: #f6ad55;
+                        background: #28a745;
                         color: white;
                         border: none;
                         border-radius: 4px;
                         font-size: 12px;
                     }
                     QPushButton:hover {
-                        background: #dd6b20;
+                        background: #218838;
                     }
                 """)
-                photos_btn.clicked.connect(lambda checked, car=car_text: self.show_car_photos_from_string(car))
-                action_layout.addWidget(photos_btn)
-                
-                # Complete rental button (only for active rentals)
-                if status == 'active':
-                    complete_btn = QPushButton("✅")
-                    complete_btn.setFixedSize(30, 25)
-                    complete_btn.setStyleSheet("""
-                        QPushButton {
-                            background: #28a745;
-                            color: white;
-                            border: none;
-                            border-radius: 4px;
-                            font-size: 12px;
-                        }
-                        QPushButton:hover {
-                            background: #218838;
-                        }
-                    """)
-                    complete_btn.clicked.connect(lambda checked, r=rental: self.complete_rental(r))
-                    action_layout.addWidget(complete_btn)
-                
-                action_layout.addStretch()
-                self.history_table.setCellWidget(row, 5, action_widget)
+                complete_btn.clicked.connect(lambda checked, r=rental: self.complete_rental(r))
+                action_layout.addWidget(complete_btn)
             
-            self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-                
-        except requests.exceptions.RequestException as e:
-            print(f"Could not load rental history: {e}")
-    
+            action_layout.addStretch()
+            self.history_table.setCellWidget(row, 5, action_widget)
+        
+        self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
     def complete_rental(self, rental):
         """Complete an active rental."""
         reply = QMessageBox.question(
@@ -599,17 +910,16 @@ class CustomerProfileDialog(QDialog):
         )
         
         if reply == QMessageBox.Yes:
-            try:
-                response = requests.post(f"{API_BASE}/api/rentals/complete/", 
-                                       json={'rental_id': rental['id']}, 
-                                       timeout=5)
-                if response.status_code == 200:
-                    QMessageBox.information(self, "Success", "Rental completed successfully!\nInvoice has been generated.")
-                    self.load_rental_history()  # Refresh the table
-                else:
-                    QMessageBox.warning(self, "Error", f"Failed to complete rental: {response.status_code}")
-            except requests.exceptions.RequestException as e:
-                QMessageBox.warning(self, "Error", f"Network error: {str(e)}")
+            api().post("/api/rentals/complete/", json={'rental_id': rental['id']}, timeout=5,
+                       on_success=self.rental_completed,
+                       on_error=lambda message: QMessageBox.warning(self, "Error", f"Network error: {message}"))
+
+    def rental_completed(self, response):
+        if response.status_code == 200:
+            QMessageBox.information(self, "Success", "Rental completed successfully!\nInvoice has been generated.")
+            self.load_rental_history()  # Refresh the table
+        else:
+            QMessageBox.warning(self, "Error", f"Failed to complete rental: {response.status_code}")
 
     def show_car_photos_from_string(self, car_text):
         """Show car photos in a popup dialog from car string."""
@@ -918,11 +1228,11 @@ class AddCarDialog(QDialog):
         
         # Buttons
         buttons_layout = QHBoxLayout()
-        save_btn = ModernButton("💾 Save Car", "#28a745")
-        save_btn.clicked.connect(self.save_car)
+        self.save_btn = ModernButton("💾 Save Car", "#28a745")
+        self.save_btn.clicked.connect(self.save_car)
         cancel_btn = ModernButton("❌ Cancel", "#dc3545")
         cancel_btn.clicked.connect(self.reject)
-        buttons_layout.addWidget(save_btn)
+        buttons_layout.addWidget(self.save_btn)
         buttons_layout.addWidget(cancel_btn)
         
         # Add widgets to layout
@@ -1009,54 +1319,58 @@ class AddCarDialog(QDialog):
                 'description': self.description_input.toPlainText()
             }
             
+            # Images are read up front so the upload holds no open files
             files = {}
+            for field, path in (('main_image', self.main_image_path),
+                                ('interior_image', self.interior_image_path),
+                                ('exterior_image', self.exterior_image_path)):
+                if path:
+                    with open(path, 'rb') as image:
+                        files[field] = (os.path.basename(path), image.read())
             
-            # Add images if selected
-            if self.main_image_path:
-                files['main_image'] = open(self.main_image_path, 'rb')
-            if self.interior_image_path:
-                files['interior_image'] = open(self.interior_image_path, 'rb')
-            if self.exterior_image_path:
-                files['exterior_image'] = open(self.exterior_image_path, 'rb')
-            
-            try:
-                # Send multipart form data if images are present, otherwise JSON
-                if files:
-                    response = requests.post(f"{API_BASE}/api/cars/add/", data=form_data, files=files)
-                else:
-                    # Convert to proper types for JSON
-                    json_data = {
-                        'brand': form_data['brand'],
-                        'model': form_data['model'],
-                        'year': int(form_data['year']),
-                        'license_plate': form_data['license_plate'],
-                        'color': form_data['color'],
-                        'price_per_day': float(form_data['price_per_day']),
-                        'description': form_data['description']
-                    }
-                    response = requests.post(f"{API_BASE}/api/cars/add/", json=json_data)
-                
-                if response.status_code == 200:
-                    self.show_message("Car added successfully!", "success")
-                    self.car_added.emit()
-                    self.accept()
-                else:
-                    try:
-                        error_data = response.json()
-                        error_msg = error_data.get('message', 'Failed to add car.')
-                    except:
-                        error_msg = f"Failed to add car. Status: {response.status_code}"
-                    self.show_message(f"Error: {error_msg}", "error")
-            
-            finally:
-                # Close file handles
-                for file_handle in files.values():
-                    file_handle.close()
+            # Send multipart form data if images are present, otherwise JSON
+            if files:
+                payload = {'data': form_data, 'files': files}
+            else:
+                # Convert to proper types for JSON
+                payload = {'json': {
+                    'brand': form_data['brand'],
+                    'model': form_data['model'],
+                    'year': int(form_data['year']),
+                    'license_plate': form_data['license_plate'],
+                    'color': form_data['color'],
+                    'price_per_day': float(form_data['price_per_day']),
+                    'description': form_data['description']
+                }}
 
         except ValueError:
             self.show_message("Invalid number format for Year or Price.", "error")
+            return
         except Exception as e:
             self.show_message(f"An unexpected error occurred: {e}", "error")
+            return
+
+        self.save_btn.setEnabled(False)
+        api().post("/api/cars/add/", timeout=30, on_success=self.car_saved,
+                   on_error=self.car_save_failed, **payload)
+
+    def car_saved(self, response):
+        self.save_btn.setEnabled(True)
+        if response.status_code == 200:
+            self.show_message("Car added successfully!", "success")
+            self.car_added.emit()
+            self.accept()
+        else:
+            try:
+                error_data = response.json()
+                error_msg = error_data.get('message', 'Failed to add car.')
+            except:
+                error_msg = f"Failed to add car. Status: {response.status_code}"
+            self.show_message(f"Error: {error_msg}", "error")
+
+    def car_save_failed(self, message):
+        self.save_btn.setEnabled(True)
+        self.show_message(f"An unexpected error occurred: {message}", "error")
 
     def show_message(self, message, msg_type="info"):
         msg = QMessageBox(self)
@@ -1165,40 +1479,50 @@ class BulkAddCarsDialog(QDialog):
     def add_sample_cars(self):
         """Add all sample cars to the database."""
         sample_cars = self.get_sample_cars_data()
-        added_count = 0
-        failed_count = 0
-        
-        progress_dialog = QProgressDialog("Adding cars to database...", "Cancel", 0, len(sample_cars), self)
-        progress_dialog.setWindowModality(Qt.WindowModal)
-        progress_dialog.show()
-        
-        for i, car_data in enumerate(sample_cars):
-            if progress_dialog.wasCanceled():
-                break
-                
-            try:
-                response = requests.post(f"{API_BASE}/api/cars/add/", json=car_data, timeout=10)
-                if response.status_code == 200:
-                    added_count += 1
-                else:
-                    failed_count += 1
-                    print(f"Failed to add {car_data['brand']} {car_data['model']}: {response.status_code}")
-            except Exception as e:
-                failed_count += 1
-                print(f"Error adding {car_data['brand']} {car_data['model']}: {str(e)}")
-            
-            progress_dialog.setValue(i + 1)
-            QApplication.processEvents()
-        
-        progress_dialog.close()
+        self.added_count = 0
+        self.failed_count = 0
+        
+        self.progress_dialog = QProgressDialog("Adding cars to database...", "Cancel", 0, len(sample_cars), self)
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.canceled.connect(self.cancel_sample_cars)
+        self.progress_dialog.show()
+        
+        self.pending_cars = [
+            api().post("/api/cars/add/", json=car_data, timeout=10, owner=self,
+                       on_success=lambda response, car=car_data: self.sample_car_done(car, response),
+                       on_error=lambda message, car=car_data: self.sample_car_done(car, None, message))
+            for car_data in sample_cars
+        ]
+
+    def sample_car_done(self, car_data, response, error=None):
+        if response is not None and response.status_code == 200:
+            self.added_count += 1
+        else:
+            self.failed_count += 1
+            reason = error or (response.status_code if response is not None else "")
+            print(f"Failed to add {car_data['brand']} {car_data['model']}: {reason}")
+        done = self.added_count + self.failed_count
+        self.progress_dialog.setValue(done)
+        if done == len(self.pending_cars):
+            self.show_sample_cars_result()
+
+    def cancel_sample_cars(self):
+        for request in self.pending_cars:
+            request.cancel()
+        self.show_sample_cars_result()
+
+    def show_sample_cars_result(self):
+        # Closing a progress dialog emits canceled()
+        self.progress_dialog.canceled.disconnect(self.cancel_sample_cars)
+        self.progress_dialog.close()
         
         # Show results
-        if added_count > 0:
+        if self.added_count > 0:
             QMessageBox.information(
                 self, 
                 "Cars Added Successfully", 
-                f"Successfully added {added_count} cars to the database.\n"
-                f"Failed to add {failed_count} cars."
+                f"Successfully added {self.added_count} cars to the database.\n"
+                f"Failed to add {self.failed_count} cars."
             )
             self.cars_added.emit()
             self.accept()
@@ -1441,9 +1765,6 @@ class AddCustomerDialog(QDialog):
     def save_customer(self):
         """Validates and sends customer data with images to the API."""
         try:
-            # Prepare form data for multipart upload
-            import requests
-            
             # Basic customer data
             data = {
                 'full_name': self.name_input.text(),
@@ -1461,31 +1782,34 @@ class AddCustomerDialog(QDialog):
                 self.show_message("Please fill Name, Email, and National ID.", "error")
                 return
 
-            # Prepare files for upload
+            # Prepare files for upload, read up front so the upload holds no open files
             files = {}
-            if self.profile_image_path:
-                files['profile_image'] = open(self.profile_image_path, 'rb')
-            if self.license_image_path:
-                files['license_image'] = open(self.license_image_path, 'rb')
-
-            try:
-                # Send multipart form data
-                response = requests.post(f"{API_BASE}/api/customers/register/", data=data, files=files)
-                
-                if response.status_code == 200:
-                    self.show_message("Customer added successfully!", "success")
-                    self.customer_added.emit()
-                    self.accept()
-                else:
-                    error_msg = response.json().get('error', 'Failed to add customer.')
-                    self.show_message(f"Error: {error_msg}", "error")
-            finally:
-                # Close file handles
-                for file_handle in files.values():
-                    file_handle.close()
+            for field, path in (('profile_image', self.profile_image_path),
+                                ('license_image', self.license_image_path)):
+                if path:
+                    with open(path, 'rb') as image:
+                        files[field] = (os.path.basename(path), image.read())
                     
         except Exception as e:
             self.show_message(f"An error occurred: {str(e)}", "error")
+            return
+
+        # Send multipart form data
+        api().post("/api/customers/register/", data=data, files=files, timeout=30,
+                   on_success=self.customer_saved,
+                   on_error=lambda message: self.show_message(f"An error occurred: {message}", "error"))
+
+    def customer_saved(self, response):
+        if response.status_code == 200:
+            self.show_message("Customer added successfully!", "success")
+            self.customer_added.emit()
+            self.accept()
+        else:
+            try:
+                error_msg = response.json().get('error', 'Failed to add customer.')
+            except ValueError:
+                error_msg = f"Failed to add customer. Status: {response.status_code}"
+            self.show_message(f"Error: {error_msg}", "error")
 
     def show_message(self, message, msg_type="info"):
         msg = QMessageBox(self)
@@ -1640,22 +1964,22 @@ class CreateRentalDialog(QDialog):
         main_layout.addWidget(scroll_area)
 
     def load_customers_and_cars(self):
-        try:
-            # Load customers
-            response_cust = requests.get(f"{API_BASE}/api/customers/")
-            if response_cust.status_code == 200:
-                customers = response_cust.json().get('data', [])
-                for customer in customers:
-                    self.customer_combo.addItem(f"{customer['full_name']} ({customer['National_ID']})", customer['id'])
-
-            # Load available cars
-            response_cars = requests.get(f"{API_BASE}/api/cars/available/")
-            if response_cars.status_code == 200:
-                cars = response_cars.json().get('data', [])
-                for car in cars:
-                    self.car_combo.addItem(f"{car['brand']} {car['model']} ({car['license_plate']})", car['id'])
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Network Error", f"Could not load data from server:\n{e}")
+        on_error = lambda message: QMessageBox.warning(self, "Network Error", f"Could not load data from server:\n{message}")
+        api().get("/api/customers/", timeout=10, key='customers', on_success=self.show_customers, on_error=on_error)
+        api().get("/api/cars/available/", timeout=10, key='cars', revalidate=True,
+                  on_success=self.show_cars, on_error=on_error)
+
+    def show_customers(self, response):
+        if response.status_code == 200:
+            customers = response.json().get('data', [])
+            for customer in customers:
+                self.customer_combo.addItem(f"{customer['full_name']} ({customer['National_ID']})", customer['id'])
+
+    def show_cars(self, response):
+        if response.status_code == 200:
+            cars = response.json().get('data', [])
+            for car in cars:
+                self.car_combo.addItem(f"{car['brand']} {car['model']} ({car['license_plate']})", car['id'])
 
     def create_rental(self):
         # Validate tax and discount inputs
@@ -1695,8 +2019,10 @@ class CreateRentalDialog(QDialog):
             QMessageBox.warning(self, "Error", "Please select a customer and a car.")
             return
 
-        response = requests.post(f"{API_BASE}/api/rentals/create/", json=rental_data)
-        
+        api().post("/api/rentals/create/", json=rental_data, timeout=10, on_success=self.rental_saved,
+                   on_error=lambda message: QMessageBox.warning(self, "Network Error", f"Failed to create rental: {message}"))
+
+    def rental_saved(self, response):
         if response.status_code == 200:
             response_data = response.json()
             rental_id = response_data.get('rental_id')
@@ -1714,7 +2040,7 @@ class CreateRentalDialog(QDialog):
             if result == QMessageBox.Yes and rental_id:
                 # Open contract in browser
                 import webbrowser
-                contract_url = f"{API_BASE}/api/rentals/{rental_id}/contract/"
+                contract_url = api().url(f"/api/rentals/{rental_id}/contract/")
                 webbrowser.open(contract_url)
             
             self.rental_created.emit()
@@ -1811,19 +2137,24 @@ class AddViolationDialog(QDialog):
                 'fine_amount': float(self.fine_input.text()) if self.fine_input.text() else 0
             }
             
-            response = requests.post(f"{API_BASE}/api/violations/add/", json=violation_data)
-            
-            if response.status_code == 200:
-                QMessageBox.information(self, "Success", "Violation added successfully!")
-                self.violation_added.emit()
-                self.accept()
-            else:
-                error_detail = response.json().get('error', 'Unknown error')
-                QMessageBox.warning(self, "Error", f"Failed to add violation: {error_detail}")
         except ValueError:
              QMessageBox.warning(self, "Input Error", "Please enter a valid fine amount.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An unexpected error occurred: {e}")
+             return
+
+        api().post("/api/violations/add/", json=violation_data, timeout=10, on_success=self.violation_saved,
+                   on_error=lambda message: QMessageBox.critical(self, "Error", f"An unexpected error occurred: {message}"))
+
+    def violation_saved(self, response):
+        if response.status_code == 200:
+            QMessageBox.information(self, "Success", "Violation added successfully!")
+            self.violation_added.emit()
+            self.accept()
+        else:
+            try:
+                error_detail = response.json().get('error', 'Unknown error')
+            except ValueError:
+                error_detail = f"Status {response.status_code}"
+            QMessageBox.warning(self, "Error", f"Failed to add violation: {error_detail}")
 
 
 # --- Authentication Windows ---
@@ -1906,19 +2237,19 @@ class LoginWindow(GradientWidget):
             self.show_message("Please fill all fields", "error")
             return
         
-        try:
-            response = requests.post(f"{API_BASE}/api/auth/login/", 
-                                     json={'username': username, 'password': password}, timeout=5)
-            
-            if response.status_code == 200:
-                payload = response.json()
-                user_data = payload.get('user', payload)
-                self.login_success.emit(user_data)
-                self.close()
-            else:
-                self.show_message("Invalid credentials. Please try again.", "error")
-        except requests.exceptions.RequestException as e:
-            self.show_message(f"Network error: Could not connect to the server.\n{e}", "error")
+        api().post("/api/auth/login/", json={'username': username, 'password': password}, timeout=5,
+                   key='login', on_success=self.login_finished,
+                   on_error=lambda message: self.show_message(
+                       f"Network error: Could not connect to the server.\n{message}", "error"))
+
+    def login_finished(self, response):
+        if response.status_code == 200:
+            payload = response.json()
+            user_data = payload.get('user', payload)
+            self.login_success.emit(user_data)
+            self.close()
+        else:
+            self.show_message("Invalid credentials. Please try again.", "error")
 
     def show_signup(self):
         self.signup_window = SignupWindow()
@@ -2003,18 +2334,21 @@ class SignupWindow(GradientWidget):
             self.show_message("Passwords do not match", "error")
             return
             
-        try:
-            response = requests.post(f"{API_BASE}/api/auth/signup/",
-                                     json={'username': username, 'email': email, 'password': password}, timeout=5)
-            
-            if response.status_code == 200:
-                self.signup_success.emit()
-                self.close()
-            else:
+        api().post("/api/auth/signup/", json={'username': username, 'email': email, 'password': password},
+                   timeout=5, key='signup', on_success=self.signup_finished,
+                   on_error=lambda message: self.show_message(
+                       f"Network error: Could not connect to the server.\n{message}", "error"))
+
+    def signup_finished(self, response):
+        if response.status_code == 200:
+            self.signup_success.emit()
+            self.close()
+        else:
+            try:
                 error_msg = response.json().get('error', 'Signup failed.')
-                self.show_message(f"Error: {error_msg}", "error")
-        except requests.exceptions.RequestException as e:
-            self.show_message(f"Network error: Could not connect to the server.\n{e}", "error")
+            except ValueError:
+                error_msg = 'Signup failed.'
+            self.show_message(f"Error: {error_msg}", "error")
 
     def show_message(self, message, msg_type):
         msg = QMessageBox(self)
@@ -2032,8 +2366,27 @@ class SignupWindow(GradientWidget):
 
 class RentalsManagementPage(QWidget):
     """Widget to manage rentals."""
-    data_changed = pyqtSignal()
+    data_changed = pyqtSignal()  # the dashboard refresh it triggers reloads this page too
     
+    RENTAL_COLUMNS = [
+        TableColumn("ID", lambda rental: rental['id']),
+        TableColumn("Customer", lambda rental: rental.get('customer', 'N/A')),
+        TableColumn("Car", lambda rental: rental.get('car', 'N/A')),
+        TableColumn("Start Date", lambda rental: rental.get('start_date', 'N/A')),
+        TableColumn("End Date", lambda rental: rental.get('end_date', 'N/A')),
+        TableColumn("Total Price", lambda rental: rental.get('total_price', 0), lambda price: f"{price} AED"),
+        TableColumn("Tax", lambda rental: rental.get('tax_amount', 0),
+                    lambda amount: f"{amount} AED" if amount > 0 else "N/A"),
+        TableColumn("Discount", lambda rental: rental.get('discount_amount', 0),
+                    lambda amount: f"{amount} AED" if amount > 0 else "N/A"),
+        TableColumn("Status", lambda rental: rental['status'], str.title,
+                    lambda status: {'active': "#28a745", 'completed': "#17a2b8"}.get(status)),
+        TableColumn("Violations", lambda rental: (rental.get('violations_count', 0), rental.get('violations_amount', 0)),
+                    lambda violations: f"{violations[0]} ({violations[1]} AED)"),
+        TableColumn("Invoice ID", lambda rental: rental.get('invoice_id', 'N/A')),
+        TableColumn("Contract", lambda rental: rental['id'], lambda rental_id: ""),  # Painted by ButtonDelegate
+    ]
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setStyleSheet("background: transparent; color: white;")
@@ -2061,7 +2414,14 @@ class RentalsManagementPage(QWidget):
         header_layout.addWidget(refresh_btn)
         header_layout.addWidget(create_rental_btn)
         
-        self.rentals_table = QTableWidget()
+        self.rentals_table = QTableView()
+        self.rentals_model = RecordTableModel(self.RENTAL_COLUMNS, self)
+        self.rentals_table.setModel(self.rentals_model)
+        self.contract_delegate = ButtonDelegate("📄 View Contract", "#4a9b8e", "#3d8275", self.rentals_table)
+        self.contract_delegate.clicked.connect(
+            lambda row: self.view_rental_contract(self.rentals_model.record(row)['id']))
+        self.rentals_table.setItemDelegateForColumn(len(self.RENTAL_COLUMNS) - 1, self.contract_delegate)
+        self.rentals_table.setMouseTracking(True)  # Hover color of the contract buttons
         # Using a shared setup method from the main window would be ideal
         # but for simplicity, we define it here.
         self.setup_table_style(self.rentals_table, "rgba(0, 123, 255, 0.8)")
@@ -2109,19 +2469,19 @@ class RentalsManagementPage(QWidget):
         table.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         
         table.setStyleSheet(f"""
-            QTableWidget {{
+            QTableView {{
                 background: #2d3748;
                 border: 1px solid #4a5568;
                 border-radius: 10px;
                 color: white;
                 gridline-color: #4a5568;
             }}
-            QTableWidget::item {{
+            QTableView::item {{
                 background: #2d3748;  /* Set all rows to dark background */
                 padding: 10px;
                 border-bottom: 1px solid #4a5568;
             }}
-            QTableWidget::item:selected {{
+            QTableView::item:selected {{
                 background: rgba(102, 126, 234, 0.4);
             }}
             QHeaderView::section {{
@@ -2133,128 +2493,73 @@ class RentalsManagementPage(QWidget):
                 font-size: 14px;
             }}
             /* Vertical Scrollbar */
-            QTableWidget QScrollBar:vertical {{
+            QTableView QScrollBar:vertical {{
                 border: none;
                 background: #1a202c;
                 width: 14px;
                 border-radius: 7px;
             }}
-            QTableWidget QScrollBar::handle:vertical {{
+            QTableView QScrollBar::handle:vertical {{
                 background: #4a5568;
                 min-height: 20px;
                 border-radius: 7px;
                 margin: 2px;
             }}
-            QTableWidget QScrollBar::handle:vertical:hover {{
+            QTableView QScrollBar::handle:vertical:hover {{
                 background: #f59e0b;
             }}
-            QTableWidget QScrollBar::handle:vertical:pressed {{
+            QTableView QScrollBar::handle:vertical:pressed {{
                 background: #9c4221;
             }}
-            QTableWidget QScrollBar::add-line:vertical,
-            QTableWidget QScrollBar::sub-line:vertical {{
+            QTableView QScrollBar::add-line:vertical,
+            QTableView QScrollBar::sub-line:vertical {{
                 border: none;
                 background: none;
             }}
-            QTableWidget QScrollBar::add-page:vertical,
-            QTableWidget QScrollBar::sub-page:vertical {{
+            QTableView QScrollBar::add-page:vertical,
+            QTableView QScrollBar::sub-page:vertical {{
                 background: none;
             }}
             /* Horizontal Scrollbar */
-            QTableWidget QScrollBar:horizontal {{
+            QTableView QScrollBar:horizontal {{
                 border: none;
                 background: #1a202c;
                 height: 14px;
                 border-radius: 7px;
             }}
-            QTableWidget QScrollBar::handle:horizontal {{
+            QTableView QScrollBar::handle:horizontal {{
                 background: #4a5568;
                 min-width: 20px;
                 border-radius: 7px;
                 margin: 2px;
             }}
-            QTableWidget QScrollBar::handle:horizontal:hover {{
+            QTableView QScrollBar::handle:horizontal:hover {{
                 background: #f59e0b;
             }}
-            QTableWidget QScrollBar::handle:horizontal:pressed {{
+            QTableView QScrollBar::handle:horizontal:pressed {{
                 background: #9c4221;
             }}
-            QTableWidget QScrollBar::add-line:horizontal,
-            QTableWidget QScrollBar::sub-line:horizontal {{
+            QTableView QScrollBar::add-line:horizontal,
+            QTableView QScrollBar::sub-line:horizontal {{
                 border: none;
                 background: none;
             }}
-            QTableWidget QScrollBar::add-page:horizontal,
-            QTableWidget QScrollBar::sub-page:horizontal {{
+            QTableView QScrollBar::add-page:horizontal,
+            QTableView QScrollBar::sub-page:horizontal {{
                 background: none;
             }}
         """)
 
     def load_rentals_data(self):
-        try:
-            response = requests.get(f"{API_BASE}/api/rentals/history/")
-            if response.status_code == 200:
-                rentals = response.json().get('data', [])
-                self.display_rentals(rentals)
-        except requests.exceptions.RequestException as e:
-            print(f"Could not load rentals data: {e}")
+        return api().get("/api/rentals/history/", timeout=10, key='rentals', on_success=self.show_rentals_data,
+                         on_error=lambda message: print(f"Could not load rentals data: {message}"))
+
+    def show_rentals_data(self, response):
+        if response.status_code == 200:
+            self.display_rentals(response.json().get('data', []))
 
     def display_rentals(self, rentals):
-        self.rentals_table.setRowCount(0) # Clear table
-        self.rentals_table.setRowCount(len(rentals))
-        self.rentals_table.setColumnCount(12)
-        headers = ["ID", "Customer", "Car", "Start Date", "End Date", "Total Price", "Tax", "Discount", "Status", "Violations", "Invoice ID", "Contract"]
-        self.rentals_table.setHorizontalHeaderLabels(headers)
-        
-        for row, rental in enumerate(rentals):
-            # Store rental data in the first item of each row for easy access
-            item_id = QTableWidgetItem(str(rental['id']))
-            item_id.setData(Qt.UserRole, rental) # Store the whole dictionary
-            self.rentals_table.setItem(row, 0, item_id)
-            
-            self.rentals_table.setItem(row, 1, QTableWidgetItem(rental.get('customer', 'N/A')))
-            self.rentals_table.setItem(row, 2, QTableWidgetItem(rental.get('car', 'N/A')))
-            self.rentals_table.setItem(row, 3, QTableWidgetItem(rental.get('start_date', 'N/A')))
-            self.rentals_table.setItem(row, 4, QTableWidgetItem(rental.get('end_date', 'N/A')))
-            self.rentals_table.setItem(row, 5, QTableWidgetItem(f"{rental.get('total_price', 0)} AED"))
-            
-            # Add tax and discount columns
-            tax_amount = rental.get('tax_amount', 0)
-            discount_amount = rental.get('discount_amount', 0)
-            self.rentals_table.setItem(row, 6, QTableWidgetItem(f"{tax_amount} AED" if tax_amount > 0 else "N/A"))
-            self.rentals_table.setItem(row, 7, QTableWidgetItem(f"{discount_amount} AED" if discount_amount > 0 else "N/A"))
-            
-            status_item = QTableWidgetItem(rental['status'].title())
-            if rental['status'] == 'active':
-                status_item.setForeground(QColor("#28a745")) # Green
-            elif rental['status'] == 'completed':
-                status_item.setForeground(QColor("#17a2b8")) # Blue
-            self.rentals_table.setItem(row, 8, status_item)
-            
-            violations_text = f"{rental.get('violations_count', 0)} ({rental.get('violations_amount', 0)} AED)"
-            self.rentals_table.setItem(row, 9, QTableWidgetItem(violations_text))
-            
-            invoice_text = str(rental.get('invoice_id', 'N/A'))
-            self.rentals_table.setItem(row, 10, QTableWidgetItem(invoice_text))
-            
-            # Add contract button
-            contract_btn = QPushButton("📄 View Contract")
-            contract_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #4a9b8e;
-                    color: white;
-                    border: none;
-                    padding: 5px 10px;
-                    border-radius: 3px;
-                    font-size: 11px;
-                }
-                QPushButton:hover {
-                    background-color: #3d8275;
-                }
-            """)
-            contract_btn.clicked.connect(lambda checked, r_id=rental['id']: self.view_rental_contract(r_id))
-            self.rentals_table.setCellWidget(row, 11, contract_btn)
-            
+        self.rentals_model.set_records(rentals)
         self.rentals_table.resizeColumnsToContents()
         self.rentals_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.rentals_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
@@ -2264,21 +2569,20 @@ class RentalsManagementPage(QWidget):
         """Open rental contract in browser"""
         try:
             import webbrowser
-            contract_url = f"{API_BASE}/api/rentals/{rental_id}/contract/"
+            contract_url = api().url(f"/api/rentals/{rental_id}/contract/")
             webbrowser.open(contract_url)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Could not open contract: {str(e)}")
 
     def show_create_rental_dialog(self):
         dialog = CreateRentalDialog(self)
-        dialog.rental_created.connect(self.load_rentals_data)
         dialog.rental_created.connect(self.data_changed.emit) # Notify main window
         dialog.exec_()
 
     def get_selected_rental(self):
-        current_row = self.rentals_table.currentRow()
-        if current_row >= 0:
-            return self.rentals_table.item(current_row, 0).data(Qt.UserRole)
+        current = self.rentals_table.currentIndex()
+        if current.isValid():
+            return self.rentals_model.record(current.row())
         return None
 
     def add_violation_to_rental(self):
@@ -2288,7 +2592,6 @@ class RentalsManagementPage(QWidget):
                 QMessageBox.warning(self, "Action Denied", "Cannot add violations to a completed rental.")
                 return
             dialog = AddViolationDialog(rental['id'], self)
-            dialog.violation_added.connect(self.load_rentals_data)
             dialog.violation_added.connect(self.data_changed.emit)
             dialog.exec_()
         else:
@@ -2297,24 +2600,30 @@ class RentalsManagementPage(QWidget):
     def complete_rental(self):
         rental = self.get_selected_rental()
         if rental:
-            response = requests.post(f"{API_BASE}/api/rentals/complete/", json={'rental_id': rental['id']})
-            if response.status_code == 200:
-                QMessageBox.information(self, "Success", "Rental completed and invoice generated!")
-                self.load_rentals_data()
-                self.data_changed.emit()
-            else:
-                error = response.json().get('error', 'Failed to complete rental.')
-                QMessageBox.warning(self, "Error", error)
+            api().post("/api/rentals/complete/", json={'rental_id': rental['id']}, timeout=10,
+                       on_success=self.rental_completed,
+                       on_error=lambda message: QMessageBox.warning(self, "Error", f"Network error: {message}"))
         else:
             QMessageBox.warning(self, "Selection Required", "Please select a rental from the table.")
 
+    def rental_completed(self, response):
+        if response.status_code == 200:
+            QMessageBox.information(self, "Success", "Rental completed and invoice generated!")
+            self.data_changed.emit()
+        else:
+            try:
+                error = response.json().get('error', 'Failed to complete rental.')
+            except ValueError:
+                error = 'Failed to complete rental.'
+            QMessageBox.warning(self, "Error", error)
+
     def generate_invoice(self):
         rental = self.get_selected_rental()
         if rental:
             invoice_id = rental.get('invoice_id')
             if invoice_id:
                 try:
-                    webbrowser.open(f"{API_BASE}/api/invoices/{invoice_id}/pdf/")
+                    webbrowser.open(api().url(f"/api/invoices/{invoice_id}/pdf/"))
                 except Exception as e:
                     QMessageBox.warning(self, "Error", f"Could not open invoice PDF: {e}")
             else:
@@ -2338,7 +2647,6 @@ class RentalsManagementPage(QWidget):
         # This dialog should be modified to handle updates instead of just creations.
         # This would involve changing the API endpoint and request method (e.g., PUT or PATCH).
         if dialog.exec_() == QDialog.Accepted:
-            self.load_rentals_data()
             self.data_changed.emit()
 
     def delete_selected_rental(self):
@@ -2355,17 +2663,20 @@ class RentalsManagementPage(QWidget):
         if confirm != QMessageBox.Yes:
             return
             
-        try:
-            response = requests.delete(f"{API_BASE}/api/rentals/{rental['id']}/delete/")
-            if response.status_code == 200:
-                QMessageBox.information(self, "Success", "Rental deleted successfully!")
-                self.load_rentals_data()
-                self.data_changed.emit()
-            else:
+        api().delete(f"/api/rentals/{rental['id']}/delete/", timeout=10, on_success=self.rental_deleted,
+                     on_error=lambda message: QMessageBox.warning(
+                         self, "Delete Failed", f"Failed to delete rental: {message}"))
+
+    def rental_deleted(self, response):
+        if response.status_code == 200:
+            QMessageBox.information(self, "Success", "Rental deleted successfully!")
+            self.data_changed.emit()
+        else:
+            try:
                 error_msg = response.json().get('message', 'Unknown error')
-                QMessageBox.warning(self, "Delete Failed", f"Failed to delete rental: {error_msg}")
-        except Exception as e:
-            QMessageBox.warning(self, "Delete Failed", f"Failed to delete rental: {e}")
+            except ValueError:
+                error_msg = f"Status {response.status_code}"
+            QMessageBox.warning(self, "Delete Failed", f"Failed to delete rental: {error_msg}")
 
 
 class InvoicesManagementPage(QWidget):
@@ -2514,17 +2825,16 @@ class CreateUserDialog(QDialog):
             'is_active': self.active_checkbox.isChecked()
         }
         
-        try:
-            response = requests.post(f"{API_BASE}/api/users/create/", 
-                                   json=user_data, timeout=5)
-            if response.status_code == 200:
-                QMessageBox.information(self, "Success", "User created successfully!")
-                self.accept()
-            else:
-                error_msg = response.json().get('message', 'Unknown error occurred')
-                QMessageBox.warning(self, "Error", f"Failed to create user: {error_msg}")
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Network Error", f"Could not create user: {e}")
+        api().post("/api/users/create/", json=user_data, timeout=5, on_success=self.user_created,
+                   on_error=lambda message: QMessageBox.warning(self, "Network Error", f"Could not create user: {message}"))
+
+    def user_created(self, response):
+        if response.status_code == 200:
+            QMessageBox.information(self, "Success", "User created successfully!")
+            self.accept()
+        else:
+            error_msg = response.json().get('message', 'Unknown error occurred')
+            QMessageBox.warning(self, "Error", f"Failed to create user: {error_msg}")
 
 class EditUserDialog(QDialog):
     """Dialog for editing an existing user."""
@@ -2637,21 +2947,21 @@ class EditUserDialog(QDialog):
         layout.addLayout(buttons_layout)
     
     def load_user_data(self):
-        try:
-            response = requests.get(f"{API_BASE}/api/users/", timeout=5)
-            if response.status_code == 200:
-                users = response.json().get('data', [])
-                user = next((u for u in users if u['id'] == self.user_id), None)
-                if user:
-                    self.username_input.setText(user.get('username', ''))
-                    self.email_input.setText(user.get('email', ''))
-                    self.first_name_input.setText(user.get('first_name', ''))
-                    self.last_name_input.setText(user.get('last_name', ''))
-                    self.admin_checkbox.setChecked(user.get('is_admin', False))
-                    self.agent_checkbox.setChecked(user.get('is_agent', False))
-                    self.active_checkbox.setChecked(user.get('is_active', True))
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Network Error", f"Could not load user data: {e}")
+        api().get("/api/users/", timeout=5, key='user', on_success=self.show_user_data,
+                  on_error=lambda message: QMessageBox.warning(self, "Network Error", f"Could not load user data: {message}"))
+
+    def show_user_data(self, response):
+        if response.status_code == 200:
+            users = response.json().get('data', [])
+            user = next((u for u in users if u['id'] == self.user_id), None)
+            if user:
+                self.username_input.setText(user.get('username', ''))
+                self.email_input.setText(user.get('email', ''))
+                self.first_name_input.setText(user.get('first_name', ''))
+                self.last_name_input.setText(user.get('last_name', ''))
+                self.admin_checkbox.setChecked(user.get('is_admin', False))
+                self.agent_checkbox.setChecked(user.get('is_agent', False))
+                self.active_checkbox.setChecked(user.get('is_active', True))
     
     def save_user(self):
         # Validate input
@@ -2673,20 +2983,46 @@ class EditUserDialog(QDialog):
         if self.password_input.text().strip():
             user_data['password'] = self.password_input.text().strip()
         
+        api().put(f"/api/users/{self.user_id}/update/", json=user_data, timeout=5, on_success=self.user_saved,
+                  on_error=lambda message: QMessageBox.warning(self, "Network Error", f"Could not update user: {message}"))
+
+    def user_saved(self, response):
+        if response.status_code == 200:
+            QMessageBox.information(self, "Success", "User updated successfully!")
+            self.accept()
+        else:
+            error_msg = response.json().get('message', 'Unknown error occurred')
+            QMessageBox.warning(self, "Error", f"Failed to update user: {error_msg}")
+
+def format_date_joined(date_joined):
+    """Shorten a 'YYYY-MM-DD HH:MM:SS' timestamp to its date; other values are shown as they are."""
+    if date_joined and date_joined != 'N/A':
         try:
-            response = requests.put(f"{API_BASE}/api/users/{self.user_id}/update/", 
-                                  json=user_data, timeout=5)
-            if response.status_code == 200:
-                QMessageBox.information(self, "Success", "User updated successfully!")
-                self.accept()
-            else:
-                error_msg = response.json().get('message', 'Unknown error occurred')
-                QMessageBox.warning(self, "Error", f"Failed to update user: {error_msg}")
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Network Error", f"Could not update user: {e}")
+            return datetime.strptime(date_joined, '%Y-%m-%d %H:%M:%S').strftime('%Y-%m-%d')
+        except (TypeError, ValueError):
+            pass  # Keep original format if parsing fails
+    return str(date_joined)
+
+
+def yes_no_color(flag):
+    return "#28a745" if flag else "#dc3545"
+
 
 class UsersManagementPage(QWidget):
     """Widget to manage users (Admin only)."""
+    USER_COLUMNS = [
+        TableColumn("ID", lambda user: user.get('id', '')),
+        TableColumn("Username", lambda user: user.get('username', '')),
+        TableColumn("Email", lambda user: user.get('email', '')),
+        # Full Name (combine first_name and last_name from backend)
+        TableColumn("Full Name", lambda user: f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() or 'N/A'),
+        TableColumn("Admin", lambda user: user.get('is_admin', False), lambda flag: "✅ Yes" if flag else "❌ No", yes_no_color),
+        TableColumn("Agent", lambda user: user.get('is_agent', False), lambda flag: "✅ Yes" if flag else "❌ No", yes_no_color),
+        TableColumn("Active", lambda user: user.get('is_active', True),
+                    lambda flag: "✅ Active" if flag else "❌ Inactive", yes_no_color),
+        TableColumn("Date Joined", lambda user: user.get('date_joined', 'N/A'), format_date_joined),
+    ]
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setup_ui()
@@ -2713,9 +3049,9 @@ class UsersManagementPage(QWidget):
         header_layout.addWidget(refresh_btn)
         header_layout.addWidget(create_user_btn)
 
-        self.users_table = QTableWidget()
-        self.users_table.setColumnCount(8)
-        self.users_table.setHorizontalHeaderLabels(["ID", "Username", "Email", "Full Name", "Admin", "Agent", "Active", "Date Joined"])
+        self.users_table = QTableView()
+        self.users_model = RecordTableModel(self.USER_COLUMNS, self)
+        self.users_table.setModel(self.users_model)
         self.setup_table_style(self.users_table, "rgba(0, 123, 255, 0.8)")
 
         buttons_layout = QHBoxLayout()
@@ -2741,91 +3077,35 @@ class UsersManagementPage(QWidget):
         table.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         table.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         table.setStyleSheet(f"""
-            QTableWidget {{ background: #2d3748; border: 1px solid #4a5568; border-radius: 10px; color: white; gridline-color: #4a5568; }}
-            QTableWidget::item {{ background: #2d3748; padding: 10px; border-bottom: 1px solid #4a5568; }}
-            QTableWidget::item:selected {{ background: rgba(102, 126, 234, 0.4); }}
+            QTableView {{ background: #2d3748; border: 1px solid #4a5568; border-radius: 10px; color: white; gridline-color: #4a5568; }}
+            QTableView::item {{ background: #2d3748; padding: 10px; border-bottom: 1px solid #4a5568; }}
+            QTableView::item:selected {{ background: rgba(102, 126, 234, 0.4); }}
             QHeaderView::section {{ background: {header_color}; color: white; padding: 12px; border: none; font-weight: bold; font-size: 14px; }}
         """)
 
     def load_users_data(self):
-        try:
-            response = requests.get(f"{API_BASE}/api/users/", timeout=5)
-            if response.status_code == 200:
-                response_data = response.json()
-                # Backend returns {'status': 'success', 'data': [...]}
-                if isinstance(response_data, dict) and response_data.get('status') == 'success':
-                    users = response_data.get('data', [])
-                elif isinstance(response_data, list):
-                    users = response_data
-                else:
-                    users = []
-                
-                self.users_table.setRowCount(len(users))
-                for row, user in enumerate(users):
-                    # ID column
-                    id_item = QTableWidgetItem(str(user.get('id', '')))
-                    id_item.setData(Qt.UserRole, user.get('id'))
-                    self.users_table.setItem(row, 0, id_item)
-                    
-                    # Username
-                    self.users_table.setItem(row, 1, QTableWidgetItem(user.get('username', '')))
-                    
-                    # Email
-                    self.users_table.setItem(row, 2, QTableWidgetItem(user.get('email', '')))
-                    
-                    # Full Name (combine first_name and last_name from backend)
-                    first_name = user.get('first_name', '')
-                    last_name = user.get('last_name', '')
-                    full_name = f"{first_name} {last_name}".strip() or 'N/A'
-                    self.users_table.setItem(row, 3, QTableWidgetItem(full_name))
-                    
-                    # Admin status with color coding
-                    admin_item = QTableWidgetItem("✅ Yes" if user.get('is_admin', False) else "❌ No")
-                    if user.get('is_admin', False):
-                        admin_item.setForeground(QColor("#28a745"))
-                    else:
-                        admin_item.setForeground(QColor("#dc3545"))
-                    self.users_table.setItem(row, 4, admin_item)
-                    
-                    # Agent status with color coding
-                    agent_item = QTableWidgetItem("✅ Yes" if user.get('is_agent', False) else "❌ No")
-                    if user.get('is_agent', False):
-                        agent_item.setForeground(QColor("#28a745"))
-                    else:
-                        agent_item.setForeground(QColor("#dc3545"))
-                    self.users_table.setItem(row, 5, agent_item)
-                    
-                    # Active status with color coding
-                    active_item = QTableWidgetItem("✅ Active" if user.get('is_active', True) else "❌ Inactive")
-                    if user.get('is_active', True):
-                        active_item.setForeground(QColor("#28a745"))
-                    else:
-                        active_item.setForeground(QColor("#dc3545"))
-                    self.users_table.setItem(row, 6, active_item)
-                    
-                    # Date joined
-                    date_joined = user.get('date_joined', 'N/A')
-                    if date_joined and date_joined != 'N/A':
-                        # Format the date if it's a datetime string
-                        try:
-                            from datetime import datetime
-                            dt = datetime.strptime(date_joined, '%Y-%m-%d %H:%M:%S')
-                            date_joined = dt.strftime('%Y-%m-%d')
-                        except:
-                            pass  # Keep original format if parsing fails
-                    self.users_table.setItem(row, 7, QTableWidgetItem(str(date_joined)))
-                
-                self.users_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-                
-                if len(users) == 0:
-                    QMessageBox.information(self, "Info", "No users found in the system.")
-                    
+        api().get("/api/users/", timeout=5, key='users', on_success=self.show_users_data,
+                  on_error=lambda message: QMessageBox.warning(self, "Network Error", f"Could not load users data: {message}"))
+
+    def show_users_data(self, response):
+        if response.status_code == 200:
+            response_data = response.json()
+            # Backend returns {'status': 'success', 'data': [...]}
+            if isinstance(response_data, dict) and response_data.get('status') == 'success':
+                users = response_data.get('data', [])
+            elif isinstance(response_data, list):
+                users = response_data
             else:
-                QMessageBox.warning(self, "API Error", f"Failed to load users. Status: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Network Error", f"Could not load users data: {e}")
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"An error occurred while loading users: {e}")
+                users = []
+            
+            self.users_model.set_records(users)
+            self.users_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            
+            if len(users) == 0:
+                QMessageBox.information(self, "Info", "No users found in the system.")
+                
+        else:
+            QMessageBox.warning(self, "API Error", f"Failed to load users. Status: {response.status_code}")
 
     def show_create_user_dialog(self):
         dialog = CreateUserDialog(self)
@@ -2837,7 +3117,7 @@ class UsersManagementPage(QWidget):
         if not selected_rows:
             QMessageBox.warning(self, "No Selection", "Please select a user to edit.")
             return
-        user_id = self.users_table.item(selected_rows[0].row(), 0).data(Qt.UserRole)
+        user_id = self.users_model.record(selected_rows[0].row()).get('id')
         dialog = EditUserDialog(user_id, self)
         if dialog.exec_() == QDialog.Accepted:
             self.load_users_data()
@@ -2847,26 +3127,27 @@ class UsersManagementPage(QWidget):
         if not selected_rows:
             QMessageBox.warning(self, "No Selection", "Please select a user to delete.")
             return
-        user_id = self.users_table.item(selected_rows[0].row(), 0).data(Qt.UserRole)
-        username = self.users_table.item(selected_rows[0].row(), 0).text()
+        user = self.users_model.record(selected_rows[0].row())
+        user_id, username = user.get('id'), user.get('username', '')
         reply = QMessageBox.question(self, "Confirm Deletion", f"Are you sure you want to delete user '{username}'?\n\nThis action cannot be undone.", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            try:
-                response = requests.delete(f"{API_BASE}/api/users/{user_id}/delete/", timeout=5)
-                if response.status_code == 200:
-                    QMessageBox.information(self, "Success", "User deleted successfully!")
-                    self.load_users_data()
-                else:
-                    error_msg = response.json().get('message', 'Unknown error occurred')
-                    QMessageBox.warning(self, "Error", f"Failed to delete user: {error_msg}")
-            except requests.exceptions.RequestException as e:
-                QMessageBox.warning(self, "Network Error", f"Could not delete user: {e}")
+            api().delete(f"/api/users/{user_id}/delete/", timeout=5, on_success=self.user_deleted,
+                         on_error=lambda message: QMessageBox.warning(self, "Network Error", f"Could not delete user: {message}"))
+
+    def user_deleted(self, response):
+        if response.status_code == 200:
+            QMessageBox.information(self, "Success", "User deleted successfully!")
+            self.load_users_data()
+        else:
+            error_msg = response.json().get('message', 'Unknown error occurred')
+            QMessageBox.warning(self, "Error", f"Failed to delete user: {error_msg}")
 
 class MaintenanceReportPage(QWidget):
     """Page for adding maintenance records and viewing daily reports."""
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setStyleSheet("background: transparent; color: white;")
+        self.range_requests = []
         self.setup_ui()
         # Load cars after UI is fully initialized - use direct call since UI is now properly set up
         self.load_cars()
@@ -2993,55 +3274,67 @@ class MaintenanceReportPage(QWidget):
             QMessageBox.warning(self, "Invalid Range", "From date must be before or equal to To date.")
             return
             
-        try:
-            # Fetch data for each day in the range
-            current_date = self.from_date.date()
-            end_date = self.to_date.date()
-            
-            total_rentals = 0
-            total_revenue = 0.0
-            total_maintenance = 0.0
-            
-            while current_date <= end_date:
-                date_str = current_date.toString("yyyy-MM-dd")
-                resp = requests.get(f"{API_BASE}/api/reports/daily/", params={"date": date_str}, timeout=8)
-                
-                if resp.status_code == 200:
-                    data = resp.json()
-                    total_rentals += int(data.get('rentals_count', 0))
-                    total_revenue += float(data.get('rentals_revenue', 0) or 0)
-                    total_maintenance += float(data.get('maintenance_total', 0) or 0)
-                
-                current_date = current_date.addDays(1)
-            
-            net_income = total_revenue - total_maintenance
-            
-            self.rentals_count_label.setText(f"Total Rentals: {total_rentals}")
-            self.rental_revenue_label.setText(f"Total Revenue: {total_revenue:.2f}")
-            self.maintenance_expenses_label.setText(f"Total Maintenance: {total_maintenance:.2f}")
-            self.net_income_label.setText(f"Net Income: {net_income:.2f}")
-            
-            if total_rentals == 0 and total_revenue == 0 and total_maintenance == 0:
-                self.report_message.setText(f"No data for range {from_date_str} to {to_date_str}. Showing zeros.")
-            else:
-                days_count = self.from_date.date().daysTo(self.to_date.date()) + 1
-                self.report_message.setText(f"Range report: {from_date_str} to {to_date_str} ({days_count} days)")
-                
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Network Error", f"Could not fetch range report: {e}")
+        # Fetch all days of the range at once; a new range supersedes the previous one
+        api().cancel('report', owner=self)
+        for request in self.range_requests:
+            request.cancel()
+        days = []
+        current_date = self.from_date.date()
+        while current_date <= self.to_date.date():
+            days.append(current_date.toString("yyyy-MM-dd"))
+            current_date = current_date.addDays(1)
+        
+        self.range = {'start': from_date_str, 'end': to_date_str, 'days': len(days), 'received': 0,
+                      'rentals': 0, 'revenue': 0.0, 'maintenance': 0.0}
+        self.report_message.setText(f"Loading range report: {from_date_str} to {to_date_str}...")
+        self.range_requests = [
+            api().get("/api/reports/daily/", params={"date": date_str}, timeout=8,
+                      on_success=self.add_range_day, on_error=self.range_report_failed)
+            for date_str in days
+        ]
+
+    def add_range_day(self, resp):
+        totals = self.range
+        if resp.status_code == 200:
+            data = resp.json()
+            totals['rentals'] += int(data.get('rentals_count', 0))
+            totals['revenue'] += float(data.get('rentals_revenue', 0) or 0)
+            totals['maintenance'] += float(data.get('maintenance_total', 0) or 0)
+        totals['received'] += 1
+        if totals['received'] < totals['days']:
+            return
+        
+        total_rentals, total_revenue, total_maintenance = totals['rentals'], totals['revenue'], totals['maintenance']
+        net_income = total_revenue - total_maintenance
+        
+        self.rentals_count_label.setText(f"Total Rentals: {total_rentals}")
+        self.rental_revenue_label.setText(f"Total Revenue: {total_revenue:.2f}")
+        self.maintenance_expenses_label.setText(f"Total Maintenance: {total_maintenance:.2f}")
+        self.net_income_label.setText(f"Net Income: {net_income:.2f}")
+        
+        if total_rentals == 0 and total_revenue == 0 and total_maintenance == 0:
+            self.report_message.setText(f"No data for range {totals['start']} to {totals['end']}. Showing zeros.")
+        else:
+            self.report_message.setText(f"Range report: {totals['start']} to {totals['end']} ({totals['days']} days)")
+
+    def range_report_failed(self, message):
+        for request in self.range_requests:
+            request.cancel()
+        self.report_message.setText("")
+        QMessageBox.warning(self, "Network Error", f"Could not fetch range report: {message}")
 
     def load_cars(self):
-        try:
-            resp = requests.get(f"{API_BASE}/api/cars/available/", timeout=5)
-            if resp.status_code == 200:
-                cars = resp.json().get('data', [])
-                self.car_combo.clear()
-                for car in cars:
-                    self.car_combo.addItem(f"{car.get('brand','')} {car.get('model','')} ({car.get('license_plate','')})", car.get('id'))
-            else:
-                QMessageBox.warning(self, "Error", f"Failed to load cars: {resp.status_code}")
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Network Error", f"Could not load cars: {e}")
+        api().get("/api/cars/available/", timeout=5, key='cars', revalidate=True, on_success=self.show_cars,
+                  on_error=lambda message: QMessageBox.warning(self, "Network Error", f"Could not load cars: {message}"))
+
+    def show_cars(self, resp):
+        if resp.status_code == 200:
+            cars = resp.json().get('data', [])
+            self.car_combo.clear()
+            for car in cars:
+                self.car_combo.addItem(f"{car.get('brand','')} {car.get('model','')} ({car.get('license_plate','')})", car.get('id'))
+        else:
+            QMessageBox.warning(self, "Error", f"Failed to load cars: {resp.status_code}")
 
     def submit_maintenance(self):
         car_id = self.car_combo.currentData()
@@ -3057,50 +3350,65 @@ class MaintenanceReportPage(QWidget):
             QMessageBox.warning(self, "Validation Error", "Amount must be a number.")
             return
         payload = {"car_id": car_id, "amount": amount, "description": desc, "date": date_str}
-        try:
-            resp = requests.post(f"{API_BASE}/api/maintenance/add/", json=payload, timeout=8)
-            if resp.status_code == 200:
-                QMessageBox.information(self, "Success", "Maintenance record added.")
-                self.amount_input.clear()
-                self.desc_input.clear()
-            else:
-                try:
-                    msg = resp.json().get('message', resp.text)
-                except Exception:
-                    msg = resp.text
-                QMessageBox.warning(self, "Error", f"Failed to add maintenance: {msg}")
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Network Error", f"Could not add maintenance: {e}")
+        api().post("/api/maintenance/add/", json=payload, timeout=8, on_success=self.maintenance_added,
+                   on_error=lambda message: QMessageBox.warning(self, "Network Error", f"Could not add maintenance: {message}"))
+
+    def maintenance_added(self, resp):
+        if resp.status_code == 200:
+            QMessageBox.information(self, "Success", "Maintenance record added.")
+            self.amount_input.clear()
+            self.desc_input.clear()
+        else:
+            try:
+                msg = resp.json().get('message', resp.text)
+            except Exception:
+                msg = resp.text
+            QMessageBox.warning(self, "Error", f"Failed to add maintenance: {msg}")
 
     def fetch_report(self):
         date_str = self.report_date.date().toString("yyyy-MM-dd")
-        try:
-            resp = requests.get(f"{API_BASE}/api/reports/daily/", params={"date": date_str}, timeout=8)
-            if resp.status_code == 200:
-                data = resp.json()
-                # Backend returns data directly, not nested in 'data' key
-                rentals_count = int(data.get('rentals_count', 0))
-                rental_revenue = float(data.get('rentals_revenue', 0) or 0)  # Note: backend uses 'rentals_revenue'
-                maintenance_expenses = float(data.get('maintenance_total', 0) or 0)  # Note: backend uses 'maintenance_total'
-                net_income = rental_revenue - maintenance_expenses
-                
-                self.rentals_count_label.setText(f"Rentals: {rentals_count}")
-                self.rental_revenue_label.setText(f"Rental Revenue: {rental_revenue:.2f}")
-                self.maintenance_expenses_label.setText(f"Maintenance Expenses: {maintenance_expenses:.2f}")
-                self.net_income_label.setText(f"Net Income: {net_income:.2f}")
-                
-                if rentals_count == 0 and rental_revenue == 0 and maintenance_expenses == 0:
-                    self.report_message.setText("No data for the selected date. Showing zeros.")
-                else:
-                    self.report_message.setText(f"Report for {data.get('date', date_str)}")
+        for request in self.range_requests:
+            request.cancel()
+        api().get("/api/reports/daily/", params={"date": date_str}, timeout=8, key='report',
+                  on_success=lambda resp: self.show_report(date_str, resp), owner=self,
+                  on_error=lambda message: QMessageBox.warning(self, "Network Error", f"Could not fetch report: {message}"))
+
+    def show_report(self, date_str, resp):
+        if resp.status_code == 200:
+            data = resp.json()
+            # Backend returns data directly, not nested in 'data' key
+            rentals_count = int(data.get('rentals_count', 0))
+            rental_revenue = float(data.get('rentals_revenue', 0) or 0)  # Note: backend uses 'rentals_revenue'
+            maintenance_expenses = float(data.get('maintenance_total', 0) or 0)  # Note: backend uses 'maintenance_total'
+            net_income = rental_revenue - maintenance_expenses
+            
+            self.rentals_count_label.setText(f"Rentals: {rentals_count}")
+            self.rental_revenue_label.setText(f"Rental Revenue: {rental_revenue:.2f}")
+            self.maintenance_expenses_label.setText(f"Maintenance Expenses: {maintenance_expenses:.2f}")
+            self.net_income_label.setText(f"Net Income: {net_income:.2f}")
+            
+            if rentals_count == 0 and rental_revenue == 0 and maintenance_expenses == 0:
+                self.report_message.setText("No data for the selected date. Showing zeros.")
             else:
-                QMessageBox.warning(self, "Error", f"Failed to fetch report: {resp.status_code}")
-        except requests.exceptions.RequestException as e:
-            QMessageBox.warning(self, "Network Error", f"Could not fetch report: {e}")
+                self.report_message.setText(f"Report for {data.get('date', date_str)}")
+        else:
+            QMessageBox.warning(self, "Error", f"Failed to fetch report: {resp.status_code}")
 
 
 class DashboardWindow(QMainWindow):
     """The main dashboard window after a successful login."""
+    CAR_COLUMNS = [
+        TableColumn("Brand", lambda car: car.get('brand', 'N/A')),
+        TableColumn("Model", lambda car: car.get('model', 'N/A')),
+        TableColumn("Year", lambda car: car.get('year', 'N/A')),
+        TableColumn("License Plate", lambda car: car.get('license_plate', 'N/A')),
+        TableColumn("Color", lambda car: car.get('color', 'N/A')),
+        TableColumn("Price/Day", lambda car: car.get('price_per_day', 0), lambda price: f"{price} AED"),
+        TableColumn("Status", lambda car: car.get('available', True),
+                    lambda available: "✅ Available" if available else "❌ Rented",
+                    lambda available: "#28a745" if available else "#dc3545"),
+    ]
+
     def __init__(self, user_data):
         super().__init__()
         self.user_data = user_data
@@ -3111,6 +3419,8 @@ class DashboardWindow(QMainWindow):
         # Set a dark theme for the main window
         self.setStyleSheet("QMainWindow { background: #1a202c; }")
         
+        self.refresh_running = False
+        self.refresh_queued = False
         self.setup_ui()
         self.load_dashboard_data()
 
@@ -3320,6 +3630,7 @@ class DashboardWindow(QMainWindow):
         self.cars_page = self.create_cars_page()
         self.customers_page = self.create_customers_page()
         self.rentals_page = RentalsManagementPage()
+        self.rentals_page.data_changed.connect(self.refresh_all_data)
         self.maintenance_report_page = MaintenanceReportPage()
 
         self.content_stack.addWidget(self.dashboard_page)
@@ -3353,10 +3664,28 @@ class DashboardWindow(QMainWindow):
         return page
     
     def refresh_all_data(self):
-        self.load_dashboard_data()
-        self.load_cars_data()
-        self.load_customers_data()
-        self.rentals_page.load_rentals_data() # Refresh rentals page too
+        """Reload every table at once; results are shown as each call returns.
+
+        Refreshes asked for while one is running are merged into a single
+        follow-up refresh once it has settled.
+        """
+        if self.refresh_running:
+            self.refresh_queued = True
+            return
+        self.refresh_running = True
+        calls = [
+            self.load_dashboard_data(),
+            self.load_cars_data(),
+            self.load_customers_data(),
+            self.rentals_page.load_rentals_data(), # Refresh rentals page too
+        ]
+        api().when_settled(calls, self.refresh_settled)
+
+    def refresh_settled(self):
+        self.refresh_running = False
+        if self.refresh_queued:
+            self.refresh_queued = False
+            self.refresh_all_data()
 
     def create_cars_page(self):
         page = QWidget()
@@ -3394,7 +3723,9 @@ class DashboardWindow(QMainWindow):
         delete_car_btn.clicked.connect(self.delete_selected_cars)
         header_layout.addWidget(delete_car_btn)
 
-        self.cars_table = QTableWidget()
+        self.cars_table = QTableView()
+        self.cars_model = RecordTableModel(self.CAR_COLUMNS, self)
+        self.cars_table.setModel(self.cars_model)
         self.setup_table_style(self.cars_table)
         
         layout.addLayout(header_layout)
@@ -3510,7 +3841,7 @@ class DashboardWindow(QMainWindow):
         return page
         
     def setup_table_style(self, table, header_color="rgba(102, 126, 234, 0.8)"):
-        """Applies a consistent modern style to a QTableWidget with enhanced scrolling."""
+        """Applies a consistent modern style to a table view with enhanced scrolling."""
         table.setAlternatingRowColors(False)
         table.setSelectionBehavior(QAbstractItemView.SelectRows)
         table.setEditTriggers(QAbstractItemView.NoEditTriggers)
@@ -3525,19 +3856,19 @@ class DashboardWindow(QMainWindow):
         table.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         
         table.setStyleSheet(f"""
-            QTableWidget {{
+            QTableView {{
                 background: #2d3748;
                 border: 1px solid #4a5568;
                 border-radius: 10px;
                 color: white;
                 gridline-color: #4a5568;
             }}
-            QTableWidget::item {{
+            QTableView::item {{
                 background: #2d3748;
                 padding: 10px;
                 border-bottom: 1px solid #4a5568;
             }}
-            QTableWidget::item:selected {{
+            QTableView::item:selected {{
                 background: rgba(102, 126, 234, 0.4);
             }}
             QHeaderView::section {{
@@ -3549,142 +3880,119 @@ class DashboardWindow(QMainWindow):
                 font-size: 14px;
             }}
             /* Vertical Scrollbar */
-            QTableWidget QScrollBar:vertical {{
+            QTableView QScrollBar:vertical {{
                 border: none;
                 background: #1a202c;
                 width: 14px;
                 border-radius: 7px;
             }}
-            QTableWidget QScrollBar::handle:vertical {{
+            QTableView QScrollBar::handle:vertical {{
                 background: #4a5568;
                 min-height: 20px;
                 border-radius: 7px;
                 margin: 2px;
             }}
-            QTableWidget QScrollBar::handle:vertical:hover {{
+            QTableView QScrollBar::handle:vertical:hover {{
                 background: #667eea;
             }}
-            QTableWidget QScrollBar::handle:vertical:pressed {{
+            QTableView QScrollBar::handle:vertical:pressed {{
                 background: #553c9a;
             }}
-            QTableWidget QScrollBar::add-line:vertical,
-            QTableWidget QScrollBar::sub-line:vertical {{
+            QTableView QScrollBar::add-line:vertical,
+            QTableView QScrollBar::sub-line:vertical {{
                 border: none;
                 background: none;
             }}
-            QTableWidget QScrollBar::add-page:vertical,
-            QTableWidget QScrollBar::sub-page:vertical {{
+            QTableView QScrollBar::add-page:vertical,
+            QTableView QScrollBar::sub-page:vertical {{
                 background: none;
             }}
             /* Horizontal Scrollbar */
-            QTableWidget QScrollBar:horizontal {{
+            QTableView QScrollBar:horizontal {{
                 border: none;
                 background: #1a202c;
                 height: 14px;
                 border-radius: 7px;
             }}
-            QTableWidget QScrollBar::handle:horizontal {{
+            QTableView QScrollBar::handle:horizontal {{
                 background: #4a5568;
                 min-width: 20px;
                 border-radius: 7px;
                 margin: 2px;
             }}
-            QTableWidget QScrollBar::handle:horizontal:hover {{
+            QTableView QScrollBar::handle:horizontal:hover {{
                 background: #667eea;
             }}
-            QTableWidget QScrollBar::handle:horizontal:pressed {{
+            QTableView QScrollBar::handle:horizontal:pressed {{
                 background: #553c9a;
             }}
-            QTableWidget QScrollBar::add-line:horizontal,
-            QTableWidget QScrollBar::sub-line:horizontal {{
+            QTableView QScrollBar::add-line:horizontal,
+            QTableView QScrollBar::sub-line:horizontal {{
                 border: none;
                 background: none;
             }}
-            QTableWidget QScrollBar::add-page:horizontal,
-            QTableWidget QScrollBar::sub-page:horizontal {{
+            QTableView QScrollBar::add-page:horizontal,
+            QTableView QScrollBar::sub-page:horizontal {{
                 background: none;
             }}
         """)
 
     def load_dashboard_data(self):
-        try:
-            response = requests.get(f"{API_BASE}/api/dashboard/stats/", timeout=5)
-            if response.status_code == 200:
-                stats = response.json().get('data', {})
-                cards_data = [
-                    ("Total Cars", str(stats.get('total_cars', 0)), "🚗"),
-                    ("Available", str(stats.get('available_cars', 0)), "✅"),
-                    ("Active Rentals", str(stats.get('active_rentals', 0)), "📝"),
-                    ("Customers", str(stats.get('total_customers', 0)), "👥"),
-                    ("Violations", str(stats.get('total_violations', 0)), "⚠️"),
-                    ("Unpaid Bills", str(stats.get('unpaid_invoices', 0)), "💰")
-                ]
-                
-                # Clear existing cards
-                while self.stats_container.count():
-                    child = self.stats_container.takeAt(0)
-                    if child.widget():
-                        child.widget().deleteLater()
-                
-                for title, value, icon in cards_data:
-                    self.stats_container.addWidget(ModernCard(title, value, icon))
-                self.stats_container.addStretch()
-        except requests.exceptions.RequestException as e:
-            print(f"Could not load dashboard stats: {e}")
+        return api().get("/api/dashboard/stats/", timeout=5, key='stats', on_success=self.show_dashboard_data,
+                         on_error=lambda message: print(f"Could not load dashboard stats: {message}"))
+
+    def show_dashboard_data(self, response):
+        if response.status_code == 200:
+            stats = response.json().get('data', {})
+            cards_data = [
+                ("Total Cars", str(stats.get('total_cars', 0)), "🚗"),
+                ("Available", str(stats.get('available_cars', 0)), "✅"),
+                ("Active Rentals", str(stats.get('active_rentals', 0)), "📝"),
+                ("Customers", str(stats.get('total_customers', 0)), "👥"),
+                ("Violations", str(stats.get('total_violations', 0)), "⚠️"),
+                ("Unpaid Bills", str(stats.get('unpaid_invoices', 0)), "💰")
+            ]
+            
+            # Clear existing cards
+            while self.stats_container.count():
+                child = self.stats_container.takeAt(0)
+                if child.widget():
+                    child.widget().deleteLater()
+            
+            for title, value, icon in cards_data:
+                self.stats_container.addWidget(ModernCard(title, value, icon))
+            self.stats_container.addStretch()
 
     def load_cars_data(self):
-        try:
-            response = requests.get(f"{API_BASE}/api/cars/available/", timeout=5)
-            if response.status_code == 200:
-                cars = response.json().get('data', [])
-                self.cars_table.setRowCount(len(cars))
-                self.cars_table.setColumnCount(7)
-                self.cars_table.setHorizontalHeaderLabels(["Brand", "Model", "Year", "License Plate", "Color", "Price/Day", "Status"])
-                
-                for row, car in enumerate(cars):
-                    # Store car ID in the first item for easy access
-                    brand_item = QTableWidgetItem(car.get('brand', 'N/A'))
-                    brand_item.setData(Qt.UserRole, car.get('id'))
-                    self.cars_table.setItem(row, 0, brand_item)
-                    self.cars_table.setItem(row, 1, QTableWidgetItem(car.get('model', 'N/A')))
-                    self.cars_table.setItem(row, 2, QTableWidgetItem(str(car.get('year', 'N/A'))))
-                    self.cars_table.setItem(row, 3, QTableWidgetItem(car.get('license_plate', 'N/A')))
-                    self.cars_table.setItem(row, 4, QTableWidgetItem(car.get('color', 'N/A')))
-                    self.cars_table.setItem(row, 5, QTableWidgetItem(f"{car.get('price_per_day', 0)} AED"))
-                    
-                    status = "✅ Available" if car.get('available', True) else "❌ Rented"
-                    status_item = QTableWidgetItem(status)
-                    if car.get('available', True):
-                        status_item.setForeground(QColor("#28a745"))
-                    else:
-                        status_item.setForeground(QColor("#dc3545"))
-                    self.cars_table.setItem(row, 6, status_item)
-                
-                self.cars_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        except requests.exceptions.RequestException as e:
-            print(f"Could not load car data: {e}")
+        return api().get("/api/cars/available/", timeout=5, key='cars', revalidate=True, on_success=self.show_cars_data,
+                         on_error=lambda message: print(f"Could not load car data: {message}"))
+
+    def show_cars_data(self, response):
+        if response.status_code == 200:
+            self.cars_model.set_records(response.json().get('data', []))
+            self.cars_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
 
     def load_customers_data(self):
-        try:
-            response = requests.get(f"{API_BASE}/api/customers/", timeout=5)
-            if response.status_code == 200:
-                customers = response.json().get('data', [])
-                self.customers_table.setRowCount(len(customers))
-                self.customers_table.setColumnCount(5)
-                self.customers_table.setHorizontalHeaderLabels(["Full Name", "Email", "Phone", "National ID", "License"])
-                
-                for row, customer in enumerate(customers):
-                    item_name = QTableWidgetItem(customer.get('full_name', 'N/A'))
-                    item_name.setData(Qt.UserRole, customer.get('id'))
-                    self.customers_table.setItem(row, 0, item_name)
-                    self.customers_table.setItem(row, 1, QTableWidgetItem(customer.get('email', 'N/A')))
-                    self.customers_table.setItem(row, 2, QTableWidgetItem(customer.get('phone_number', 'N/A')))
-                    self.customers_table.setItem(row, 3, QTableWidgetItem(customer.get('National_ID', 'N/A')))
-                    self.customers_table.setItem(row, 4, QTableWidgetItem(customer.get('License_Number', 'N/A')))
-                
-                self.customers_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        except requests.exceptions.RequestException as e:
-            print(f"Could not load customer data: {e}")
+        return api().get("/api/customers/", timeout=5, key='customers', on_success=self.show_customers_data,
+                         on_error=lambda message: print(f"Could not load customer data: {message}"))
+
+    def show_customers_data(self, response):
+        if response.status_code == 200:
+            customers = response.json().get('data', [])
+            self.customers_table.setRowCount(len(customers))
+            self.customers_table.setColumnCount(5)
+            self.customers_table.setHorizontalHeaderLabels(["Full Name", "Email", "Phone", "National ID", "License"])
+            
+            for row, customer in enumerate(customers):
+                item_name = QTableWidgetItem(customer.get('full_name', 'N/A'))
+                item_name.setData(Qt.UserRole, customer.get('id'))
+                self.customers_table.setItem(row, 0, item_name)
+                self.customers_table.setItem(row, 1, QTableWidgetItem(customer.get('email', 'N/A')))
+                self.customers_table.setItem(row, 2, QTableWidgetItem(customer.get('phone_number', 'N/A')))
+                self.customers_table.setItem(row, 3, QTableWidgetItem(customer.get('National_ID', 'N/A')))
+                self.customers_table.setItem(row, 4, QTableWidgetItem(customer.get('License_Number', 'N/A')))
+            
+            self.customers_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
 
     def show_add_car_dialog(self):
         dialog = AddCarDialog(self)
@@ -3750,63 +4058,69 @@ class DashboardWindow(QMainWindow):
         if confirm != QMessageBox.Yes:
             return
             
+        deletions = []
         for row in sorted(list(selected_rows), reverse=True):
             customer_id_item = self.customers_table.item(row, 0)
             if customer_id_item is not None:
                 customer_id = customer_id_item.data(Qt.UserRole)
                 if customer_id:
-                    try:
-                        response = requests.delete(f"{API_BASE}/api/customers/{customer_id}/delete/")
-                        if response.status_code != 200:
-                             print(f"Failed to delete customer {customer_id}: {response.text}")
-                    except Exception as e:
-                        print(f"Failed to delete customer: {e}")
+                    deletions.append(api().delete(
+                        f"/api/customers/{customer_id}/delete/", timeout=10, owner=self,
+                        on_success=lambda response, customer_id=customer_id: self.customer_deleted(customer_id, response),
+                        on_error=lambda message: print(f"Failed to delete customer: {message}")))
         
         # Refresh data after deletion
+        api().when_settled(deletions, self.customers_deleted)
+
+    def customer_deleted(self, customer_id, response):
+        if response.status_code != 200:
+            print(f"Failed to delete customer {customer_id}: {response.text}")
+
+    def customers_deleted(self):
         self.load_customers_data()
         self.load_customer_profiles()
         self.load_dashboard_data()
     
     def load_customer_profiles(self):
         """Load customer data and create profile cards."""
-        try:
-            response = requests.get(f"{API_BASE}/api/customers/", timeout=5)
-            if response.status_code == 200:
-                customers = response.json().get('data', [])
-                
-                # Clear existing profile cards
-                for card in self.customer_profile_cards:
-                    card.setParent(None)
-                    card.deleteLater()
-                self.customer_profile_cards.clear()
-                
-                # Clear layout
-                while self.profiles_layout.count():
-                    child = self.profiles_layout.takeAt(0)
-                    if child.widget():
-                        child.widget().deleteLater()
-                
-                # Create profile cards
-                row, col = 0, 0
-                max_cols = 4  # Number of cards per row
-                
-                for customer in customers:
-                    profile_card = CustomerProfileCard(customer)
-                    profile_card.profile_clicked.connect(self.show_customer_profile_dialog)
-                    
-                    self.profiles_layout.addWidget(profile_card, row, col)
-                    self.customer_profile_cards.append(profile_card)
-                    
-                    col += 1
-                    if col >= max_cols:
-                        col = 0
-                        row += 1
+        api().get("/api/customers/", timeout=5, key='profiles', on_success=self.show_customer_profiles,
+                  on_error=lambda message: print(f"Could not load customer profiles: {message}"))
+
+    def show_customer_profiles(self, response):
+        if response.status_code == 200:
+            customers = response.json().get('data', [])
+            
+            # Clear existing profile cards
+            for card in self.customer_profile_cards:
+                card.setParent(None)
+                card.deleteLater()
+            self.customer_profile_cards.clear()
+            
+            # Clear layout
+            while self.profiles_layout.count():
+                child = self.profiles_layout.takeAt(0)
+                if child.widget():
+                    child.widget().deleteLater()
+            
+            # Create profile cards
+            row, col = 0, 0
+            max_cols = 4  # Number of cards per row
+            
+            for customer in customers:
+                profile_card = CustomerProfileCard(customer)
+                profile_card.profile_clicked.connect(self.show_customer_profile_dialog)
                 
-                # Add stretch to fill remaining space
-                self.profiles_layout.setRowStretch(row + 1, 1)
+                self.profiles_layout.addWidget(profile_card, row, col)
+                self.customer_profile_cards.append(profile_card)
                 
-        except requests.exceptions.RequestException as e:
-            print(f"Could not load customer profiles: {e}")
+                col += 1
+                if col >= max_cols:
+                    col = 0
+                    row += 1
+            
+            # Add stretch to fill remaining space
+            self.profiles_layout.setRowStretch(row + 1, 1)
+            
     
     def filter_customer_profiles(self):
         """Filter customer profile cards based on search input."""
@@ -3847,13 +4161,13 @@ class DashboardWindow(QMainWindow):
             self.load_customers_data()
     
     def edit_selected_car(self):
-        selected = self.cars_table.selectedItems()
+        selected = self.cars_table.selectionModel().selectedRows()
         if not selected:
             QMessageBox.warning(self, "No Selection", "Please select a car to edit.")
             return
         
         row = selected[0].row()
-        car_id = self.cars_table.item(row, 0).data(Qt.UserRole)
+        car_id = self.cars_model.record(row).get('id')
         if not car_id:
             QMessageBox.warning(self, "Error", "Could not determine car ID.")
             return
@@ -3868,7 +4182,7 @@ class DashboardWindow(QMainWindow):
             self.load_dashboard_data()
 
     def delete_selected_cars(self):
-        selected_rows = set(idx.row() for idx in self.cars_table.selectedIndexes())
+        selected_rows = set(idx.row() for idx in self.cars_table.selectionModel().selectedRows())
         if not selected_rows:
             QMessageBox.warning(self, "No Selection", "Please select one or more cars to delete.")
             return
@@ -3881,25 +4195,29 @@ class DashboardWindow(QMainWindow):
         if confirm != QMessageBox.Yes:
             return
             
+        deletions = []
         for row in sorted(list(selected_rows), reverse=True):
-            car_id_item = self.cars_table.item(row, 0)
-            if car_id_item is not None:
-                car_id = car_id_item.data(Qt.UserRole)
-                if car_id:
-                    try:
-                        response = requests.delete(f"{API_BASE}/api/cars/{car_id}/delete/")
-                        if response.status_code != 200:
-                            error_msg = response.json().get('message', 'Unknown error')
-                            QMessageBox.warning(self, "Delete Failed", f"Failed to delete car: {error_msg}")
-                    except Exception as e:
-                        QMessageBox.warning(self, "Delete Failed", f"Failed to delete car: {e}")
+            car_id = self.cars_model.record(row).get('id')
+            if car_id:
+                deletions.append(api().delete(
+                    f"/api/cars/{car_id}/delete/", timeout=10, on_success=self.car_deleted,
+                    on_error=lambda message: QMessageBox.warning(self, "Delete Failed", f"Failed to delete car: {message}")))
         
         # Refresh data after deletion
+        api().when_settled(deletions, self.cars_deleted)
+
+    def car_deleted(self, response):
+        if response.status_code != 200:
+            error_msg = response.json().get('message', 'Unknown error')
+            QMessageBox.warning(self, "Delete Failed", f"Failed to delete car: {error_msg}")
+
+    def cars_deleted(self):
         self.load_cars_data()
         self.load_dashboard_data()
     
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(api().close)
     login = LoginWindow()
     login.show()
 
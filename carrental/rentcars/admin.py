@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Car, Customer, Rental, Violation, Invoice, CustomUser, Maintenance
+from .search import filter_customers
+from .models import Car, Customer, Rental, Violation, Invoice, CustomUser, Maintenance, Job, AgentDailyStats
 
 class CarAdmin(admin.ModelAdmin):
     list_display = ('brand', 'model', 'year', 'license_plate', 'price_per_day', 'available', 'main_image_preview')
@@ -31,6 +32,10 @@ class CustomerAdmin(admin.ModelAdmin):
     search_fields = ('full_name', 'email', 'National_ID')
     readonly_fields = ('profile_image_preview', 'license_image_preview')
     
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE '%term%' scans over search_fields
+        return filter_customers(queryset, search_term), False
+    
     def profile_image_preview(self, obj):
         if obj.profile_image:
             return format_html('<img src="{}" width="50" height="50" style="border-radius: 50%;" />', obj.profile_image.url)
@@ -46,6 +51,7 @@ class CustomerAdmin(admin.ModelAdmin):
 class RentalAdmin(admin.ModelAdmin):
     exclude = ('agent',)  # Hide agent field from the form
     list_display = ('customer', 'car', 'start_date', 'end_date', 'status', 'total_price')
+    list_select_related = ('customer', 'car')
     list_filter = ('status', 'start_date')
     search_fields = ('customer__full_name', 'car__license_plate')
 
@@ -54,14 +60,44 @@ class RentalAdmin(admin.ModelAdmin):
             obj.agent = request.user
         obj.save()
 
+class ViolationAdmin(admin.ModelAdmin):
+    # __str__ walks rental.car, so load it with the changelist query
+    list_select_related = ('rental__car',)
+
+class InvoiceAdmin(admin.ModelAdmin):
+    # __str__ walks rental.customer
+    list_select_related = ('rental__customer',)
+
 admin.site.register(Car, CarAdmin)
 admin.site.register(Customer, CustomerAdmin)
 admin.site.register(Rental, RentalAdmin)  # Use the custom admin
-admin.site.register(Violation)
-admin.site.register(Invoice)
+admin.site.register(Violation, ViolationAdmin)
+admin.site.register(Invoice, InvoiceAdmin)
 admin.site.register(CustomUser)
 @admin.register(Maintenance)
 class MaintenanceAdmin(admin.ModelAdmin):
     list_display = ('car', 'amount', 'date', 'description')
+    list_select_related = ('car',)
     list_filter = ('date', 'car__brand')
     search_fields = ('car__license_plate', 'car__model', 'description')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'priority', 'attempts', 'run_after', 'finished_at')
+    list_filter = ('status', 'task')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(AgentDailyStats)
+class AgentDailyStatsAdmin(admin.ModelAdmin):
+    # Maintained by signals; edit rentals instead, or run `manage.py rebuild_agent_stats`
+    list_display = ('day', 'agent', 'rentals', 'cancelled', 'revenue', 'violations', 'completed')
+    list_filter = ('agent',)
+    list_select_related = ('agent',)
+    date_hierarchy = 'day'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,168 @@
+"""Incrementally maintained per-agent, per-day counters for the agent leaderboard.
+
+Every rental with an agent contributes to the AgentDailyStats row of
+(agent, start_date): a rental (or a cancellation), its revenue and length,
+its violations and, once completed, how long after the scheduled end date it
+was closed. Signals (see signals.py) apply the difference between a rental's
+contribution before and after each save or delete, and violations add or
+remove one from their rental's row, in the same transaction as the write. The
+leaderboard then sums at most agents x days rows instead of scanning rentals.
+
+Writes that bypass model signals (queryset.update(), raw SQL, bulk loads such
+as seed_fleet) must be followed by rebuild(), also available as
+`manage.py rebuild_agent_stats`.
+"""
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import AgentDailyStats
+
+COUNTERS = ('rentals', 'cancelled', 'revenue', 'rental_days', 'violations', 'completed', 'completion_seconds',
+            'timed_completions')
+RENTAL_FIELDS = ('agent_id', 'status', 'total_price', 'start_date', 'end_date', 'completed_at')
+
+
+def completion_seconds(end_date, completed_at):
+    """Seconds between the start of the scheduled end date and completion (negative if early)."""
+    scheduled = timezone.make_aware(datetime.combine(end_date, time.min), timezone.get_default_timezone())
+    return int((completed_at - scheduled).total_seconds())
+
+
+def contribution(status, total_price, start_date, end_date, completed_at):
+    """The counters one rental adds to its agent's day, violations excluded."""
+    if status == 'cancelled':
+        return {'cancelled': 1}
+    counters = {
+        'rentals': 1,
+        'revenue': total_price or Decimal('0'),
+        'rental_days': (end_date - start_date).days,
+    }
+    if status == 'completed':
+        counters['completed'] = 1
+        if completed_at is not None:
+            counters['completion_seconds'] = completion_seconds(end_date, completed_at)
+            counters['timed_completions'] = 1
+    return counters
+
+
+def rental_state(values):
+    """(agent_id, day) and counters for a RENTAL_FIELDS tuple, or None for rentals without an agent."""
+    agent_id, status, total_price, start_date, end_date, completed_at = values
+    if agent_id is None:
+        return None
+    return (agent_id, start_date), contribution(status, total_price, start_date, end_date, completed_at)
+
+
+def apply(key, counters, sign=1):
+    """Add (or with sign=-1 subtract) counters to the row for key = (agent_id, day)."""
+    counters = {name: value for name, value in counters.items() if value}
+    if not counters:
+        return
+    agent_id, day = key
+    changes = {name: F(name) + sign * value for name, value in counters.items()}
+    rows = AgentDailyStats.objects.filter(agent_id=agent_id, day=day)
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            AgentDailyStats.objects.create(
+                agent_id=agent_id, day=day, **{name: sign * value for name, value in counters.items()}
+            )
+    except IntegrityError:
+        # Another transaction created the row first
+        rows.update(**changes)
+
+
+def subtract(new, old):
+    return {name: new.get(name, 0) - old.get(name, 0) for name in set(new) | set(old)}
+
+
+def rental_saved(rental, previous):
+    """Apply a rental save; ``previous`` maps field names to stored values (None when created)."""
+    new = rental_state(tuple(getattr(rental, name) for name in RENTAL_FIELDS))
+    old = rental_state(tuple(previous[name] for name in RENTAL_FIELDS)) if previous else None
+    if new and old and new[0] == old[0]:
+        apply(new[0], subtract(new[1], old[1]))
+        return
+    # The rental moved to another agent or day (or gained/lost its agent): so do its violations
+    violations = rental.violations.count() if previous else 0
+    if old:
+        apply(old[0], {**old[1], 'violations': violations}, sign=-1)
+    if new:
+        apply(new[0], {**new[1], 'violations': violations})
+
+
+def rental_deleted(rental):
+    # Cascaded violations are subtracted by their own post_delete signal
+    state = rental_state(tuple(getattr(rental, name) for name in RENTAL_FIELDS))
+    if state:
+        apply(state[0], state[1], sign=-1)
+
+
+def violation_moved(rental, sign):
+    """Count a violation in (sign=1) or out of (sign=-1) the row of its rental, a dict with agent_id and start_date."""
+    if rental and rental['agent_id'] is not None:
+        apply((rental['agent_id'], rental['start_date']), {'violations': 1}, sign)
+
+
+def rebuild(apps=global_apps):
+    """Recompute every counter from the rentals and violations tables."""
+    rental_model = apps.get_model('rentcars', 'Rental')
+    violation_model = apps.get_model('rentcars', 'Violation')
+    stats_model = apps.get_model('rentcars', 'AgentDailyStats')
+
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    rentals = rental_model.objects.exclude(agent=None).order_by().values_list(*RENTAL_FIELDS)
+    for values in rentals.iterator(chunk_size=5000):
+        key, counters = rental_state(values)
+        row = totals[key]
+        for name, value in counters.items():
+            row[name] += value
+    violations = (
+        violation_model.objects.exclude(rental__agent=None).order_by()
+        .values_list('rental__agent_id', 'rental__start_date').annotate(count=Count('id'))
+    )
+    for agent_id, day, count in violations:
+        totals[agent_id, day]['violations'] += count
+
+    with transaction.atomic():
+        stats_model.objects.all().delete()
+        stats_model.objects.bulk_create(
+            (stats_model(agent_id=agent_id, day=day, **row) for (agent_id, day), row in totals.items()),
+            batch_size=2000,
+        )
+    return len(totals)
+
+
+def leaderboard(start, end):
+    """Per-agent totals and derived rates between start and end (inclusive), from the daily counters."""
+    rows = (
+        AgentDailyStats.objects.filter(day__range=(start, end)).order_by()
+        .values('agent_id', 'agent__username', 'agent__first_name', 'agent__last_name')
+        .annotate(**{f'total_{name}': Sum(name) for name in COUNTERS})
+    )
+    agents = []
+    for row in rows:
+        name = f"{row['agent__first_name']} {row['agent__last_name']}".strip()
+        total = {counter: row[f'total_{counter}'] for counter in COUNTERS}
+        rentals, timed = total['rentals'], total['timed_completions']
+        agents.append({
+            'agent_id': row['agent_id'],
+            'username': row['agent__username'],
+            'name': name or row['agent__username'],
+            'rentals': rentals,
+            'cancelled': total['cancelled'],
+            'completed': total['completed'],
+            'revenue': float(total['revenue']),
+            'average_rental_days': round(total['rental_days'] / rentals, 2) if rentals else None,
+            'violations': total['violations'],
+            'violation_rate': round(total['violations'] / rentals, 4) if rentals else None,
+            'average_completion_hours': round(total['completion_seconds'] / timed / 3600, 2) if timed else None,
+        })
+    return agents
@@ -0,0 +1,214 @@
+"""Columnar snapshots of the rental data for BI, as Parquet or Arrow IPC files.
+
+Each run writes, per entity, the rows whose ``updated_at`` moved since the
+previous run (all rows on the first run or with ``full=True``) to
+
+    <output>/<entity>/snapshot_date=YYYY-MM-DD/part-<run>.parquet
+
+so readers can treat the directory as a Hive-partitioned dataset and keep the
+latest version of each ``id``. Rows are streamed from the ORM in chunks and
+written one record batch (Parquet row group) per chunk, so memory use does
+not grow with table size. pyarrow is an optional dependency.
+
+``updated_at`` is set when a row is saved, not when its transaction commits,
+so a slow transaction can commit a row stamped before the previous run's
+cut-off. The watermark kept per entity in <output>/_state.json therefore
+trails the run by ANALYTICS_EXPORT_OVERLAP_SECONDS: the next run reads that
+window again and skips the (id, updated_at) pairs it already wrote.
+Transactions running longer than the overlap can still be missed (use
+``full=True`` to resync). Deleted rows are never exported.
+"""
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Car, Invoice, Maintenance, Rental, Violation
+
+ENTITIES = {
+    'rentals': Rental,
+    'invoices': Invoice,
+    'violations': Violation,
+    'maintenance': Maintenance,
+    'cars': Car,
+}
+FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+STATE_FILE = '_state.json'
+# Derived columns BI has no use for; file fields are skipped as well
+SKIPPED_FIELDS = {'search_key', 'pdf_revision'}
+
+
+def load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImproperlyConfigured("Analytics export needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def export_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if not isinstance(field, models.FileField) and field.name not in SKIPPED_FIELDS
+    ]
+
+
+def arrow_type(pa, field):
+    if isinstance(field, models.ForeignKey):
+        field = field.target_field
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    return pa.string()
+
+
+def read_state(output_dir):
+    path = Path(output_dir) / STATE_FILE
+    if not path.exists():
+        return {}
+    state = json.loads(path.read_text())
+    # Older state files kept just the watermark per entity
+    return {name: {'since': value, 'seen': {}} if isinstance(value, str) else value for name, value in state.items()}
+
+
+def write_state(output_dir, state):
+    path = Path(output_dir) / STATE_FILE
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+class BatchWriter:
+    """Writes record batches to a temporary file, renamed into place on close."""
+
+    def __init__(self, pa, path, schema, fmt):
+        self.path = path
+        self.tmp = path.with_name(f'.{path.name}.tmp')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if fmt == 'parquet':
+            self.writer = pa.parquet.ParquetWriter(self.tmp, schema, compression='zstd')
+        else:
+            self.sink = pa.OSFile(str(self.tmp), 'wb')
+            self.writer = pa.ipc.new_file(self.sink, schema)
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+
+    def _close_files(self):
+        self.writer.close()
+        if hasattr(self, 'sink'):
+            self.sink.close()
+
+    def close(self):
+        self._close_files()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        self._close_files()
+        self.tmp.unlink(missing_ok=True)
+
+
+def export_entity(pa, name, model, output_dir, fmt, since, until, chunk_size, run_id, on_progress=None,
+                  seen=None, watermark=None):
+    """Write the rows changed in (since, until]; returns the summary and the
+    {id: updated_at} of the written rows newer than ``watermark``.
+
+    Rows listed in ``seen`` with the same updated_at were written by the
+    previous run and are skipped.
+    """
+    fields = export_fields(model)
+    schema = pa.schema([pa.field(field.attname, arrow_type(pa, field)) for field in fields])
+    attnames = [field.attname for field in fields]
+    pk_index, updated_index = attnames.index(model._meta.pk.attname), attnames.index('updated_at')
+    seen = seen or {}
+    rows = model.objects.filter(updated_at__lte=until)
+    if since is not None:
+        rows = rows.filter(updated_at__gt=since)
+    rows = rows.order_by('pk').values_list(*attnames).iterator(chunk_size=chunk_size)
+
+    path = Path(output_dir) / name / f'snapshot_date={until:%Y-%m-%d}' / f'part-{run_id}.{FORMATS[fmt]}'
+    writer, count, chunk, written = None, 0, [], {}
+
+    def flush():
+        columns = list(zip(*chunk))
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(column, type=schema.field(i).type) for i, column in enumerate(columns)], schema=schema
+        )
+        writer.write(batch)
+        chunk.clear()
+        if on_progress is not None:
+            on_progress()
+
+    try:
+        for row in rows:
+            pk, updated = str(row[pk_index]), row[updated_index].isoformat()
+            if seen.get(pk) == updated:
+                continue
+            if watermark is not None and row[updated_index] > watermark:
+                written[pk] = updated
+            if writer is None:
+                writer = BatchWriter(pa, path, schema, fmt)
+            chunk.append(row)
+            count += 1
+            if len(chunk) == chunk_size:
+                flush()
+        if chunk:
+            flush()
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        writer.close()
+    return {'rows': count, 'path': str(path) if count else None}, written
+
+
+def export_analytics(output_dir, fmt='parquet', entities=None, full=False, chunk_size=50000, on_progress=None):
+    """Export changed rows of each entity; returns {entity: {'rows': n, 'path': ...}}.
+
+    ``on_progress`` is called after every written chunk (the job task uses it
+    as a heartbeat).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', choose from: {', '.join(FORMATS)}")
+    unknown = set(entities or ()) - set(ENTITIES)
+    if unknown:
+        raise ValueError(f"Unknown entities: {', '.join(sorted(unknown))}")
+    pa = load_pyarrow()
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    state = read_state(output_dir)
+    until = timezone.now()
+    watermark = until - timedelta(seconds=getattr(settings, 'ANALYTICS_EXPORT_OVERLAP_SECONDS', 600))
+    run_id = until.strftime('%Y%m%dT%H%M%S%f')
+    summary = {}
+    for name in entities or ENTITIES:
+        previous = {} if full else state.get(name, {})
+        since = parse_datetime(previous['since']) if previous else None
+        summary[name], written = export_entity(
+            pa, name, ENTITIES[name], output_dir, fmt, since, until, chunk_size, run_id, on_progress,
+            seen=previous.get('seen'), watermark=watermark,
+        )
+        # Rows of the previous run still inside the overlap must stay skipped next time
+        seen = {pk: updated for pk, updated in previous.get('seen', {}).items()
+                if parse_datetime(updated) > watermark}
+        state[name] = {'since': watermark.isoformat(), 'seen': {**seen, **written}}
+        write_state(output_dir, state)
+    return summary
@@ -0,0 +1,125 @@
+# Analytics Endpoints
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from . import agent_stats, jobs, profitability, utilization
+from .analytics_export import ENTITIES, FORMATS
+from .permissions import admin_required
+from .query_inspection import query_budget
+from .responses import JsonResponse
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@admin_required
+def export_analytics(request):
+    """Queue an incremental Parquet/Arrow export; poll /api/jobs/<id>/ for the result"""
+    try:
+        data = json.loads(request.body or b'{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON body'}, status=400)
+    fmt = data.get('format', 'parquet')
+    entities = data.get('entities') or None
+    if fmt not in FORMATS:
+        return JsonResponse({'status': 'error', 'message': f"format must be one of: {', '.join(FORMATS)}"}, status=400)
+    if entities and (not isinstance(entities, list) or set(entities) - set(ENTITIES)):
+        return JsonResponse({'status': 'error', 'message': f"entities must be a list of: {', '.join(ENTITIES)}"},
+                            status=400)
+    job = jobs.enqueue('analytics.export', {'fmt': fmt, 'entities': entities, 'full': bool(data.get('full'))},
+                       max_attempts=1)
+    return JsonResponse({'status': 'success', 'job_id': job.id}, status=202)
+
+
+MAX_WINDOW_DAYS = 3 * 366 + 1
+
+
+def parse_period(request, default_days=90):
+    """start/end query parameters (YYYY-MM-DD, inclusive); defaults to the last ``default_days`` days."""
+    start_default, end_default = utilization.default_window(timezone.localdate(), default_days)
+    start = parse_date(request.GET['start']) if request.GET.get('start') else start_default
+    end = parse_date(request.GET['end']) if request.GET.get('end') else end_default
+    if start is None or end is None:
+        raise ValueError('start and end must be YYYY-MM-DD')
+    if end < start:
+        raise ValueError('end must not be before start')
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise ValueError(f'The period is limited to {MAX_WINDOW_DAYS} days')
+    return start, end
+
+
+@require_http_methods(["GET"])
+def fleet_utilization(request):
+    """Occupancy-based utilization for the fleet, each brand and the least used cars
+
+    Query parameters: start, end (YYYY-MM-DD), brand, limit (cars listed, default 50),
+    sort (idle: lowest utilization first, the default; top: highest first).
+    """
+    try:
+        start, end = parse_period(request)
+        limit = int(request.GET.get('limit', 50))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    report = utilization.cached_fleet_utilization(start, end, brand=request.GET.get('brand') or None)
+    report['cars'].sort(key=lambda car: car['utilization'], reverse=request.GET.get('sort') == 'top')
+    report['cars'] = report['cars'][:max(limit, 0)]
+    return JsonResponse({'status': 'success', 'data': report})
+
+
+@require_http_methods(["GET"])
+@query_budget(4)
+def car_profitability(request):
+    """Per-car rental revenue, unpaid violations, maintenance cost and net margin
+
+    Query parameters: start, end (YYYY-MM-DD), brand, limit (cars listed, default 50),
+    sort (margin: highest net margin first, the default; loss: lowest first).
+    """
+    try:
+        start, end = parse_period(request)
+        limit = int(request.GET.get('limit', 50))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    report = profitability.cached_car_profitability(start, end, brand=request.GET.get('brand') or None)
+    report['cars'].sort(key=lambda car: car['net_margin'], reverse=request.GET.get('sort') != 'loss')
+    report['cars'] = report['cars'][:max(limit, 0)]
+    return JsonResponse({'status': 'success', 'data': report})
+
+
+LEADERBOARD_SORTS = {
+    'revenue': ('revenue', True),
+    'rentals': ('rentals', True),
+    'violation_rate': ('violation_rate', False),
+    'completion': ('average_completion_hours', False),
+}
+
+
+@require_http_methods(["GET"])
+@query_budget(1)
+def agent_leaderboard(request):
+    """Per-agent rentals, revenue, average rental length, violation rate and completion latency
+
+    Query parameters: start, end (YYYY-MM-DD, default the last 30 days), sort (revenue, the
+    default, or rentals: highest first; violation_rate or completion: lowest first).
+    """
+    try:
+        start, end = parse_period(request, default_days=30)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    sort = request.GET.get('sort', 'revenue')
+    if sort not in LEADERBOARD_SORTS:
+        return JsonResponse({'status': 'error', 'message': f"sort must be one of: {', '.join(LEADERBOARD_SORTS)}"},
+                            status=400)
+    field, descending = LEADERBOARD_SORTS[sort]
+    agents = agent_stats.leaderboard(start, end)
+    # Agents without a value for the metric go last either way
+    agents.sort(key=lambda agent: (agent[field] is None, (agent[field] or 0) * (-1 if descending else 1)))
+    for rank, agent in enumerate(agents, 1):
+        agent['rank'] = rank
+    return JsonResponse({
+        'status': 'success',
+        'period': {'start': start.isoformat(), 'end': end.isoformat(), 'days': (end - start).days + 1},
+        'agents': agents,
+    })
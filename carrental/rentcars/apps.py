@@ -7,3 +7,4 @@ class RentcarsConfig(AppConfig):
 
     def ready(self):
         import rentcars.signals
+        import rentcars.tasks
@@ -0,0 +1,245 @@
+"""In-process, versioned snapshot of the car catalog.
+
+Car listings are read far more often than the fleet changes, so each process
+keeps one pre-serialized copy of every car plus a few indexes (brand buckets,
+cars sorted by price, lowercased model names) and answers the available/all
+cars endpoints from memory. The same snapshot holds a token index over each
+car's search_key (sorted tokens for prefix lookups, trigrams for fuzzy and
+substring matches) behind /api/cars/search/.
+
+The snapshot is tagged with a catalog version held in the "versions" cache,
+which every server process shares and which must increment atomically (a
+locked file cache by default, see version_cache.py). Car and Rental writes
+bump the version (see signals.py); a process notices the new version on its
+next read and rebuilds. The cached utilization and profitability reports are
+keyed by versions from the same functions.
+"""
+import bisect
+import re
+import threading
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Car
+from .renderers import render_json
+
+VERSION_KEY = 'rentcars:car_catalog_version'
+# Minimum share of a search term's trigrams a car must contain to match fuzzily
+TRIGRAM_THRESHOLD = 0.6
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def initial_version():
+    # Not 1: a version lost from the cache must not match a snapshot built before
+    return time.time_ns()
+
+
+def current_version(key=VERSION_KEY):
+    cache = caches['versions']
+    version = cache.get(key)
+    if version is None:
+        # First process up (or the cache was cleared): start a fresh version
+        version = initial_version()
+        cache.add(key, version, timeout=None)
+        version = cache.get(key, version)
+    return version
+
+
+def bump_version(key=VERSION_KEY):
+    cache = caches['versions']
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, initial_version(), timeout=None)
+
+
+def invalidate(key=VERSION_KEY):
+    """Bump the catalog version (or another version ``key``) now and again once the transaction commits.
+
+    The first bump lets the writing request read its own change; the second
+    discards any snapshot another process built before the commit landed.
+    """
+    bump_version(key)
+    transaction.on_commit(lambda: bump_version(key))
+
+
+CAR_COLUMNS = [
+    'id', 'brand', 'model', 'year', 'license_plate', 'color', 'price_per_day', 'available', 'description',
+    'main_image_url', 'interior_image_url', 'exterior_image_url',
+]
+
+
+def serialize_car(car):
+    return {
+        'id': car.id,
+        'brand': car.brand,
+        'model': car.model,
+        'year': car.year,
+        'license_plate': car.license_plate,
+        'color': car.color,
+        'price_per_day': float(car.price_per_day),
+        'available': car.available,
+        'description': car.description,
+        'main_image_url': car.main_image.url if car.main_image else None,
+        'interior_image_url': car.interior_image.url if car.interior_image else None,
+        'exterior_image_url': car.exterior_image.url if car.exterior_image else None,
+    }
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class CatalogSnapshot:
+    """Every car serialized once, in default (newest first) order, with lookup indexes."""
+
+    def __init__(self, version, cars):
+        cars = list(cars)
+        self.version = version
+        self.cars = [serialize_car(car) for car in cars]
+        self.available = [pos for pos, car in enumerate(self.cars) if car['available']]
+        self.by_brand = {}
+        for pos, car in enumerate(self.cars):
+            self.by_brand.setdefault(car['brand'], []).append(pos)
+        by_price = sorted(range(len(self.cars)), key=lambda pos: self.cars[pos]['price_per_day'])
+        self.prices = [self.cars[pos]['price_per_day'] for pos in by_price]
+        self.by_price = by_price
+        self.models = [car['model'].lower() for car in self.cars]
+        self._encoded = {}
+        self._rows = None
+
+        tokens = set()
+        self.trigram_index = {}
+        for pos, car in enumerate(cars):
+            for token in set((car.search_key or car.build_search_key()).split()):
+                tokens.add((token, pos))
+                for gram in trigrams(token):
+                    self.trigram_index.setdefault(gram, set()).add(pos)
+        self.tokens = sorted(tokens)
+        self.token_keys = [token for token, _ in self.tokens]
+
+    def encoded(self, key, build):
+        """JSON bytes for an unfiltered listing, encoded once per snapshot."""
+        body = self._encoded.get(key)
+        if body is None:
+            body = self._encoded[key] = render_json(build())
+        return body
+
+    def rows(self):
+        """The catalog as CAR_COLUMNS-ordered rows, for ?format=columnar."""
+        if self._rows is None:
+            self._rows = [[car[column] for column in CAR_COLUMNS] for car in self.cars]
+        return self._rows
+
+    def filter(self, available_only=False, brand=None, model=None, min_price=None, max_price=None):
+        """Return the matching serialized cars, in catalog order."""
+        positions = None
+        if brand:
+            positions = set(self.by_brand.get(brand, ()))
+        if min_price is not None or max_price is not None:
+            lo = bisect.bisect_left(self.prices, min_price) if min_price is not None else 0
+            hi = bisect.bisect_right(self.prices, max_price) if max_price is not None else len(self.prices)
+            in_range = set(self.by_price[lo:hi])
+            positions = in_range if positions is None else positions & in_range
+        if model:
+            candidates = self.model_candidates(model.lower())
+            if candidates is not None:
+                positions = candidates if positions is None else positions & candidates
+        if available_only:
+            positions = set(self.available) if positions is None else positions.intersection(self.available)
+        if positions is None:
+            positions = range(len(self.cars))
+        else:
+            positions = sorted(positions)
+        if model:
+            needle = model.lower()
+            positions = [pos for pos in positions if needle in self.models[pos]]
+        return [self.cars[pos] for pos in positions]
+
+    def model_candidates(self, needle):
+        """Positions whose search key has every trigram of ``needle``: a superset of the
+        cars whose model contains it. None when the needle is too short for trigrams."""
+        grams = set()
+        for token in re.findall(r'[a-z0-9]+', needle):
+            grams |= trigrams(token)
+        if not grams:
+            return None
+        postings = sorted((self.trigram_index.get(gram, set()) for gram in grams), key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def term_scores(self, term):
+        """Score each car for one search term: exact token 3, token prefix 2, trigram similarity below 1."""
+        scores = {}
+        for i in range(bisect.bisect_left(self.token_keys, term), len(self.tokens)):
+            token, pos = self.tokens[i]
+            if not token.startswith(term):
+                break
+            scores[pos] = max(scores.get(pos, 0), 3.0 if token == term else 2.0)
+        grams = trigrams(term)
+        if grams:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.trigram_index.get(gram, ()))
+            for pos, count in shared.items():
+                similarity = count / len(grams)
+                if similarity >= TRIGRAM_THRESHOLD and similarity > scores.get(pos, 0):
+                    scores[pos] = similarity
+        return scores
+
+    def search_positions(self, query, available_only=False):
+        """Positions of cars matching every term of ``query``, best first."""
+        terms = re.findall(r'[a-z0-9]+', query.lower())
+        candidates = self.available if available_only else range(len(self.cars))
+        if not terms:
+            return list(candidates)
+        # Intersect starting from the most selective term
+        per_term = sorted((self.term_scores(term) for term in terms), key=len)
+        totals = per_term[0]
+        for scores in per_term[1:]:
+            totals = {pos: total + scores[pos] for pos, total in totals.items() if pos in scores}
+        if not totals:
+            return []
+        if available_only:
+            totals = {pos: total for pos, total in totals.items() if self.cars[pos]['available']}
+        return sorted(totals, key=lambda pos: (-totals[pos], pos))
+
+    def search(self, query, available_only=False):
+        return [self.cars[pos] for pos in self.search_positions(query, available_only)]
+
+    def facets(self, positions):
+        """Per-brand and per-year counts over the given cars."""
+        brands = Counter(self.cars[pos]['brand'] for pos in positions)
+        years = Counter(self.cars[pos]['year'] for pos in positions)
+        return {
+            'brand': [{'brand': brand, 'count': count} for brand, count in sorted(brands.items())],
+            'year': [{'year': year, 'count': count} for year, count in sorted(years.items(), reverse=True)],
+        }
+
+
+def get_snapshot():
+    """The catalog for the current version, rebuilt from the database if stale."""
+    global _snapshot
+    version = current_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = CatalogSnapshot(version, Car.objects.all())
+        return _snapshot
+
+
+def parse_price(value):
+    """Price filter from a query string, or None when absent."""
+    if value in (None, ''):
+        return None
+    try:
+        return float(Decimal(value))
+    except InvalidOperation:
+        raise ValueError(f"Invalid price '{value}'")
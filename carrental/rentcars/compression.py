@@ -0,0 +1,114 @@
+"""Negotiated response compression (zstd, brotli or gzip).
+
+Replaces django.middleware.gzip.GZipMiddleware: picks the best encoding the
+client accepts among those available here (zstandard and brotli are optional
+dependencies), and leaves alone bodies smaller than COMPRESSION_MIN_SIZE,
+already-compressed content such as PDFs and images, and responses that
+already carry a Content-Encoding.
+"""
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_sequence
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Already compressed (or not worth compressing) content types
+INCOMPRESSIBLE_TYPES = (
+    'application/pdf', 'application/zip', 'application/gzip', 'application/x-gzip',
+    'application/zstd', 'application/vnd.apache.parquet', 'image/', 'audio/', 'video/', 'font/woff',
+)
+
+_accept_re = _lazy_re_compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+def available_encodings():
+    """Supported encodings, most effective first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def negotiate_encoding(accept_encoding, encodings=None):
+    """The preferred encoding among ``encodings`` allowed by an Accept-Encoding header, or None."""
+    weights = {}
+    for part in accept_encoding.split(','):
+        match = _accept_re.fullmatch(part)
+        if not match:
+            continue
+        try:
+            weights[match[1].lower()] = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+    best, best_weight = None, 0.0
+    for encoding in encodings or available_encodings():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(content, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(content)
+    if encoding == 'br':
+        return brotli.compress(content, quality=5)
+    return gzip.compress(content, compresslevel=6, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or not 200 <= response.status_code < 300:
+            return response
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith(INCOMPRESSIBLE_TYPES):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.streaming:
+            # Streamed bodies have unknown length; only gzip is streamed
+            if getattr(response, 'is_async', False) or 'gzip' != negotiate_encoding(
+                    request.headers.get('Accept-Encoding', ''), ['gzip']):
+                return response
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+            return self.mark(response, 'gzip')
+
+        if len(response.content) < self.min_size:
+            return response
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        return self.mark(response, encoding)
+
+    def mark(self, response, encoding):
+        # The compressed body differs byte-for-byte, so a strong ETag must become weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,125 @@
+"""Denormalized history counters on Customer for /api/customers/<id>/summary/.
+
+Each customer carries its rental count and active rentals, lifetime spend
+(total_price of rentals that were not cancelled), and the count and amount of
+unpaid violations and unpaid invoices. Signals (see signals.py) apply the
+difference each Rental, Violation or Invoice write makes to its customer's
+counters. Those models save inside transaction.atomic() and deletes run in
+the deletion collector's transaction, so counters commit or roll back
+together with the write.
+
+After writes that bypass model signals (queryset.update(), raw SQL, bulk
+loads such as seed_fleet) run rebuild(), also available as
+`manage.py rebuild_customer_stats`.
+"""
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Customer, Invoice, Violation
+
+RENTAL_FIELDS = ('customer_id', 'status', 'total_price')
+VIOLATION_FIELDS = ('rental_id', 'fine_amount', 'is_paid')
+INVOICE_FIELDS = ('rental_id', 'final_price', 'is_paid')
+
+
+def rental_counters(status, total_price):
+    if status == 'cancelled':
+        return {}
+    return {'rentals_count': 1, 'active_rentals': int(status == 'active'), 'lifetime_spend': total_price or 0}
+
+
+def violation_counters(fine_amount, is_paid):
+    return {} if is_paid else {'unpaid_violations': 1, 'unpaid_fines': fine_amount}
+
+
+def invoice_counters(final_price, is_paid):
+    return {} if is_paid else {'unpaid_invoices': 1, 'unpaid_invoice_amount': final_price or 0}
+
+
+def apply(customer_id, counters, sign=1):
+    changes = {name: F(name) + sign * value for name, value in counters.items() if value}
+    if customer_id is not None and changes:
+        Customer.objects.filter(pk=customer_id).update(**changes)
+
+
+def move(old_customer, old, new_customer, new):
+    """Replace counters ``old`` of old_customer with ``new`` of new_customer."""
+    if old_customer == new_customer:
+        apply(new_customer, {name: new.get(name, 0) - old.get(name, 0) for name in {*old, *new}})
+    else:
+        apply(old_customer, old, sign=-1)
+        apply(new_customer, new)
+
+
+def billing_counters(rental_id):
+    """Unpaid violation and invoice counters of one rental, for moving it to another customer."""
+    counters = {}
+    fines = Violation.objects.filter(rental_id=rental_id, is_paid=False).aggregate(
+        unpaid_violations=Count('id'), unpaid_fines=Sum('fine_amount'))
+    invoice = Invoice.objects.filter(rental_id=rental_id).values_list('final_price', 'is_paid').first()
+    counters.update({name: value or 0 for name, value in fines.items()})
+    if invoice:
+        counters.update(invoice_counters(*invoice))
+    return counters
+
+
+def rental_saved(rental, previous):
+    """Apply a rental save; ``previous`` maps field names to stored values (None when created)."""
+    new = rental_counters(rental.status, rental.total_price)
+    if previous is None:
+        apply(rental.customer_id, new)
+        return
+    old = rental_counters(previous['status'], previous['total_price'])
+    if previous['customer_id'] != rental.customer_id:
+        # Its violations and invoice follow the rental to the new customer
+        billing = billing_counters(rental.pk)
+        old, new = {**old, **billing}, {**new, **billing}
+    move(previous['customer_id'], old, rental.customer_id, new)
+
+
+def rental_deleted(rental):
+    # Cascaded violations and invoices are subtracted by their own post_delete signals
+    apply(rental.customer_id, rental_counters(rental.status, rental.total_price), sign=-1)
+
+
+def total(queryset, outer_field, **aggregate):
+    """Correlated subquery computing one aggregate per customer (0 when there are no rows)."""
+    (name, expression), = aggregate.items()
+    zero = Value(Decimal('0')) if isinstance(expression, Sum) else Value(0)
+    output = DecimalField(max_digits=14, decimal_places=2) if isinstance(expression, Sum) else IntegerField()
+    rows = (
+        queryset.filter(**{outer_field: OuterRef('pk')}).order_by()
+        .values(outer_field).annotate(**aggregate).values(name)
+    )
+    return Coalesce(Subquery(rows[:1]), zero, output_field=output)
+
+
+def rebuild(apps=global_apps):
+    """Recompute every customer's counters with a single UPDATE."""
+    customer_model = apps.get_model('rentcars', 'Customer')
+    rentals = apps.get_model('rentcars', 'Rental').objects.exclude(status='cancelled')
+    violations = apps.get_model('rentcars', 'Violation').objects.filter(is_paid=False)
+    invoices = apps.get_model('rentcars', 'Invoice').objects.filter(is_paid=False)
+    return customer_model.objects.update(
+        rentals_count=total(rentals, 'customer_id', n=Count('id')),
+        active_rentals=total(rentals, 'customer_id', n=Count('id', filter=Q(status='active'))),
+        lifetime_spend=total(rentals, 'customer_id', amount=Sum('total_price')),
+        unpaid_violations=total(violations, 'rental__customer_id', n=Count('id')),
+        unpaid_fines=total(violations, 'rental__customer_id', amount=Sum('fine_amount')),
+        unpaid_invoices=total(invoices, 'rental__customer_id', n=Count('id')),
+        unpaid_invoice_amount=total(invoices, 'rental__customer_id', amount=Sum('final_price')),
+    )
+
+
+def summary(customer):
+    """The counters of a Customer instance as JSON-ready values."""
+    return {
+        'rentals_count': customer.rentals_count,
+        'active_rentals': customer.active_rentals,
+        'lifetime_spend': float(customer.lifetime_spend),
+        'outstanding_violations': {'count': customer.unpaid_violations, 'amount': float(customer.unpaid_fines)},
+        'unpaid_invoices': {'count': customer.unpaid_invoices, 'amount': float(customer.unpaid_invoice_amount)},
+    }
@@ -0,0 +1,60 @@
+# Bulk Export Endpoints
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_http_methods
+
+from .exports import ENTITIES, export_chunks
+from .responses import JsonResponse
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+@require_http_methods(["GET"])
+def export_entity(request, entity):
+    """Stream rentals, invoices, violations or maintenance as CSV or NDJSON
+
+    Query parameters: format (csv|ndjson), columns (comma separated),
+    from / to (YYYY-MM-DD, inclusive, on the entity's main date).
+    """
+    spec = ENTITIES.get(entity)
+    if spec is None:
+        return JsonResponse({
+            'status': 'error',
+            'message': f"Unknown entity '{entity}'. Choose from: {', '.join(ENTITIES)}"
+        }, status=404)
+    
+    output = request.GET.get('format', 'csv')
+    if output not in CONTENT_TYPES:
+        return JsonResponse({'status': 'error', 'message': 'format must be csv or ndjson'}, status=400)
+    
+    columns = [name.strip() for name in request.GET.get('columns', '').split(',') if name.strip()]
+    columns = columns or list(spec.columns)
+    unknown = [name for name in columns if name not in spec.columns]
+    if unknown:
+        return JsonResponse({
+            'status': 'error',
+            'message': f"Unknown columns: {', '.join(unknown)}. Available: {', '.join(spec.columns)}"
+        }, status=400)
+    
+    dates = {}
+    for param in ('from', 'to'):
+        value = request.GET.get(param)
+        if value:
+            try:
+                dates[param] = parse_date(value)
+            except ValueError:  # well formed but impossible, e.g. 2024-02-30
+                dates[param] = None
+            if dates[param] is None:
+                return JsonResponse({'status': 'error', 'message': f'{param} must be YYYY-MM-DD'}, status=400)
+    
+    response = StreamingHttpResponse(
+        export_chunks(spec, columns, output, dates.get('from'), dates.get('to')),
+        content_type=CONTENT_TYPES[output],
+    )
+    filename = f"{entity}-{timezone.localdate():%Y%m%d}.{output}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,147 @@
+"""Bulk export of rentals, invoices, violations and maintenance records.
+
+Each entity lists its exportable columns as values_list() lookups or SQL
+expressions and the date field the from/to filter applies to. Rows are read
+with .iterator(chunk_size=...) in primary-key order and encoded in batches, so
+memory stays flat regardless of table size and the first rows can be sent
+before the query finishes.
+"""
+import csv
+import datetime
+import io
+from decimal import Decimal
+
+from django.db.models import CharField, DateTimeField, F, Value
+from django.db.models.functions import Cast, Concat, LPad
+
+from .models import Invoice, Maintenance, Rental, Violation
+from .renderers import render_json
+
+CHUNK_SIZE = 2000
+
+
+class ExportEntity:
+    def __init__(self, model, date_field, columns):
+        self.model = model
+        self.date_field = date_field
+        self.columns = columns
+
+    def queryset(self, columns, date_from=None, date_to=None):
+        lookup = self.date_field
+        if isinstance(self.model._meta.get_field(self.date_field), DateTimeField):
+            lookup += '__date'  # compare timestamps by calendar day
+        rows = self.model.objects.order_by('pk')
+        if date_from:
+            rows = rows.filter(**{f'{lookup}__gte': date_from})
+        if date_to:
+            rows = rows.filter(**{f'{lookup}__lte': date_to})
+        return rows.values_list(*(self.columns[name] for name in columns))
+
+
+def car_label(prefix):
+    return Concat(F(f'{prefix}brand'), Value(' '), F(f'{prefix}model'), output_field=CharField())
+
+
+def invoice_number(lookup):
+    return Concat(Value('INV-'), LPad(Cast(lookup, CharField()), 6, Value('0')), output_field=CharField())
+
+
+ENTITIES = {
+    'rentals': ExportEntity(Rental, 'start_date', {
+        'id': 'id',
+        'customer_id': 'customer_id',
+        'customer': 'customer__full_name',
+        'car_id': 'car_id',
+        'car': car_label('car__'),
+        'license_plate': 'car__license_plate',
+        'agent_id': 'agent_id',
+        'start_date': 'start_date',
+        'end_date': 'end_date',
+        'status': 'status',
+        'total_price': 'total_price',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }),
+    'invoices': ExportEntity(Invoice, 'issued_date', {
+        'id': 'id',
+        'invoice_number': invoice_number('id'),
+        'rental_id': 'rental_id',
+        'customer': 'rental__customer__full_name',
+        'license_plate': 'rental__car__license_plate',
+        'issued_date': 'issued_date',
+        'final_price': 'final_price',
+        'tax_amount': 'tax_amount',
+        'discount_amount': 'discount_amount',
+        'is_paid': 'is_paid',
+        'payment_date': 'payment_date',
+    }),
+    'violations': ExportEntity(Violation, 'date_reported', {
+        'id': 'id',
+        'rental_id': 'rental_id',
+        'customer': 'rental__customer__full_name',
+        'license_plate': 'rental__car__license_plate',
+        'violation_type': 'violation_type',
+        'description': 'description',
+        'fine_amount': 'fine_amount',
+        'date_reported': 'date_reported',
+        'is_paid': 'is_paid',
+    }),
+    'maintenance': ExportEntity(Maintenance, 'date', {
+        'id': 'id',
+        'car_id': 'car_id',
+        'car': car_label('car__'),
+        'license_plate': 'car__license_plate',
+        'description': 'description',
+        'amount': 'amount',
+        'date': 'date',
+        'created_at': 'created_at',
+    }),
+}
+
+
+def plain(value):
+    """CSV/JSON friendly form of a database value."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # Send the header right away, before the first batch is read
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    batch = 0
+    for row in rows:
+        # Same timestamps as NDJSON; decimals stay exact ("200.00") in CSV
+        writer.writerow([value if isinstance(value, Decimal) else plain(value) for value in row])
+        batch += 1
+        if batch == CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            batch = 0
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(columns, rows):
+    lines = []
+    for row in rows:
+        lines.append(render_json(dict(zip(columns, map(plain, row)))))
+        if len(lines) == CHUNK_SIZE:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+def export_chunks(entity, columns, output, date_from=None, date_to=None):
+    rows = entity.queryset(columns, date_from, date_to).iterator(chunk_size=CHUNK_SIZE)
+    if output == 'ndjson':
+        return ndjson_chunks(columns, rows)
+    return csv_chunks(columns, rows)
@@ -0,0 +1,217 @@
+"""Invoice PDF rendering and the pre-rendered artifact stored on Invoice.pdf_file."""
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from .models import Invoice
+
+logger = logging.getLogger(__name__)
+
+
+def render_invoice_pdf(invoice):
+    """Render the invoice PDF and return its bytes."""
+    rental = invoice.rental
+
+    # Create PDF buffer
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    
+    # Define styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        textColor=colors.darkblue,
+        alignment=1  # Center alignment
+    )
+    
+    # Build PDF content
+    story = []
+    
+    # Title
+    story.append(Paragraph("RENTAL INVOICE", title_style))
+    story.append(Spacer(1, 20))
+    
+    # Invoice info
+    invoice_data = [
+        ['Invoice Number:', invoice.invoice_number],
+        ['Issue Date:', invoice.issued_date.strftime('%Y-%m-%d %H:%M')],
+        ['Status:', 'Paid' if invoice.is_paid else 'Unpaid'],
+    ]
+    
+    invoice_table = Table(invoice_data, colWidths=[2*inch, 3*inch])
+    invoice_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    story.append(invoice_table)
+    story.append(Spacer(1, 30))
+    
+    # Customer info
+    story.append(Paragraph("Customer Information", styles['Heading2']))
+    customer_data = [
+        ['Name:', rental.customer.full_name],
+        ['Email:', rental.customer.email],
+        ['Phone:', rental.customer.phone_number or 'N/A'],
+        ['National ID:', rental.customer.National_ID],
+        ['License Number:', rental.customer.License_Number],
+    ]
+    
+    customer_table = Table(customer_data, colWidths=[2*inch, 3*inch])
+    customer_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    story.append(customer_table)
+    story.append(Spacer(1, 20))
+    
+    # Car and rental info
+    story.append(Paragraph("Rental Details", styles['Heading2']))
+    rental_data = [
+        ['Car:', f"{rental.car.brand} {rental.car.model} {rental.car.year}"],
+        ['License Plate:', rental.car.license_plate],
+        ['Color:', rental.car.color or 'N/A'],
+        ['Start Date:', rental.start_date.strftime('%Y-%m-%d')],
+        ['End Date:', rental.end_date.strftime('%Y-%m-%d')],
+        ['Rental Days:', str(rental.rental_days)],
+        ['Price per Day:', f"{rental.car.price_per_day} AED"],
+    ]
+    
+    rental_table = Table(rental_data, colWidths=[2*inch, 3*inch])
+    rental_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    story.append(rental_table)
+    story.append(Spacer(1, 20))
+    
+    # Violations (if any)
+    violations = rental.violations.all()
+    if violations:
+        story.append(Paragraph("Violations", styles['Heading2']))
+        violation_data = [['Type', 'Description', 'Fine Amount']]
+        for violation in violations:
+            violation_data.append([
+                violation.get_violation_type_display(),
+                violation.description[:50] + '...' if len(violation.description) > 50 else violation.description,
+                f"{violation.fine_amount} AED"
+            ])
+        
+        violation_table = Table(violation_data, colWidths=[1.5*inch, 3*inch, 1.5*inch])
+        violation_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        
+        story.append(violation_table)
+        story.append(Spacer(1, 20))
+    
+    # Price breakdown
+    story.append(Paragraph("Price Breakdown", styles['Heading2']))
+    price_data = [
+        ['Rental Cost:', f"{rental.total_price} AED"],
+        ['Violations:', f"{rental.total_violations_amount} AED"],
+        ['Subtotal:', f"{rental.final_amount} AED"],
+        ['Discount:', f"-{invoice.discount_amount} AED"],
+        ['Tax (5%):', f"{invoice.tax_amount} AED"],
+        ['Final Total:', f"{invoice.final_price} AED"],
+    ]
+    
+    price_table = Table(price_data, colWidths=[3*inch, 2*inch])
+    price_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, -1), (-1, -1), colors.darkblue),
+        ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
+        ('BACKGROUND', (0, 0), (0, -2), colors.lightgrey),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    story.append(price_table)
+    
+    # Build PDF
+    doc.build(story)
+
+    return buffer.getvalue()
+
+
+def store_invoice_pdf(invoice):
+    """Render the PDF and keep it as the invoice's pre-rendered artifact.
+
+    The artifact is only stored if no invalidation happened since ``invoice``
+    was loaded; otherwise the bytes are returned but ``invoice.pdf_file`` stays empty.
+    """
+    revision = invoice.pdf_revision
+    content = render_invoice_pdf(invoice)
+    with transaction.atomic():
+        current = Invoice.objects.select_for_update().filter(id=invoice.id).values_list(
+            'pdf_revision', flat=True).first()
+        if current != revision:
+            logger.info("Invoice %s changed while rendering; PDF not stored", invoice.id)
+            return content
+        if invoice.pdf_file:
+            invoice.pdf_file.delete(save=False)
+        invoice.pdf_file.save(f"invoice_{invoice.invoice_number}.pdf", ContentFile(content), save=False)
+        invoice.save(update_fields=['pdf_file'])
+    return content
+
+
+def cached_invoice_pdf(invoice):
+    """Bytes of the pre-rendered PDF, or None if missing."""
+    if not invoice.pdf_file:
+        return None
+    try:
+        with invoice.pdf_file.open('rb') as handle:
+            return handle.read()
+    except (FileNotFoundError, OSError):
+        logger.warning("Pre-rendered PDF for invoice %s is missing", invoice.id)
+        return None
+
+
+def invalidate_invoice_pdf(invoice_id):
+    """Drop the artifact after the invoice or its rental's violations change.
+
+    The revision is bumped even when there is no artifact yet, so a render in
+    progress is not stored (see store_invoice_pdf).
+    """
+    invoice = Invoice.objects.filter(id=invoice_id).only('id', 'pdf_file').first()
+    if invoice is None:
+        return
+    if invoice.pdf_file:
+        invoice.pdf_file.delete(save=False)
+    Invoice.objects.filter(id=invoice_id).update(pdf_file=None, pdf_revision=F('pdf_revision') + 1)
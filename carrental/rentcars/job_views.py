@@ -0,0 +1,52 @@
+# Background Job Endpoints
+from django.db.models import Count
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from .models import Job
+from .permissions import admin_required
+from .responses import JsonResponse
+
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'task': job.task,
+        'status': job.status,
+        'priority': job.priority,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'run_after': job.run_after.strftime('%Y-%m-%d %H:%M:%S'),
+        'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'finished_at': job.finished_at.strftime('%Y-%m-%d %H:%M:%S') if job.finished_at else None,
+        'last_error': job.last_error.strip().splitlines()[-1] if job.last_error else None,
+        'result': job.result,
+    }
+
+
+@require_http_methods(["GET"])
+@admin_required
+def job_status(request, job_id):
+    """Get the state of one background job (admin only: results and errors may be sensitive)"""
+    job = get_object_or_404(Job, id=job_id)
+    return JsonResponse({'status': 'success', 'data': serialize_job(job)})
+
+
+@require_http_methods(["GET"])
+@admin_required
+def job_summary(request):
+    """Count jobs per status, e.g. to watch the queue depth"""
+    counts = dict(Job.objects.order_by().values_list('status').annotate(total=Count('id')))
+    data = {status: counts.get(status, 0) for status, _ in Job.STATUS_CHOICES}
+    return JsonResponse({'status': 'success', 'data': data})
+
+
+@require_http_methods(["GET"])
+def invoice_job_status(request, job_id):
+    """State of an invoice PDF render queued by /api/rentals/complete/ (no results or errors)"""
+    job = get_object_or_404(Job, id=job_id, task='invoices.render_pdf')
+    return JsonResponse({'status': 'success', 'data': {
+        'id': job.id,
+        'status': job.status,
+        'invoice_id': job.payload.get('invoice_id'),
+    }})
@@ -0,0 +1,169 @@
+"""Database-backed job queue.
+
+Tasks are plain functions registered with @task('name') and queued with
+enqueue(). Workers (`manage.py run_workers`) claim jobs with
+SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL; on SQLite, which has no row
+locks, a worker polls for a candidate and claims it with a conditional
+UPDATE (status still 'queued'), so only one worker can win each job.
+Failed jobs are retried with exponential backoff until max_attempts.
+
+A job still 'running' JOB_LOCK_TIMEOUT seconds after it was claimed is
+assumed to have lost its worker and is requeued (or failed once its attempts
+are used up). Tasks that may run longer must call heartbeat() periodically,
+otherwise a second worker would start the same job.
+"""
+import logging
+import random
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('rentcars.jobs')
+
+_registry = {}
+_current = threading.local()
+
+
+def task(name):
+    """Register a function as a job task under ``name``."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    return _registry.get(name)
+
+
+def enqueue(task_name, payload=None, priority=0, max_attempts=3, delay=None):
+    if task_name not in _registry:
+        raise ValueError(f"Unknown task '{task_name}'")
+    return Job.objects.create(
+        task=task_name,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + (delay or timedelta(0)),
+    )
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with jitter: base * 2**(attempts-1), capped."""
+    base = getattr(settings, 'JOB_RETRY_BASE_SECONDS', 5)
+    cap = getattr(settings, 'JOB_RETRY_MAX_SECONDS', 600)
+    delay = min(base * 2 ** max(attempts - 1, 0), cap)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def requeue_stale(now=None):
+    """Release jobs whose worker died mid-run (locked longer than JOB_LOCK_TIMEOUT).
+
+    Jobs that already used all their attempts are failed instead, so a job that
+    keeps killing its worker is not retried forever.
+    """
+    now = now or timezone.now()
+    timeout = timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT', 600))
+    stale = Job.objects.filter(status='running', locked_at__lt=now - timeout)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', locked_by=None, locked_at=None, finished_at=now, updated_at=now,
+        last_error=f'Worker lost: job was still running after JOB_LOCK_TIMEOUT ({int(timeout.total_seconds())}s)',
+    )
+    if failed:
+        logger.error('Failed %d stale job(s) with no attempts left', failed)
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status='queued', locked_by=None, locked_at=None, updated_at=now,
+    )
+
+
+def heartbeat():
+    """Refresh the lock of the job running in this thread so it is not treated as stale.
+
+    Long tasks call this every so often (well within JOB_LOCK_TIMEOUT); it is a
+    no-op outside a worker.
+    """
+    job = getattr(_current, 'job', None)
+    if job is None:
+        return
+    now = timezone.now()
+    Job.objects.filter(id=job.id, status='running', locked_by=job.locked_by).update(locked_at=now, updated_at=now)
+
+
+def _ready(now):
+    return Job.objects.filter(status='queued', run_after__lte=now).order_by('-priority', 'run_after', 'id')
+
+
+def claim_next(worker_id):
+    """Atomically take the highest-priority runnable job, or return None."""
+    now = timezone.now()
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = _ready(now).select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            job.status, job.locked_by, job.locked_at = 'running', worker_id, now
+            job.attempts += 1
+            job.save(update_fields=['status', 'locked_by', 'locked_at', 'attempts', 'updated_at'])
+            return job
+
+    # Polling fallback: several workers may see the same candidate, but the
+    # conditional UPDATE only succeeds for one of them.
+    for job_id in _ready(now).values_list('id', flat=True)[:5]:
+        claimed = Job.objects.filter(id=job_id, status='queued').update(
+            status='running', locked_by=worker_id, locked_at=now, updated_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    """Execute a claimed job and record success, retry or failure."""
+    func = get_task(job.task)
+    _current.job = job
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task '{job.task}'")
+        result = func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = now + backoff_delay(job.attempts)
+            logger.warning('Job %s (%s) failed, retry %d/%d at %s', job.id, job.task,
+                           job.attempts, job.max_attempts, job.run_after)
+        else:
+            job.status = 'failed'
+            job.finished_at = now
+            logger.error('Job %s (%s) failed permanently', job.id, job.task)
+        job.last_error = error
+        job.locked_by = job.locked_at = None
+        job.save(update_fields=['status', 'run_after', 'finished_at', 'last_error', 'locked_by', 'locked_at',
+                                'updated_at'])
+        return False
+    finally:
+        _current.job = None
+
+    job.status = 'succeeded'
+    job.result = result
+    job.finished_at = timezone.now()
+    job.locked_by = job.locked_at = None
+    job.save(update_fields=['status', 'result', 'finished_at', 'locked_by', 'locked_at', 'updated_at'])
+    return True
+
+
+def work_once(worker_id):
+    """Claim and run one job; returns False when the queue had nothing runnable."""
+    job = claim_next(worker_id)
+    if job is None:
+        return False
+    run_job(job)
+    return True
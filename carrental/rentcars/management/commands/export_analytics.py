@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from rentcars.analytics_export import ENTITIES, FORMATS, export_analytics
+
+
+class Command(BaseCommand):
+    help = "Write changed rentals, invoices, violations, maintenance and cars as Parquet/Arrow snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.ANALYTICS_EXPORT_DIR),
+                            help='Dataset directory (default: ANALYTICS_EXPORT_DIR)')
+        parser.add_argument('--format', choices=list(FORMATS), default='parquet')
+        parser.add_argument('--entities', nargs='+', choices=list(ENTITIES), help='Default: all')
+        parser.add_argument('--full', action='store_true', help='Export every row, not only changes since the last run')
+        parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per record batch')
+
+    def handle(self, *args, **options):
+        try:
+            summary = export_analytics(
+                options['output'], fmt=options['format'], entities=options['entities'],
+                full=options['full'], chunk_size=options['chunk_size'],
+            )
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        for name, result in summary.items():
+            self.stdout.write(f"{name:12} {result['rows']:>10} rows  {result['path'] or '-'}")
@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rentcars.agent_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-agent daily counters behind /api/analytics/agents/ from the rentals table"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} agent-day rows in {time.perf_counter() - started:.1f}s"))
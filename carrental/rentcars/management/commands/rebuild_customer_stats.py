@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rentcars.customer_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the rental, spend and unpaid balance counters stored on each customer"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters of {rows} customers in {time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from rentcars import jobs
+
+
+def worker_loop(worker_id, poll_interval, burst, stop):
+    last_stale_check = 0.0
+    try:
+        while not stop.is_set():
+            if time.monotonic() - last_stale_check > 60:
+                jobs.requeue_stale()
+                last_stale_check = time.monotonic()
+            close_old_connections()
+            if jobs.work_once(worker_id):
+                continue
+            if burst:
+                break
+            stop.wait(poll_interval)
+    finally:
+        connections.close_all()
+
+
+def worker_process(worker_id, poll_interval, burst, stop):
+    import django
+    django.setup()  # no-op when forked, needed under the spawn start method
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent coordinates shutdown
+    worker_loop(worker_id, poll_interval, burst, stop)
+
+
+class Command(BaseCommand):
+    help = "Run a pool of background job workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'JOB_WORKERS', 2),
+                            help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=getattr(settings, 'JOB_POLL_INTERVAL', 1.0),
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is drained')
+
+    def handle(self, *args, **options):
+        hostname = socket.gethostname()
+        stop = multiprocessing.Event()
+        count = max(options['workers'], 1)
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        if count == 1:
+            worker_loop(f"{hostname}:{os.getpid()}:0", options['poll_interval'], options['burst'], stop)
+            return
+
+        # Children must not share the parent's database connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=worker_process,
+                args=(f"{hostname}:{os.getpid()}:{n}", options['poll_interval'], options['burst'], stop),
+                name=f"job-worker-{n}",
+            )
+            for n in range(count)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {count} workers")
+
+        signal.signal(signal.SIGINT, shutdown)
+        for process in processes:
+            process.join()
+        self.stdout.write("Workers stopped")
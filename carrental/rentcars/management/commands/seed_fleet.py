@@ -0,0 +1,320 @@
+import random
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from rentcars import agent_stats, catalog, customer_stats
+from rentcars.models import Car, Customer, CustomUser, Invoice, Maintenance, Rental, Violation
+
+MODELS_BY_BRAND = {
+    'Audi': ['A3', 'A4', 'A6', 'Q5', 'Q7'],
+    'BMW': ['3 Series', '5 Series', 'X3', 'X5', 'X7'],
+    'Chevrolet': ['Malibu', 'Tahoe', 'Camaro', 'Equinox'],
+    'Ford': ['Mustang', 'Explorer', 'Focus', 'Edge'],
+    'Honda': ['Civic', 'Accord', 'CR-V', 'Pilot'],
+    'Hyundai': ['Elantra', 'Sonata', 'Tucson', 'Santa Fe'],
+    'Infiniti': ['Q50', 'QX50', 'QX60', 'QX80'],
+    'Jaguar': ['XE', 'XF', 'F-Pace', 'E-Pace'],
+    'Kia': ['Rio', 'Cerato', 'Sportage', 'Sorento'],
+    'Land Rover': ['Defender', 'Discovery', 'Range Rover', 'Evoque'],
+    'Lexus': ['ES', 'IS', 'RX', 'LX'],
+    'Mazda': ['Mazda3', 'Mazda6', 'CX-5', 'CX-9'],
+    'Mercedes': ['C-Class', 'E-Class', 'S-Class', 'GLE'],
+    'Mitsubishi': ['Lancer', 'Outlander', 'Pajero', 'ASX'],
+    'Nissan': ['Altima', 'Sunny', 'Patrol', 'X-Trail'],
+    'Peugeot': ['208', '308', '3008', '5008'],
+    'Porsche': ['911', 'Cayenne', 'Macan', 'Panamera'],
+    'Renault': ['Clio', 'Megane', 'Duster', 'Koleos'],
+    'Subaru': ['Impreza', 'Outback', 'Forester', 'XV'],
+    'Tesla': ['Model 3', 'Model S', 'Model X', 'Model Y'],
+    'Toyota': ['Camry', 'Corolla', 'Land Cruiser', 'RAV4', 'Yaris'],
+    'Volkswagen': ['Golf', 'Jetta', 'Passat', 'Tiguan'],
+    'Volvo': ['S60', 'S90', 'XC60', 'XC90'],
+}
+PREMIUM_BRANDS = {'Audi', 'BMW', 'Jaguar', 'Land Rover', 'Lexus', 'Mercedes', 'Porsche', 'Tesla'}
+COLORS = ['White', 'Black', 'Silver', 'Gray', 'Blue', 'Red', 'Pearl']
+NATIONALITIES = ['Emirati', 'Egyptian', 'Indian', 'British', 'Filipino', 'Pakistani', 'Jordanian']
+FIRST_NAMES = ['Ahmed', 'Sara', 'Omar', 'Lina', 'Youssef', 'Mariam', 'Ali', 'Noor', 'Khaled', 'Huda',
+               'John', 'Priya', 'Maria', 'David', 'Fatima', 'Hassan', 'Aisha', 'Karim', 'Laila', 'Tariq']
+LAST_NAMES = ['Mostafa', 'Hassan', 'Khan', 'Smith', 'Ali', 'Ibrahim', 'Nasser', 'Farouk', 'Patel',
+              'Santos', 'Haddad', 'Saleh', 'Rahman', 'Mansour', 'Aziz']
+VIOLATION_FINES = {
+    'speeding': (300, 3000),
+    'parking': (100, 500),
+    'traffic_light': (1000, 3000),
+    'accident': (2000, 15000),
+    'other': (50, 1000),
+}
+TAX_RATE = Decimal('0.05')
+
+RENTAL_COLUMNS = ('id', 'customer', 'car', 'agent', 'start_date', 'end_date', 'total_price', 'status',
+                  'created_at', 'updated_at', 'completed_at')
+VIOLATION_COLUMNS = ('id', 'rental', 'violation_type', 'description', 'fine_amount', 'date_reported', 'is_paid',
+                     'updated_at')
+INVOICE_COLUMNS = ('id', 'rental', 'issued_date', 'final_price', 'tax_amount', 'discount_amount', 'is_paid',
+                   'payment_date', 'pdf_revision', 'updated_at')
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic synthetic fleet (cars, customers, rentals, violations, invoices, maintenance) for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cars', type=int, default=500, help='Number of cars to create')
+        parser.add_argument('--customers', type=int, default=5000, help='Number of customers to create')
+        parser.add_argument('--agents', type=int, default=10, help='Number of agent users to create')
+        parser.add_argument('--years', type=float, default=3, help='Years of rental history per car')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--as-of', type=date.fromisoformat, default=None,
+                            help='Date the history ends on (YYYY-MM-DD, default today); fix it for identical output')
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Rows per bulk_create batch')
+        parser.add_argument('--violation-rate', type=float, default=0.08, help='Fraction of rentals with a violation')
+        parser.add_argument('--cancel-rate', type=float, default=0.03, help='Fraction of past rentals that were cancelled')
+        parser.add_argument('--max-rental-days', type=int, default=14)
+        parser.add_argument('--max-gap-days', type=int, default=5, help='Maximum idle days between rentals of a car')
+        parser.add_argument('--maintenance-every', type=int, default=90, help='Average days between maintenance records per car')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        # Generated dates derive from as_of, not the clock; only updated_at records
+        # the real write time, so incremental analytics exports pick the rows up
+        self.as_of = options['as_of'] or date.today()
+        started = time.perf_counter()
+
+        agent_ids = self.create_agents(options['agents'])
+        cars = self.create_cars(options['cars'])
+        customer_ids = self.create_customers(options['customers'])
+        if not cars or not customer_ids:
+            self.stdout.write(self.style.WARNING('Need at least one car and one customer to generate rentals'))
+            return
+
+        totals = self.create_rentals(cars, customer_ids, agent_ids, options)
+        maintenance_count = self.create_maintenance(cars, options)
+        # Bulk inserts skip the model signals that normally invalidate the catalog and keep counters
+        catalog.bump_version()
+        agent_stats.rebuild()
+        customer_stats.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(cars)} cars, {len(customer_ids)} customers, {len(agent_ids)} agents, "
+            f"{totals['rentals']} rentals, {totals['violations']} violations, {totals['invoices']} invoices, "
+            f"{maintenance_count} maintenance records in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def at(self, day, hour=12):
+        return timezone.make_aware(datetime.combine(day, dt_time(hour)))
+
+    def bulk_create(self, model, objs):
+        with transaction.atomic():
+            return model.objects.bulk_create(objs, batch_size=self.chunk_size)
+
+    def create_agents(self, count):
+        offset = CustomUser.objects.count()
+        # bulk_create skips the post_save permission signal, which seeded agents don't need
+        password = make_password(None)
+        agents = self.bulk_create(CustomUser, [
+            CustomUser(username=f"seed_agent_{offset + i}", email=f"seed_agent_{offset + i}@example.com",
+                       password=password, is_agent=True, is_staff=True)
+            for i in range(count)
+        ])
+        return [agent.id for agent in agents]
+
+    def create_cars(self, count):
+        rng = self.rng
+        offset = Car.objects.count()
+        brands = [brand for brand, _ in Car.BRAND_CHOICES]
+        this_year = self.as_of.year
+        cars = []
+        for start in range(0, count, self.chunk_size):
+            batch = []
+            for i in range(start, min(start + self.chunk_size, count)):
+                brand = rng.choice(brands)
+                base = rng.randint(250, 900) if brand in PREMIUM_BRANDS else rng.randint(80, 300)
+                batch.append(Car(
+                    brand=brand,
+                    model=rng.choice(MODELS_BY_BRAND.get(brand, ['Standard'])),
+                    year=rng.randint(this_year - 8, this_year),
+                    license_plate=f"SF-{offset + i:07d}",
+                    color=rng.choice(COLORS),
+                    price_per_day=Decimal(base - base % 5),
+                    available=True,
+                ))
+                batch[-1].search_key = batch[-1].build_search_key()
+            cars.extend((car.id, car.price_per_day) for car in self.bulk_create(Car, batch))
+        self.stdout.write(f"Created {len(cars)} cars")
+        return cars
+
+    def create_customers(self, count):
+        rng = self.rng
+        offset = Customer.objects.count()
+        today = self.as_of
+        ids = []
+        for start in range(0, count, self.chunk_size):
+            batch = []
+            for i in range(start, min(start + self.chunk_size, count)):
+                n = offset + i
+                batch.append(Customer(
+                    full_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    email=f"seed.customer{n}@example.com",
+                    phone_number=f"+9715{rng.randint(0, 99999999):08d}",
+                    National_ID=f"SN{n:010d}",
+                    Nationality=rng.choice(NATIONALITIES),
+                    date_of_birth=today - timedelta(days=rng.randint(18 * 365, 70 * 365)),
+                    License_Number=f"SL{n:010d}",
+                    License_Expiry_Date=today + timedelta(days=rng.randint(30, 5 * 365)),
+                ))
+            ids.extend(customer.id for customer in self.bulk_create(Customer, batch))
+        self.stdout.write(f"Created {len(ids)} customers")
+        return ids
+
+    def insert_rows(self, model, columns, rows):
+        """INSERT pre-adapted tuples with executemany, bypassing per-object ORM overhead.
+
+        Used for the rental/violation/invoice volume, where bulk_create's
+        per-field compilation dominates the runtime.
+        """
+        table = connection.ops.quote_name(model._meta.db_table)
+        column_sql = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in columns)
+        placeholders = ', '.join(['%s'] * len(columns))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(f"INSERT INTO {table} ({column_sql}) VALUES ({placeholders})", rows)
+
+    def next_id(self, model):
+        return (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+    def create_rentals(self, cars, customer_ids, agent_ids, options):
+        """Walk each car's calendar from the start of history to as_of,
+        laying down back-to-back non-overlapping rentals."""
+        rng = self.rng
+        ops = connection.ops
+        today = self.as_of
+        history_start = today - timedelta(days=int(options['years'] * 365))
+        violation_types = list(VIOLATION_FINES)
+        totals = {'rentals': 0, 'violations': 0, 'invoices': 0}
+        ids = {model: self.next_id(model) for model in (Rental, Violation, Invoice)}
+        busy_car_ids = []
+        rentals, violations, invoices = [], [], []
+        # Adapt repeated values once instead of per row
+        adapt_date = {}
+        now = ops.adapt_datetimefield_value(timezone.now())
+
+        def db_date(day):
+            value = adapt_date.get(day)
+            if value is None:
+                value = adapt_date[day] = ops.adapt_datefield_value(day)
+            return value
+
+        def db_datetime(value):
+            return ops.adapt_datetimefield_value(value)
+
+        def db_decimal(value):
+            return ops.adapt_decimalfield_value(value, 10, 2)
+
+        def flush():
+            self.insert_rows(Rental, RENTAL_COLUMNS, rentals)
+            self.insert_rows(Violation, VIOLATION_COLUMNS, violations)
+            self.insert_rows(Invoice, INVOICE_COLUMNS, invoices)
+            totals['rentals'] += len(rentals)
+            totals['violations'] += len(violations)
+            totals['invoices'] += len(invoices)
+            rentals.clear()
+            violations.clear()
+            invoices.clear()
+            self.stdout.write(f"  {totals['rentals']} rentals so far")
+
+        for car_id, price in cars:
+            day = history_start + timedelta(days=rng.randint(0, options['max_gap_days']))
+            while day < today:
+                length = rng.randint(1, options['max_rental_days'])
+                end = day + timedelta(days=length)
+                if end > today:
+                    status = 'active'
+                    busy_car_ids.append(car_id)
+                elif rng.random() < options['cancel_rate']:
+                    status = 'cancelled'
+                else:
+                    status = 'completed'
+                rental_id = ids[Rental]
+                ids[Rental] += 1
+                total_price = price * length
+                created_at = self.at(day, hour=9)
+                completed_at = None
+                if status == 'completed':
+                    # Closed on the return day, occasionally a day or two late
+                    completed_at = self.at(end, hour=0) + timedelta(hours=rng.randint(8, 60))
+                rentals.append((
+                    rental_id, rng.choice(customer_ids), car_id,
+                    rng.choice(agent_ids) if agent_ids else None,
+                    db_date(day), db_date(end), db_decimal(total_price), status, db_datetime(created_at), now,
+                    completed_at and db_datetime(completed_at),
+                ))
+
+                fines = Decimal(0)
+                if status != 'cancelled' and rng.random() < options['violation_rate']:
+                    violation_type = rng.choice(violation_types)
+                    low, high = VIOLATION_FINES[violation_type]
+                    fine = Decimal(rng.randint(low, high))
+                    fines += fine
+                    # Reported on a day of the rental (not in the future for active ones)
+                    reported = day + timedelta(days=rng.randint(0, (min(end, today) - day).days))
+                    violations.append((
+                        ids[Violation], rental_id, violation_type, f"Synthetic {violation_type} violation",
+                        db_decimal(fine), db_date(reported), status == 'completed' and rng.random() < 0.7, now,
+                    ))
+                    ids[Violation] += 1
+                if status == 'completed':
+                    base_amount = total_price + fines
+                    tax = (base_amount * TAX_RATE).quantize(Decimal('0.01'))
+                    invoices.append((
+                        ids[Invoice], rental_id, db_datetime(completed_at), db_decimal(base_amount + tax),
+                        db_decimal(tax), db_decimal(Decimal(0)), rng.random() < 0.85, None, 0, now,
+                    ))
+                    ids[Invoice] += 1
+
+                if len(rentals) >= self.chunk_size:
+                    flush()
+                day = end + timedelta(days=rng.randint(0, options['max_gap_days']))
+
+        if rentals:
+            flush()
+        self.reset_sequences([Rental, Violation, Invoice])
+        for start in range(0, len(busy_car_ids), self.chunk_size):
+            Car.objects.filter(id__in=busy_car_ids[start:start + self.chunk_size]).update(
+                available=False, updated_at=timezone.now())
+        return totals
+
+    def reset_sequences(self, models):
+        """Move PostgreSQL id sequences past the explicitly assigned ids."""
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def create_maintenance(self, cars, options):
+        rng = self.rng
+        today = self.as_of
+        history_start = today - timedelta(days=int(options['years'] * 365))
+        every = max(options['maintenance_every'], 1)
+        pending, count = [], 0
+        for car_id, _ in cars:
+            day = history_start + timedelta(days=rng.randint(0, every))
+            while day <= today:
+                pending.append(Maintenance(
+                    car_id=car_id, date=day, amount=Decimal(rng.randint(150, 4000)),
+                    description=rng.choice(['Oil change', 'Tyres', 'Brake pads', 'Body repair', 'Service']),
+                ))
+                day += timedelta(days=rng.randint(every // 2 or 1, every * 3 // 2 or 1))
+            if len(pending) >= self.chunk_size:
+                count += len(self.bulk_create(Maintenance, pending))
+                pending = []
+        if pending:
+            count += len(self.bulk_create(Maintenance, pending))
+        return count
@@ -0,0 +1,155 @@
+"""In-process request metrics.
+
+RequestTimingMiddleware fills a RequestStats for every request; finished
+requests are folded into per-route histograms that /api/metrics/ renders in
+the Prometheus text format. Histograms live in the worker process, so each
+gunicorn worker exposes its own series (Prometheus sums them).
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds in seconds, Prometheus style (+Inf is implicit)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    __slots__ = ('db_queries', 'db_time', 'serialize_time')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+
+
+_current = ContextVar('request_stats', default=None)
+
+
+def current_stats():
+    return _current.get()
+
+
+@contextmanager
+def track_request():
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def serialization_timer():
+    """Attribute the enclosed block to the current request's serialization time."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize_time += time.perf_counter() - start
+
+
+def query_timer(execute, sql, params, many, context):
+    """execute_wrapper counting queries and DB time for the current request."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._db_queries = {}
+        self._db_time = {}
+        self._serialize_time = {}
+
+    def observe(self, route, method, status, duration, stats):
+        key = (route, method, str(status))
+        with self._lock:
+            hist = self._durations.get(key)
+            if hist is None:
+                hist = self._durations[key] = Histogram()
+            hist.observe(duration)
+            self._db_queries[key] = self._db_queries.get(key, 0) + stats.db_queries
+            self._db_time[key] = self._db_time.get(key, 0.0) + stats.db_time
+            self._serialize_time[key] = self._serialize_time.get(key, 0.0) + stats.serialize_time
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._db_queries.clear()
+            self._db_time.clear()
+            self._serialize_time.clear()
+
+    def render_prometheus(self):
+        with self._lock:
+            durations = {key: (list(h.counts), h.total, h.count) for key, h in self._durations.items()}
+            counters = [
+                ('http_request_db_queries_total', 'Database queries executed while serving requests.', dict(self._db_queries)),
+                ('http_request_db_seconds_total', 'Time spent in database queries.', dict(self._db_time)),
+                ('http_request_serialize_seconds_total', 'Time spent serializing response bodies.', dict(self._serialize_time)),
+            ]
+
+        lines = [
+            '# HELP http_request_duration_seconds Wall time spent serving requests.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for key in sorted(durations):
+            counts, total, count = durations[key]
+            labels = _labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(DURATION_BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+
+        for name, help_text, values in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for key in sorted(values):
+                value = values[key]
+                value = f'{value:.6f}' if isinstance(value, float) else value
+                lines.append(f'{name}{{{_labels(key)}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(key):
+    route, method, status = key
+    return f'route="{_escape(route)}",method="{method}",status="{status}"'
+
+
+registry = MetricsRegistry()
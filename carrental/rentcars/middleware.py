@@ -0,0 +1,116 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, profiling
+from .permissions import is_admin_request
+from .query_inspection import QueryCounter
+
+logger = logging.getLogger('rentcars.requests')
+query_logger = logging.getLogger('rentcars.queries')
+
+
+def route_for(request):
+    """URL pattern of the matched view, e.g. 'api/invoices/<int:invoice_id>/pdf/'."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.route or match.view_name or 'unmatched'
+
+
+class RequestTimingMiddleware:
+    """Record wall time, DB queries/time and serialization time per request.
+
+    Results are sent back as a Server-Timing header, logged as one logfmt line
+    on the ``rentcars.requests`` logger and folded into metrics.registry.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with metrics.track_request() as stats, ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(metrics.query_timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_queries} queries"',
+            f'serialize;dur={stats.serialize_time * 1000:.1f}',
+        ])
+
+        route = route_for(request)
+        metrics.registry.observe(route, request.method, response.status_code, duration, stats)
+        logger.info(
+            'method=%s route="%s" status=%s duration_ms=%.1f db_queries=%d db_ms=%.1f serialize_ms=%.1f',
+            request.method, route, response.status_code, duration * 1000,
+            stats.db_queries, stats.db_time * 1000, stats.serialize_time * 1000,
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """Sample the view's stack for admin requests sending ``X-Profile: 1``,
+    or for a random PROFILING_SAMPLE_RATE fraction of all requests.
+
+    The collapsed stacks are stored in the profile ring and the file name is
+    returned in the ``X-Profile-Id`` header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        if request.headers.get('X-Profile') and is_admin_request(request):
+            return True
+        rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with profiling.StackSampler(interval=getattr(settings, 'PROFILING_INTERVAL', 0.005)) as sampler:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        if sampler.samples:
+            try:
+                response['X-Profile-Id'] = profiling.save_profile(route_for(request), duration, sampler.collapsed())
+            except OSError:
+                logger.exception('Could not store request profile')
+        return response
+
+
+class QueryInspectionMiddleware:
+    """Log SQL shapes repeated within one request (likely N+1 lazy loads).
+
+    Development/test only: enabled by settings.QUERY_INSPECTION.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+
+    def __call__(self, request):
+        counter = QueryCounter(capture_stacks=True, threshold=self.threshold)
+        with counter.installed():
+            response = self.get_response(request)
+
+        for shape, count in counter.repeated():
+            query_logger.warning(
+                'Possible N+1 on %s %s: %d x %s\n%s',
+                request.method, request.path, count, shape, counter.stacks.get(shape, ''),
+            )
+        return response
@@ -0,0 +1,39 @@
+# Exclusion constraint preventing overlapping active rentals of the same car.
+# PostgreSQL only: on other backends Rental.clean() remains the only guard.
+
+from django.db import migrations
+
+
+CONSTRAINT_NAME = "rental_active_no_overlap"
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        f"ALTER TABLE rentcars_rental ADD CONSTRAINT {CONSTRAINT_NAME} "
+        "EXCLUDE USING gist ("
+        "car_id WITH =, "
+        "daterange(start_date, end_date, '[)') WITH &&"
+        ") WHERE (status = 'active')"
+    )
+
+
+def remove_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"ALTER TABLE rentcars_rental DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rentcars", "0007_alter_car_brand"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_exclusion_constraint, remove_exclusion_constraint),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentcars', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_file',
+            field=models.FileField(blank=True, null=True, upload_to='invoices/'),
+        ),
+    ]
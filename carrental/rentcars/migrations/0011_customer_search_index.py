@@ -0,0 +1,85 @@
+# Full-text index behind /api/customers/search/.
+# SQLite: an external-content FTS5 table kept in sync by triggers.
+# PostgreSQL: a generated, weighted tsvector column with a GIN index.
+
+from django.db import migrations
+
+
+FTS_TABLE = "rentcars_customer_fts"
+FTS_COLUMNS = "full_name, email, National_ID, License_Number, phone_number"
+TRIGGERS = ("customer_fts_insert", "customer_fts_delete", "customer_fts_update")
+
+
+def fts_columns(prefix):
+    return ", ".join(f"{prefix}.{column.strip()}" for column in FTS_COLUMNS.split(","))
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return "ENABLE_FTS5" in {row[0] for row in cursor.fetchall()}
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE rentcars_customer ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple'::regconfig, coalesce(full_name, '')), 'A') || "
+            "setweight(to_tsvector('simple'::regconfig, coalesce(\"National_ID\", '') || ' ' "
+            "|| coalesce(\"License_Number\", '')), 'B') || "
+            "setweight(to_tsvector('simple'::regconfig, coalesce(email, '') || ' ' "
+            "|| coalesce(phone_number, '')), 'C')"
+            ") STORED"
+        )
+        schema_editor.execute(
+            "CREATE INDEX customer_search_vector_idx ON rentcars_customer USING gin (search_vector)"
+        )
+        return
+    if connection.vendor != "sqlite" or not sqlite_has_fts5(connection):
+        return
+
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({FTS_COLUMNS}, "
+        "content='rentcars_customer', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER customer_fts_insert AFTER INSERT ON rentcars_customer BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES (new.id, {fts_columns('new')}); END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER customer_fts_delete AFTER DELETE ON rentcars_customer BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS}) "
+        f"VALUES ('delete', old.id, {fts_columns('old')}); END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER customer_fts_update AFTER UPDATE ON rentcars_customer BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS}) "
+        f"VALUES ('delete', old.id, {fts_columns('old')}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES (new.id, {fts_columns('new')}); END"
+    )
+    # Index the customers that already exist
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS customer_search_vector_idx")
+        schema_editor.execute("ALTER TABLE rentcars_customer DROP COLUMN IF EXISTS search_vector")
+    elif connection.vendor == "sqlite":
+        for trigger in TRIGGERS:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rentcars", "0010_invoice_pdf_file"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:52
+
+import re
+
+from django.db import migrations, models
+
+
+def fill_search_keys(apps, schema_editor):
+    Car = apps.get_model('rentcars', 'Car')
+    cars = list(Car.objects.only('id', 'brand', 'model', 'license_plate'))
+    for car in cars:
+        car.search_key = ' '.join(re.findall(r'[a-z0-9]+', f"{car.brand} {car.model} {car.license_plate}".lower()))
+    Car.objects.bulk_update(cars, ['search_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentcars', '0011_customer_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='search_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+    ]
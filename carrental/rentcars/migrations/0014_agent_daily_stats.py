@@ -0,0 +1,95 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:08
+
+from collections import defaultdict
+from datetime import datetime, time
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.utils import timezone
+
+# Inlined from rentcars.agent_stats as of this migration, so later changes to
+# that module cannot change what this backfill computes.
+COUNTERS = ('rentals', 'cancelled', 'revenue', 'rental_days', 'violations', 'completed', 'completion_seconds',
+            'timed_completions')
+
+
+def contribution(status, total_price, start_date, end_date, completed_at):
+    if status == 'cancelled':
+        return {'cancelled': 1}
+    counters = {'rentals': 1, 'revenue': total_price or 0, 'rental_days': (end_date - start_date).days}
+    if status == 'completed':
+        counters['completed'] = 1
+        if completed_at is not None:
+            scheduled = timezone.make_aware(datetime.combine(end_date, time.min), timezone.get_default_timezone())
+            counters['completion_seconds'] = int((completed_at - scheduled).total_seconds())
+            counters['timed_completions'] = 1
+    return counters
+
+
+def backfill(apps, schema_editor):
+    Rental = apps.get_model('rentcars', 'Rental')
+    Violation = apps.get_model('rentcars', 'Violation')
+    AgentDailyStats = apps.get_model('rentcars', 'AgentDailyStats')
+
+    # The last update of a completed rental is the closest record of when it was completed
+    Rental.objects.filter(status='completed').update(completed_at=F('updated_at'))
+
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    rentals = Rental.objects.exclude(agent=None).order_by().values_list(
+        'agent_id', 'start_date', 'status', 'total_price', 'end_date', 'completed_at')
+    for agent_id, day, status, total_price, end_date, completed_at in rentals.iterator(chunk_size=5000):
+        row = totals[agent_id, day]
+        for name, value in contribution(status, total_price, day, end_date, completed_at).items():
+            row[name] += value
+    violations = (
+        Violation.objects.exclude(rental__agent=None).order_by()
+        .values_list('rental__agent_id', 'rental__start_date').annotate(count=Count('id'))
+    )
+    for agent_id, day, count in violations:
+        totals[agent_id, day]['violations'] += count
+
+    AgentDailyStats.objects.bulk_create(
+        (AgentDailyStats(agent_id=agent_id, day=day, **row) for (agent_id, day), row in totals.items()),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentcars', '0013_updated_at_for_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rental',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='AgentDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rentals', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rental_days', models.IntegerField(default=0)),
+                ('violations', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('completion_seconds', models.BigIntegerField(default=0)),
+                ('timed_completions', models.IntegerField(default=0)),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Agent daily stats',
+                'verbose_name_plural': 'Agent daily stats',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='agent_daily_stats_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('agent', 'day'), name='agent_daily_stats_unique')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
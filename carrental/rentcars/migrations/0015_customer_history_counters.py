@@ -0,0 +1,124 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:13
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+# The FTS5 sync triggers exactly as 0011 created them; the narrower update
+# trigger is installed by 0016. Kept inline so this migration does not change
+# when app code or later migrations do.
+FTS_TABLE = "rentcars_customer_fts"
+FTS_COLUMNS = "full_name, email, National_ID, License_Number, phone_number"
+TRIGGERS = ("customer_fts_insert", "customer_fts_delete", "customer_fts_update")
+
+
+def fts_columns(prefix):
+    return ", ".join(f"{prefix}.{column.strip()}" for column in FTS_COLUMNS.split(","))
+
+
+def restore_search_triggers(apps, schema_editor):
+    # Adding NOT NULL columns rebuilds rentcars_customer on SQLite, which drops the FTS5 triggers
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+    for trigger in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    schema_editor.execute(
+        f"CREATE TRIGGER customer_fts_insert AFTER INSERT ON rentcars_customer BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES (new.id, {fts_columns('new')}); END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER customer_fts_delete AFTER DELETE ON rentcars_customer BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS}) "
+        f"VALUES ('delete', old.id, {fts_columns('old')}); END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER customer_fts_update AFTER UPDATE ON rentcars_customer BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS}) "
+        f"VALUES ('delete', old.id, {fts_columns('old')}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES (new.id, {fts_columns('new')}); END"
+    )
+    # Customers changed while the triggers were missing
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def total(queryset, outer_field, **aggregate):
+    (name, expression), = aggregate.items()
+    if isinstance(expression, Sum):
+        zero, output = Value(Decimal('0')), models.DecimalField(max_digits=14, decimal_places=2)
+    else:
+        zero, output = Value(0), models.IntegerField()
+    rows = (
+        queryset.filter(**{outer_field: OuterRef('pk')}).order_by()
+        .values(outer_field).annotate(**aggregate).values(name)
+    )
+    return Coalesce(Subquery(rows[:1]), zero, output_field=output)
+
+
+def fill_counters(apps, schema_editor):
+    rentals = apps.get_model('rentcars', 'Rental').objects.exclude(status='cancelled')
+    violations = apps.get_model('rentcars', 'Violation').objects.filter(is_paid=False)
+    invoices = apps.get_model('rentcars', 'Invoice').objects.filter(is_paid=False)
+    apps.get_model('rentcars', 'Customer').objects.update(
+        rentals_count=total(rentals, 'customer_id', n=Count('id')),
+        active_rentals=total(rentals, 'customer_id', n=Count('id', filter=Q(status='active'))),
+        lifetime_spend=total(rentals, 'customer_id', amount=Sum('total_price')),
+        unpaid_violations=total(violations, 'rental__customer_id', n=Count('id')),
+        unpaid_fines=total(violations, 'rental__customer_id', amount=Sum('fine_amount')),
+        unpaid_invoices=total(invoices, 'rental__customer_id', n=Count('id')),
+        unpaid_invoice_amount=total(invoices, 'rental__customer_id', amount=Sum('final_price')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentcars', '0014_agent_daily_stats'),
+    ]
+
+    operations = [
+        # Reversed last, after the columns are removed (and the table rebuilt) again
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='customer',
+            name='active_rentals',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='lifetime_spend',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='rentals_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='unpaid_fines',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='unpaid_invoice_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='unpaid_invoices',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='unpaid_violations',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Re-index a customer only when one of its indexed columns changes. The
+# original trigger from 0011 fired on every UPDATE of rentcars_customer,
+# including the history counter updates added in 0015.
+
+from django.db import migrations
+
+FTS_TABLE = "rentcars_customer_fts"
+FTS_COLUMNS = "full_name, email, National_ID, License_Number, phone_number"
+
+
+def fts_columns(prefix):
+    return ", ".join(f"{prefix}.{column.strip()}" for column in FTS_COLUMNS.split(","))
+
+
+def replace_update_trigger(schema_editor, event):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("DROP TRIGGER IF EXISTS customer_fts_update")
+    schema_editor.execute(
+        f"CREATE TRIGGER customer_fts_update AFTER {event} ON rentcars_customer BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS}) "
+        f"VALUES ('delete', old.id, {fts_columns('old')}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES (new.id, {fts_columns('new')}); END"
+    )
+
+
+def narrow_update_trigger(apps, schema_editor):
+    replace_update_trigger(schema_editor, f"UPDATE OF {FTS_COLUMNS}")
+
+
+def widen_update_trigger(apps, schema_editor):
+    replace_update_trigger(schema_editor, "UPDATE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rentcars", "0015_customer_history_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(narrow_update_trigger, widen_update_trigger),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentcars', '0016_customer_fts_update_trigger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='pdf_revision',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentcars', '0017_invoice_pdf_revision'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='car',
+            name='search_key',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
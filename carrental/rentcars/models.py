@@ -1,9 +1,10 @@
 from django.db import models
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import date, timedelta
+import re
 from decimal import Decimal
 
 class CustomUser(AbstractUser):
@@ -30,6 +31,17 @@ class Customer(models.Model):
     profile_image = models.ImageField(upload_to='customer_profiles/', blank=True, null=True)
     license_image = models.ImageField(upload_to='customer_licenses/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized history counters, maintained by rentcars.customer_stats
+    rentals_count = models.IntegerField(default=0, editable=False)  # excluding cancelled
+    active_rentals = models.IntegerField(default=0, editable=False)
+    lifetime_spend = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    unpaid_violations = models.IntegerField(default=0, editable=False)
+    unpaid_fines = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    unpaid_invoices = models.IntegerField(default=0, editable=False)
+    unpaid_invoice_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+
+    COUNTER_FIELDS = ('rentals_count', 'active_rentals', 'lifetime_spend', 'unpaid_violations', 'unpaid_fines',
+                      'unpaid_invoices', 'unpaid_invoice_amount')
     
     def clean(self):
         if self.License_Expiry_Date and self.License_Expiry_Date <= date.today():
@@ -37,6 +49,15 @@ class Customer(models.Model):
         if self.date_of_birth and self.date_of_birth >= date.today():
             raise ValidationError("Date of birth must be in the past")
     
+    def save(self, *args, **kwargs):
+        # Never write back counters loaded earlier: signals may have moved them since
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.full_name
     
@@ -83,7 +104,10 @@ class Car(models.Model):
     main_image = models.ImageField(upload_to='car_images/', blank=True, null=True)
     interior_image = models.ImageField(upload_to='car_images/', blank=True, null=True)
     exterior_image = models.ImageField(upload_to='car_images/', blank=True, null=True)
+    # Lowercased brand/model/plate tokens, maintained by save() for the catalog's search index
+    search_key = models.CharField(max_length=255, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     def clean(self):
         current_year = date.today().year
@@ -92,12 +116,25 @@ class Car(models.Model):
         if self.year < 1900:
             raise ValidationError("Year cannot be less than 1900")
     
+    def build_search_key(self):
+        return ' '.join(re.findall(r'[a-z0-9]+', f"{self.brand} {self.model} {self.license_plate}".lower()))
+    
+    def save(self, *args, **kwargs):
+        self.search_key = self.build_search_key()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'brand', 'model', 'license_plate'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_key'}
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.brand} {self.model} {self.year} ({self.license_plate})"
 
     @classmethod
     def available_cars_by_model(cls, model_name):
-        return cls.objects.filter(model__icontains=model_name, available=True)
+        # Same matches as model__icontains, found through the catalog's trigram index instead of a LIKE scan
+        from .catalog import get_snapshot
+        ids = [car['id'] for car in get_snapshot().filter(available_only=True, model=model_name)]
+        return cls.objects.filter(id__in=ids, available=True)
     
     @classmethod
     def available_cars_by_brand(cls, brand_name):
@@ -127,7 +164,8 @@ class Rental(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True,null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    completed_at = models.DateTimeField(blank=True, null=True, editable=False)
 
     def clean(self):
         if self.start_date >= self.end_date:
@@ -149,7 +187,18 @@ class Rental(models.Model):
         if not self.total_price:
             days = (self.end_date - self.start_date).days
             self.total_price = self.car.price_per_day * days
-        super().save(*args, **kwargs)
+        # Stamp when the rental was closed; reopening or cancelling clears it
+        completed_at = self.completed_at
+        if self.status == 'completed' and self.completed_at is None:
+            self.completed_at = timezone.now()
+        elif self.status != 'completed':
+            self.completed_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.completed_at != completed_at:
+            kwargs['update_fields'] = {*update_fields, 'completed_at'}
+        # Commit together with the counter updates made by the save signals
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     @property
     def rental_days(self):
@@ -186,6 +235,11 @@ class Violation(models.Model):
     fine_amount = models.DecimalField(max_digits=10, decimal_places=2)
     date_reported = models.DateField(auto_now_add=True)
     is_paid = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():  # together with the customer and agent counters (see signals.py)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.get_violation_type_display()} - {self.rental.car.license_plate} - {self.fine_amount} AED"
@@ -203,6 +257,10 @@ class Invoice(models.Model):
     discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     is_paid = models.BooleanField(default=False)
     payment_date = models.DateTimeField(blank=True, null=True)
+    pdf_file = models.FileField(upload_to='invoices/', blank=True, null=True)
+    # Bumped by every invalidation, so a render that raced with a change is not stored
+    pdf_revision = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     def save(self, *args, **kwargs):
         if not self.final_price:
@@ -210,7 +268,8 @@ class Invoice(models.Model):
             base_amount = self.rental.final_amount - self.discount_amount
             self.tax_amount = base_amount * Decimal('0.05')  # 5% tax
             self.final_price = base_amount + self.tax_amount
-        super().save(*args, **kwargs)
+        with transaction.atomic():  # together with the customer counters (see signals.py)
+            super().save(*args, **kwargs)
     
     @property
     def invoice_number(self):
@@ -231,6 +290,7 @@ class Maintenance(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     date = models.DateField(default=date.today)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.car.license_plate} - {self.amount} on {self.date}"
@@ -239,3 +299,67 @@ class Maintenance(models.Model):
         verbose_name = "Maintenance"
         verbose_name_plural = "Maintenances"
         ordering = ['-date', '-created_at']
+
+class Job(models.Model):
+    """Deferred unit of work picked up by `manage.py run_workers` (see rentcars.jobs)."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    priority = models.IntegerField(default=0)  # higher runs first
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, null=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Job #{self.id} {self.task} ({self.status})"
+
+    class Meta:
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_after'], name='job_claim_idx'),
+        ]
+
+
+class AgentDailyStats(models.Model):
+    """Per-agent, per-day rental counters kept up to date by signals (see rentcars.agent_stats)."""
+    agent = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()  # start date of the rentals counted
+    rentals = models.IntegerField(default=0)  # excluding cancelled
+    cancelled = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rental_days = models.IntegerField(default=0)
+    violations = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    # Seconds from the scheduled end date to completion, over completions with a timestamp
+    completion_seconds = models.BigIntegerField(default=0)
+    timed_completions = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.agent} on {self.day}"
+
+    class Meta:
+        verbose_name = "Agent daily stats"
+        verbose_name_plural = "Agent daily stats"
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['agent', 'day'], name='agent_daily_stats_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='agent_daily_stats_day_idx'),
+        ]
@@ -0,0 +1,35 @@
+# Monitoring Endpoints
+from django.http import FileResponse, HttpResponse
+from django.views.decorators.http import require_http_methods
+
+from . import profiling
+from .metrics import registry
+from .permissions import admin_required
+from .responses import JsonResponse
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """Per-route latency histograms and DB/serialization counters in Prometheus text format"""
+    return HttpResponse(
+        registry.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@require_http_methods(["GET"])
+@admin_required
+def list_profiles(request):
+    """List stored request profiles, newest first - Admin only"""
+    profiles = profiling.list_profiles()
+    return JsonResponse({'status': 'success', 'data': profiles, 'count': len(profiles)})
+
+
+@require_http_methods(["GET"])
+@admin_required
+def download_profile(request, name):
+    """Download one profile in collapsed-stack format - Admin only"""
+    path = profiling.profile_path(name)
+    if path is None:
+        return JsonResponse({'status': 'error', 'message': 'Profile not found'}, status=404)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name, content_type='text/plain')
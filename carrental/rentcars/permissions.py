@@ -0,0 +1,25 @@
+import hmac
+from functools import wraps
+
+from django.conf import settings
+
+from .responses import JsonResponse
+
+
+def is_admin_request(request):
+    """True for a logged-in admin/superuser or a request carrying ADMIN_API_TOKEN."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and (user.is_superuser or getattr(user, 'is_admin', False)):
+        return True
+    token = getattr(settings, 'ADMIN_API_TOKEN', '')
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(supplied, token)
+
+
+def admin_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_admin_request(request):
+            return JsonResponse({'status': 'error', 'message': 'Admin access required'}, status=403)
+        return view(request, *args, **kwargs)
+    return wrapper
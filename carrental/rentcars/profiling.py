@@ -0,0 +1,102 @@
+"""On-demand wall-clock profiling of live requests.
+
+StackSampler snapshots the request thread's stack at a fixed interval and
+counts identical stacks, producing the "collapsed" format understood by
+flamegraph.pl and speedscope. Profiles are kept in a bounded on-disk ring
+under settings.PROFILING_DIR.
+"""
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+PROFILE_NAME_RE = re.compile(r'^[\w.-]+\.collapsed$')
+
+
+def frame_label(frame):
+    module = frame.f_globals.get('__name__', '?')
+    return f"{module}:{frame.f_code.co_name}"
+
+
+class StackSampler:
+    """Sample one thread's stack every ``interval`` seconds from a helper thread."""
+
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[';'.join(stack)] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def profile_dir():
+    path = Path(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def save_profile(route, duration, collapsed):
+    """Write a profile and drop the oldest ones beyond PROFILING_MAX_FILES."""
+    slug = re.sub(r'[^\w]+', '_', route).strip('_') or 'root'
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 1_000_000:06d}-{slug}-{duration * 1000:.0f}ms.collapsed"
+    directory = profile_dir()
+    (directory / name).write_text(collapsed, encoding='utf-8')
+
+    max_files = getattr(settings, 'PROFILING_MAX_FILES', 50)
+    profiles = sorted(directory.glob('*.collapsed'), key=lambda p: p.stat().st_mtime)
+    for old in profiles[:-max_files]:
+        old.unlink(missing_ok=True)
+    return name
+
+
+def list_profiles():
+    profiles = sorted(profile_dir().glob('*.collapsed'), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [
+        {'name': p.name, 'size': p.stat().st_size, 'created': p.stat().st_mtime}
+        for p in profiles
+    ]
+
+
+def profile_path(name):
+    """Resolve a profile name to its file, or None if invalid or missing."""
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
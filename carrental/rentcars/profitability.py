@@ -0,0 +1,101 @@
+"""Per-car profitability ledger: rental revenue against maintenance and unpaid fines.
+
+For a period (inclusive dates) each car gets:
+
+- revenue: total_price of active and completed rentals starting in the period
+- unpaid_violations: fines reported in the period and not yet paid, which the
+  agency carries until the customer settles them
+- maintenance_cost: Maintenance ("fixing recycle") expenses dated in the period
+- net_margin: revenue - maintenance_cost - unpaid_violations
+
+Each table is read with one grouped aggregate, so a report costs four queries
+however large the fleet. Reports are cached per period under a ledger version
+that Car, Rental, Violation and Maintenance writes bump (see signals.py).
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from . import catalog
+from .models import Car, Maintenance, Rental, Violation
+
+BOOKED_STATUSES = ('active', 'completed')
+VERSION_KEY = 'rentcars:ledger_version'
+CACHE_TIMEOUT = 15 * 60
+ZERO = Decimal('0')
+
+
+def grouped(queryset, car_field, amount_field):
+    """{car_id: (sum of amount_field, row count)} in a single GROUP BY query."""
+    rows = (
+        queryset.order_by()  # Meta ordering would end up in the GROUP BY
+        .values(car_field)
+        .annotate(total=Sum(amount_field), count=Count('id'))
+        .values_list(car_field, 'total', 'count')
+    )
+    return {car_id: (total or ZERO, count) for car_id, total, count in rows}
+
+
+def margin_pct(net, revenue):
+    return round(float(net / revenue * 100), 2) if revenue else None
+
+
+def car_profitability(start, end, brand=None):
+    """Revenue, unpaid violations, maintenance cost and net margin per car between start and end."""
+    cars = Car.objects.order_by('id')
+    rentals = Rental.objects.filter(status__in=BOOKED_STATUSES, start_date__range=(start, end))
+    violations = Violation.objects.filter(is_paid=False, date_reported__range=(start, end))
+    maintenance = Maintenance.objects.filter(date__range=(start, end))
+    if brand:
+        cars = cars.filter(brand=brand)
+        rentals = rentals.filter(car__brand=brand)
+        violations = violations.filter(rental__car__brand=brand)
+        maintenance = maintenance.filter(car__brand=brand)
+
+    revenue = grouped(rentals, 'car_id', 'total_price')
+    fines = grouped(violations, 'rental__car_id', 'fine_amount')
+    repairs = grouped(maintenance, 'car_id', 'amount')
+
+    ledger = []
+    totals = dict.fromkeys(('revenue', 'unpaid_violations', 'maintenance_cost', 'net_margin'), ZERO)
+    for car_id, car_brand, model, plate in cars.values_list('id', 'brand', 'model', 'license_plate'):
+        row = {
+            'revenue': revenue.get(car_id, (ZERO, 0))[0],
+            'unpaid_violations': fines.get(car_id, (ZERO, 0))[0],
+            'maintenance_cost': repairs.get(car_id, (ZERO, 0))[0],
+        }
+        row['net_margin'] = row['revenue'] - row['maintenance_cost'] - row['unpaid_violations']
+        for name, amount in row.items():
+            totals[name] += amount
+        ledger.append({
+            'car_id': car_id,
+            'car': f"{car_brand} {model}",
+            'license_plate': plate,
+            'rentals': revenue.get(car_id, (ZERO, 0))[1],
+            'unpaid_violation_count': fines.get(car_id, (ZERO, 0))[1],
+            'maintenance_count': repairs.get(car_id, (ZERO, 0))[1],
+            **{name: float(amount) for name, amount in row.items()},
+            'margin_pct': margin_pct(row['net_margin'], row['revenue']),
+        })
+
+    return {
+        'period': {'start': start.isoformat(), 'end': end.isoformat(), 'days': (end - start).days + 1},
+        'totals': {
+            'cars': len(ledger),
+            **{name: float(amount) for name, amount in totals.items()},
+            'margin_pct': margin_pct(totals['net_margin'], totals['revenue']),
+            'loss_making_cars': sum(1 for row in ledger if row['net_margin'] < 0),
+        },
+        'cars': ledger,
+    }
+
+
+def cached_car_profitability(start, end, brand=None):
+    """car_profitability() cached until the next write to one of the ledger's tables."""
+    key = f'rentcars:profitability:{catalog.current_version(VERSION_KEY)}:{start}:{end}:{brand or ""}'
+    report = cache.get(key)
+    if report is None:
+        report = car_profitability(start, end, brand)
+        cache.set(key, report, CACHE_TIMEOUT)
+    return report
@@ -0,0 +1,99 @@
+"""Development/test helpers for spotting N+1 queries and enforcing query budgets.
+
+QueryInspectionMiddleware (enabled by settings.QUERY_INSPECTION) fingerprints
+every SQL statement of a request and logs the originating stack of any shape
+repeated QUERY_REPEAT_THRESHOLD times or more. Views declare an upper bound
+with @query_budget(n); exceeding it raises QueryBudgetExceeded when
+settings.QUERY_BUDGET_STRICT is on (the test runner enables it) and logs a
+warning otherwise.
+"""
+import logging
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('rentcars.queries')
+
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Reduce a statement to its shape: literals and IN lists collapse to '?'."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def caller_stack(limit=8):
+    """Project frames (outside Django and site-packages) leading to the query."""
+    base = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(base) and 'site-packages' not in frame.filename
+        and not frame.filename.endswith('query_inspection.py')
+    ]
+    return ''.join(traceback.format_list(frames[-limit:]))
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """execute_wrapper that counts statements per fingerprint."""
+
+    def __init__(self, capture_stacks=False, threshold=None):
+        self.total = 0
+        self.shapes = Counter()
+        self.stacks = {}
+        self.capture_stacks = capture_stacks
+        self.threshold = threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        if self.capture_stacks:
+            shape = fingerprint(sql)
+            self.shapes[shape] += 1
+            if self.shapes[shape] == self.threshold:
+                self.stacks[shape] = caller_stack()
+        return execute(sql, params, many, context)
+
+    def installed(self):
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(self))
+        return stack
+
+    def repeated(self):
+        if not self.threshold:
+            return []
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= self.threshold]
+
+
+def query_budget(max_queries):
+    """Declare the maximum number of queries a view may run."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            counter = QueryCounter()
+            with counter.installed():
+                response = view(request, *args, **kwargs)
+            if counter.total > max_queries:
+                message = f'{view.__name__} ran {counter.total} queries (budget {max_queries})'
+                if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
@@ -0,0 +1,35 @@
+"""JSON rendering for API responses.
+
+render_json() uses orjson when it is installed and JSON_RENDERER allows it,
+and the stdlib encoder otherwise. Both produce the same output as Django's
+JsonResponse: dates, times and decimals go through DjangoJSONEncoder.
+"""
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+_django_default = DjangoJSONEncoder().default
+
+
+def renderer_name():
+    choice = getattr(settings, 'JSON_RENDERER', 'auto')
+    if choice == 'stdlib' or orjson is None:
+        return 'stdlib'
+    return 'orjson'
+
+
+def render_json(data):
+    """Encode ``data`` to compact UTF-8 JSON bytes."""
+    if renderer_name() == 'orjson':
+        return orjson.dumps(
+            data,
+            default=_django_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
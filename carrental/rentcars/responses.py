@@ -0,0 +1,51 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse as DjangoJsonResponse
+
+from .metrics import serialization_timer
+from .renderers import render_json
+
+
+class JsonResponse(DjangoJsonResponse):
+    """JsonResponse encoded by the configured renderer, reporting its encoding time to the request metrics."""
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if encoder is not DjangoJSONEncoder or json_dumps_params:
+            # Custom encoding options are only understood by the stdlib encoder
+            with serialization_timer():
+                super().__init__(data, encoder, safe, json_dumps_params, **kwargs)
+            return
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the safe parameter to False."
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        with serialization_timer():
+            content = render_json(data)
+        HttpResponse.__init__(self, content=content, **kwargs)
+
+
+def wants_columnar(request):
+    return request.GET.get('format') == 'columnar'
+
+
+class ColumnarResponse(HttpResponse):
+    """Compact list payload: column names once, then one array per row.
+
+    ``rows`` must already hold plain JSON types (values_list() with Cast
+    expressions for decimals and dates), so no per-value conversion hook is
+    needed. With ``?layout=arrays`` the rows are transposed into one array per
+    column.
+    """
+
+    def __init__(self, request, columns, rows, **extra):
+        with serialization_timer():
+            payload = {'status': 'success', 'columns': list(columns)}
+            rows = list(rows)
+            if request.GET.get('layout') == 'arrays':
+                payload['arrays'] = [list(column) for column in zip(*rows)] or [[] for _ in payload['columns']]
+            else:
+                payload['rows'] = rows
+            payload['count'] = len(rows)
+            payload.update(extra)
+            body = render_json(payload)
+        super().__init__(body, content_type='application/json')
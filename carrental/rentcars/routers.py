@@ -0,0 +1,83 @@
+"""Database routing: reads go to the ``replica`` alias, writes to ``default``.
+
+Reads fall back to the primary when no replica is configured, inside a
+transaction, and for the rest of a request once it has written anything.
+ReplicaPinningMiddleware also keeps a client on the primary for a few seconds
+after a write (via a cookie) so agents always see their own bookings.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY_DB_ALIAS = 'default'
+REPLICA_DB_ALIAS = 'replica'
+PIN_COOKIE_NAME = 'db_pin_primary'
+
+_pinned = ContextVar('db_pinned_to_primary', default=False)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def pin_to_primary():
+    """Send every remaining read in the current request to the primary."""
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def use_primary():
+    """Temporarily route reads to the primary, e.g. for read-modify-write code."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replica_configured() or _pinned.get():
+            return PRIMARY_DB_ALIAS
+        if connections[PRIMARY_DB_ALIAS].in_atomic_block:
+            return PRIMARY_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return PRIMARY_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data, so cross-alias relations are fine
+        return True
+
+
+class ReplicaPinningMiddleware:
+    """Scope primary pinning to one request and make it sticky after writes."""
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        is_write = request.method not in self.safe_methods
+        token = _pinned.set(is_write or PIN_COOKIE_NAME in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+        if is_write and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1',
+                max_age=getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
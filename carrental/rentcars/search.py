@@ -0,0 +1,90 @@
+"""Customer full-text search.
+
+Uses the index created by migration 0011: an FTS5 table on SQLite, a weighted
+tsvector column on PostgreSQL. Every word of two or more characters is matched
+as a prefix ("jo sm" finds "John Smith") and results are ranked best first.
+Matches are scored inside the index query and only the RANK_CANDIDATES best
+are joined to the customer table, so a broad query like "jo" never loads
+every hit.
+Backends without either index fall back to case-insensitive substring matching.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Customer
+
+FTS_TABLE = 'rentcars_customer_fts'
+# bm25 weights for full_name, email, National_ID, License_Number, phone_number
+FTS_WEIGHTS = '10.0, 3.0, 5.0, 5.0, 2.0'
+RANK_CANDIDATES = 500
+
+_fts5_ready = None
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())[:8]
+
+
+def fts5_query(terms):
+    # Single characters are matched as whole words; the index has no 1-char prefixes
+    return ' '.join(f'"{term}"*' if len(term) > 1 else f'"{term}"' for term in terms)
+
+
+def tsquery(terms):
+    return ' & '.join(f'{term}:*' if len(term) > 1 else term for term in terms)
+
+
+def sqlite_fts5_ready():
+    global _fts5_ready
+    if _fts5_ready is None:
+        _fts5_ready = FTS_TABLE in connection.introspection.table_names()
+    return _fts5_ready
+
+
+def search_customers(query, limit=20):
+    """Customers matching every word of ``query`` as a prefix, best match first."""
+    terms = search_terms(query)
+    if not terms:
+        return []
+    if connection.vendor == 'postgresql':
+        return list(Customer.objects.raw(
+            "SELECT c.*, m.rank FROM ("
+            "SELECT id, ts_rank(search_vector, q) AS rank FROM rentcars_customer, to_tsquery('simple', %s) q "
+            "WHERE search_vector @@ q ORDER BY rank DESC, id LIMIT %s"
+            ") m JOIN rentcars_customer c ON c.id = m.id ORDER BY m.rank DESC, c.id LIMIT %s",
+            [tsquery(terms), RANK_CANDIDATES, limit],
+        ))
+    if connection.vendor == 'sqlite' and sqlite_fts5_ready():
+        return list(Customer.objects.raw(
+            f"SELECT c.*, m.rank FROM ("
+            f"SELECT rowid, bm25({FTS_TABLE}, {FTS_WEIGHTS}) AS rank FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s ORDER BY rank, rowid LIMIT %s"
+            f") m JOIN rentcars_customer c ON c.id = m.rowid ORDER BY m.rank, c.id LIMIT %s",
+            [fts5_query(terms), RANK_CANDIDATES, limit],
+        ))
+    return list(filter_customers(Customer.objects.all(), query)[:limit])
+
+
+def filter_customers(queryset, query):
+    """Restrict a Customer queryset to full-text matches (used by the admin)."""
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    if connection.vendor == 'postgresql':
+        return queryset.filter(id__in=RawSQL(
+            "SELECT id FROM rentcars_customer WHERE search_vector @@ to_tsquery('simple', %s)",
+            [tsquery(terms)],
+        ))
+    if connection.vendor == 'sqlite' and sqlite_fts5_ready():
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [fts5_query(terms)],
+        ))
+    for term in terms:
+        queryset = queryset.filter(
+            Q(full_name__icontains=term) | Q(email__icontains=term) | Q(National_ID__icontains=term)
+        )
+    return queryset
@@ -1,8 +1,12 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission, ContentType
 
+from . import agent_stats, catalog, customer_stats, profitability
+from .invoices import invalidate_invoice_pdf
+from .models import Car, Invoice, Maintenance, Rental, Violation
+
 CustomUser = get_user_model()
 
 @receiver(post_save, sender=CustomUser)
@@ -19,4 +23,143 @@ def set_permissions(sender, instance, created, **kwargs):
         ).exclude(content_type=ContentType.objects.get_for_model(CustomUser))
         # Combine permissions
         perms = list(other_perms) + [view_perm]
-        instance.user_permissions.set(perms)
\ No newline at end of file
+        instance.user_permissions.set(perms)
+
+
+@receiver(post_save, sender=Invoice)
+def invoice_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Saving the artifact itself must not throw it away
+    if created or (update_fields and set(update_fields) == {'pdf_file'}):
+        return
+    invalidate_invoice_pdf(instance.id)
+
+
+@receiver(post_save, sender=Violation)
+@receiver(post_delete, sender=Violation)
+def violation_changed(sender, instance, **kwargs):
+    # Violations are listed on the invoice, so a stored PDF is now stale
+    invoice_id = Invoice.objects.filter(rental_id=instance.rental_id).values_list('id', flat=True).first()
+    if invoice_id:
+        invalidate_invoice_pdf(invoice_id)
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+@receiver(post_save, sender=Rental)
+@receiver(post_delete, sender=Rental)
+def catalog_changed(sender, **kwargs):
+    # Rentals flip car availability, so both invalidate the cached catalog
+    catalog.invalidate()
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+@receiver(post_save, sender=Rental)
+@receiver(post_delete, sender=Rental)
+@receiver(post_save, sender=Violation)
+@receiver(post_delete, sender=Violation)
+@receiver(post_save, sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+def ledger_changed(sender, **kwargs):
+    catalog.invalidate(profitability.VERSION_KEY)
+
+
+def stored_values(instance, fields):
+    """The instance's row as currently stored ({field: value}), or None for a new instance.
+
+    The row is locked until the save's transaction ends (the models wrap save()
+    in transaction.atomic), so a concurrent save of the same row waits and then
+    sees these changes instead of applying the same counter delta twice.
+    """
+    if not instance.pk or instance._state.adding:
+        return None
+    return type(instance).objects.select_for_update().filter(pk=instance.pk).values(*fields).first()
+
+
+def rental_owners(rental_id):
+    return Rental.objects.filter(pk=rental_id).values('customer_id', 'agent_id', 'start_date').first()
+
+
+COUNTER_FIELDS = {
+    Rental: {*agent_stats.RENTAL_FIELDS, *customer_stats.RENTAL_FIELDS},
+    Violation: set(customer_stats.VIOLATION_FIELDS),
+    Invoice: set(customer_stats.INVOICE_FIELDS),
+}
+
+
+def counters_untouched(sender, update_fields):
+    """True for a save limited to fields the counters don't depend on (e.g. an invoice's pdf_file)."""
+    if update_fields is None:
+        return False
+    fields = COUNTER_FIELDS[sender]
+    return not {*fields, *(name.removesuffix('_id') for name in fields)} & set(update_fields)
+
+
+@receiver(pre_save, sender=Rental)
+@receiver(pre_save, sender=Violation)
+@receiver(pre_save, sender=Invoice)
+def remember_stored_values(sender, instance, update_fields=None, **kwargs):
+    # post_save applies only the difference to the agent and customer counters
+    if not counters_untouched(sender, update_fields):
+        instance._stored_values = stored_values(instance, COUNTER_FIELDS[sender])
+
+
+@receiver(post_save, sender=Rental)
+def update_rental_counters(sender, instance, update_fields=None, **kwargs):
+    if counters_untouched(sender, update_fields):
+        return
+    previous = getattr(instance, '_stored_values', None)
+    agent_stats.rental_saved(instance, previous)
+    customer_stats.rental_saved(instance, previous)
+
+
+@receiver(post_delete, sender=Rental)
+def remove_rental_counters(sender, instance, **kwargs):
+    agent_stats.rental_deleted(instance)
+    customer_stats.rental_deleted(instance)
+
+
+@receiver(post_save, sender=Violation)
+def update_violation_counters(sender, instance, update_fields=None, **kwargs):
+    if counters_untouched(sender, update_fields):
+        return
+    previous = getattr(instance, '_stored_values', None)
+    new = customer_stats.violation_counters(instance.fine_amount, instance.is_paid)
+    rental = rental_owners(instance.rental_id)
+    if previous is None:
+        agent_stats.violation_moved(rental, 1)
+        customer_stats.apply(rental and rental['customer_id'], new)
+        return
+    old = customer_stats.violation_counters(previous['fine_amount'], previous['is_paid'])
+    old_rental = rental if previous['rental_id'] == instance.rental_id else rental_owners(previous['rental_id'])
+    if old_rental is not rental:
+        agent_stats.violation_moved(old_rental, -1)
+        agent_stats.violation_moved(rental, 1)
+    customer_stats.move(old_rental and old_rental['customer_id'], old, rental and rental['customer_id'], new)
+
+
+@receiver(post_delete, sender=Violation)
+def remove_violation_counters(sender, instance, **kwargs):
+    rental = rental_owners(instance.rental_id)
+    agent_stats.violation_moved(rental, -1)
+    customer_stats.apply(rental and rental['customer_id'],
+                         customer_stats.violation_counters(instance.fine_amount, instance.is_paid), sign=-1)
+
+
+@receiver(post_save, sender=Invoice)
+def update_invoice_counters(sender, instance, update_fields=None, **kwargs):
+    if counters_untouched(sender, update_fields):
+        return
+    previous = getattr(instance, '_stored_values', None)
+    customer_id = Rental.objects.filter(pk=instance.rental_id).values_list('customer_id', flat=True).first()
+    new = customer_stats.invoice_counters(instance.final_price, instance.is_paid)
+    old = customer_stats.invoice_counters(previous['final_price'], previous['is_paid']) if previous else {}
+    # An invoice belongs to one rental for good (OneToOneField), so it never changes customer
+    customer_stats.move(customer_id, old, customer_id, new)
+
+
+@receiver(post_delete, sender=Invoice)
+def remove_invoice_counters(sender, instance, **kwargs):
+    customer_id = Rental.objects.filter(pk=instance.rental_id).values_list('customer_id', flat=True).first()
+    customer_stats.apply(customer_id, customer_stats.invoice_counters(instance.final_price, instance.is_paid),
+                         sign=-1)
@@ -0,0 +1,39 @@
+"""Job tasks run by `manage.py run_workers`. Imported from RentcarsConfig.ready()."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .analytics_export import export_analytics
+from .jobs import heartbeat, task
+from .invoices import store_invoice_pdf
+from .models import Invoice, Job
+
+
+@task('jobs.purge_finished')
+def purge_finished_jobs(days=7):
+    """Delete succeeded/failed jobs older than ``days``."""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status__in=['succeeded', 'failed'], finished_at__lt=cutoff).delete()
+    return {'deleted': deleted}
+
+
+@task('invoices.render_pdf')
+def render_invoice_pdf(invoice_id):
+    """Pre-render an invoice PDF so the first download is served from storage."""
+    invoice = Invoice.objects.select_related('rental__customer', 'rental__car').filter(id=invoice_id).first()
+    if invoice is None:
+        return {'skipped': 'invoice deleted'}
+    if invoice.pdf_file:
+        return {'pdf': invoice.pdf_file.name, 'cached': True}
+    store_invoice_pdf(invoice)
+    if not invoice.pdf_file:
+        return {'skipped': 'invoice changed while rendering'}
+    return {'pdf': invoice.pdf_file.name}
+
+
+@task('analytics.export')
+def export_analytics_snapshot(fmt='parquet', entities=None, full=False):
+    """Incremental Parquet/Arrow export into ANALYTICS_EXPORT_DIR."""
+    return export_analytics(settings.ANALYTICS_EXPORT_DIR, fmt=fmt, entities=entities, full=full,
+                            on_progress=heartbeat)
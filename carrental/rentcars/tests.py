@@ -1,3 +1,902 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+import importlib.util
+import io
+import logging
+import tempfile
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import catalog, jobs, metrics, profiling, query_inspection, routers
+from .middleware import QueryInspectionMiddleware
+from .models import AgentDailyStats, Car, Customer, CustomUser, Invoice, Job, Maintenance, Rental, Violation
+
+# Run against PostgreSQL with:
+#   DJANGO_DB_ENGINE=postgres DJANGO_DB_NAME=carrental python manage.py test rentcars
+# The Postgres-only cases are skipped on SQLite.
+
+
+def setUpModule():
+    # Keep per-request timing lines out of the test output
+    logging.getLogger("rentcars.requests").setLevel(logging.WARNING)
+
+
+def make_customer(n=1):
+    return Customer.objects.create(
+        full_name=f"Customer {n}",
+        email=f"customer{n}@example.com",
+        National_ID=f"NID{n:06d}",
+        License_Number=f"LIC{n:06d}",
+    )
+
+
+def make_car(n=1, price="100.00"):
+    return Car.objects.create(
+        brand="Toyota",
+        model="Corolla",
+        year=2022,
+        license_plate=f"PLT{n:05d}",
+        price_per_day=Decimal(price),
+    )
+
+
+class RentalOverlapTests(TestCase):
+    def setUp(self):
+        self.customer = make_customer()
+        self.car = make_car()
+        self.start = date.today() + timedelta(days=1)
+
+    def test_clean_rejects_overlapping_active_rental(self):
+        Rental.objects.create(customer=self.customer, car=self.car,
+                              start_date=self.start, end_date=self.start + timedelta(days=5))
+        rental = Rental(customer=self.customer, car=self.car,
+                        start_date=self.start + timedelta(days=2), end_date=self.start + timedelta(days=7))
+        with self.assertRaises(ValidationError):
+            rental.full_clean()
+
+    def test_back_to_back_rentals_allowed(self):
+        Rental.objects.create(customer=self.customer, car=self.car,
+                              start_date=self.start, end_date=self.start + timedelta(days=3))
+        rental = Rental(customer=self.customer, car=self.car,
+                        start_date=self.start + timedelta(days=3), end_date=self.start + timedelta(days=6))
+        rental.full_clean()
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "Exclusion constraint is PostgreSQL only")
+    def test_exclusion_constraint_rejects_overlap(self):
+        Rental.objects.create(customer=self.customer, car=self.car,
+                              start_date=self.start, end_date=self.start + timedelta(days=5))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Rental.objects.create(customer=self.customer, car=self.car,
+                                  start_date=self.start + timedelta(days=1),
+                                  end_date=self.start + timedelta(days=4))
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "Exclusion constraint is PostgreSQL only")
+    def test_exclusion_constraint_ignores_completed_rentals(self):
+        Rental.objects.create(customer=self.customer, car=self.car, status="completed",
+                              start_date=self.start, end_date=self.start + timedelta(days=5))
+        Rental.objects.create(customer=self.customer, car=self.car,
+                              start_date=self.start + timedelta(days=1),
+                              end_date=self.start + timedelta(days=4))
+
+
+@mock.patch.object(routers, "replica_configured", return_value=True)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def test_reads_go_to_replica(self, _configured):
+        with mock.patch.object(routers, "_pinned", routers.ContextVar("t", default=False)):
+            self.assertEqual(self.router.db_for_read(Car), "replica")
+
+    def test_write_pins_reads_to_primary(self, _configured):
+        with mock.patch.object(routers, "_pinned", routers.ContextVar("t", default=False)):
+            self.assertEqual(self.router.db_for_write(Car), "default")
+            self.assertEqual(self.router.db_for_read(Car), "default")
+
+    def test_falls_back_without_replica(self, configured):
+        configured.return_value = False
+        with mock.patch.object(routers, "_pinned", routers.ContextVar("t", default=False)):
+            self.assertEqual(self.router.db_for_read(Car), "default")
+
+    def test_middleware_sets_sticky_cookie_after_write(self, _configured):
+        seen = {}
+
+        def view(request):
+            seen["db"] = self.router.db_for_read(Car)
+            return HttpResponse()
+
+        middleware = routers.ReplicaPinningMiddleware(view)
+        response = middleware(self.factory.post("/api/rentals/create/"))
+        self.assertEqual(seen["db"], "default")
+        self.assertIn(routers.PIN_COOKIE_NAME, response.cookies)
+
+        request = self.factory.get("/api/cars/")
+        request.COOKIES[routers.PIN_COOKIE_NAME] = "1"
+        middleware(request)
+        self.assertEqual(seen["db"], "default")
+
+        middleware(self.factory.get("/api/cars/"))
+        self.assertEqual(seen["db"], "replica")
+
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        make_car()
+
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs("rentcars.requests", level="INFO") as logs:
+            response = self.client.get("/api/cars/")
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'total;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries", serialize;dur=[\d.]+')
+        self.assertIn('route="api/cars/"', logs.output[0])
+
+    def test_metrics_endpoint_exposes_route_histograms(self):
+        with self.assertLogs("rentcars.requests", level="INFO"):
+            self.client.get("/api/cars/")
+            response = self.client.get("/api/metrics/")
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds_count{route="api/cars/",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_db_queries_total{route="api/cars/",method="GET",status="200"} 1', body)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(PROFILING_DIR=Path(self.tmp.name), PROFILING_MAX_FILES=3,
+                                     ADMIN_API_TOKEN="secret")
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_sampler_collects_collapsed_stacks(self):
+        with profiling.StackSampler(interval=0.001) as sampler:
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+        self.assertGreater(sampler.samples, 0)
+        self.assertIn("test_sampler_collects_collapsed_stacks", sampler.collapsed())
+
+    def test_profile_ring_is_bounded(self):
+        for i in range(5):
+            profiling.save_profile(f"api/route{i}/", 0.01, "a;b 1\n")
+        self.assertEqual(len(profiling.list_profiles()), 3)
+
+    def test_profile_endpoints_are_admin_only(self):
+        name = profiling.save_profile("api/rentals/history/", 0.2, "a;b 1\n")
+        self.assertEqual(self.client.get("/api/profiles/").status_code, 403)
+        response = self.client.get("/api/profiles/", HTTP_X_ADMIN_TOKEN="secret")
+        self.assertEqual(response.json()["data"][0]["name"], name)
+        response = self.client.get(f"/api/profiles/{name}/", HTTP_X_ADMIN_TOKEN="secret")
+        self.assertEqual(b"".join(response.streaming_content), b"a;b 1\n")
+        self.assertIsNone(profiling.profile_path("../db.collapsed"))
+
+
+class QueryInspectionTests(TestCase):
+    def setUp(self):
+        customer = make_customer()
+        start = date.today() + timedelta(days=1)
+        for n in range(6):
+            Rental.objects.create(customer=customer, car=make_car(n), start_date=start,
+                                  end_date=start + timedelta(days=n + 1))
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            query_inspection.fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'"),
+            query_inspection.fingerprint("SELECT * FROM t WHERE id IN (%s) AND name = 'y'"),
+        )
+
+    def test_rental_history_stays_within_budget(self):
+        response = self.client.get("/api/rentals/history/")
+        self.assertEqual(response.json()["count"], 6)
+
+    def test_exceeded_budget_raises_in_strict_mode(self):
+        @query_inspection.query_budget(1)
+        def view(request):
+            for rental in Rental.objects.all():
+                rental.car.license_plate
+            return HttpResponse()
+
+        with self.assertRaises(query_inspection.QueryBudgetExceeded):
+            view(RequestFactory().get("/"))
+
+    @override_settings(QUERY_INSPECTION=True, QUERY_REPEAT_THRESHOLD=3)
+    def test_repeated_query_shapes_are_logged_with_stack(self):
+        def view(request):
+            return HttpResponse(",".join(str(rental.car) for rental in Rental.objects.all()))
+
+        middleware = QueryInspectionMiddleware(view)
+        with self.assertLogs("rentcars.queries", level="WARNING") as logs:
+            middleware(RequestFactory().get("/api/rentals/history/"))
+        self.assertIn("6 x SELECT", logs.output[0])
+        self.assertIn("rentcars/tests.py", logs.output[0])
+
+
+class SeedFleetCommandTests(TestCase):
+    def seed(self, **options):
+        call_command("seed_fleet", cars=20, customers=30, agents=2, years=0.5, chunk_size=50,
+                     stdout=io.StringIO(), **options)
+
+    def test_generates_non_overlapping_history(self):
+        self.seed()
+        self.assertEqual(Car.objects.count(), 20)
+        self.assertEqual(Customer.objects.count(), 30)
+        self.assertGreater(Rental.objects.count(), 100)
+        self.assertEqual(Invoice.objects.count(), Rental.objects.filter(status="completed").count())
+        for car in Car.objects.all():
+            periods = list(car.rentals.order_by("start_date").values_list("start_date", "end_date"))
+            for (_, previous_end), (start, _) in zip(periods, periods[1:]):
+                self.assertLessEqual(previous_end, start)
+
+    def test_same_seed_gives_same_data(self):
+        def snapshot():
+            return (
+                list(Rental.objects.order_by("id").values_list("start_date", "end_date", "total_price",
+                                                               "created_at", "completed_at")),
+                list(Violation.objects.order_by("id").values_list("rental_id", "date_reported", "fine_amount")),
+            )
+
+        self.seed(seed=7, as_of=date(2024, 6, 30))
+        first = snapshot()
+        Rental.objects.all().delete()
+        Car.objects.all().delete()
+        self.seed(seed=7, as_of=date(2024, 6, 30))
+        self.assertEqual(first, snapshot())
+        self.assertLess(max(start for start, *_ in first[0]), date(2024, 6, 30))
+
+    def test_violations_are_reported_during_their_rental(self):
+        self.seed(violation_rate=0.5)
+        violations = Violation.objects.values_list("date_reported", "rental__start_date", "rental__end_date")
+        self.assertGreater(len({reported for reported, _, _ in violations}), 1)
+        for reported, start, end in violations:
+            self.assertTrue(start <= reported <= min(end, date.today()))
+
+
+calls = []
+
+
+@jobs.task("tests.record")
+def record_task(value):
+    calls.append(value)
+    return {"value": value}
+
+
+@jobs.task("tests.explode")
+def explode_task():
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_in_priority_order(self):
+        jobs.enqueue("tests.record", {"value": "low"})
+        jobs.enqueue("tests.record", {"value": "high"}, priority=10)
+        while jobs.work_once("test-worker"):
+            pass
+        self.assertEqual(calls, ["high", "low"])
+        self.assertFalse(Job.objects.exclude(status="succeeded").exists())
+
+    def test_failed_job_is_retried_with_backoff_then_fails(self):
+        job = jobs.enqueue("tests.explode", max_attempts=2)
+        self.assertTrue(jobs.work_once("test-worker"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("queued", 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertFalse(jobs.work_once("test-worker"))  # not due yet
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        self.assertTrue(jobs.work_once("test-worker"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 2))
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+    def test_stale_running_job_is_requeued(self):
+        job = jobs.enqueue("tests.record", {"value": 1})
+        jobs.claim_next("dead-worker")
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertTrue(jobs.work_once("test-worker"))
+
+    def test_stale_job_without_attempts_left_is_failed(self):
+        job = jobs.enqueue("tests.record", {"value": 1}, max_attempts=1)
+        jobs.claim_next("dead-worker")
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 1))
+        self.assertIn("Worker lost", job.last_error)
+        self.assertFalse(jobs.work_once("test-worker"))
+
+    def test_heartbeat_keeps_long_job_locked(self):
+        job = jobs.enqueue("tests.record", {"value": 1})
+        claimed = jobs.claim_next("busy-worker")
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(hours=1))
+        with mock.patch.object(jobs._current, "job", claimed, create=True):
+            jobs.heartbeat()
+        self.assertEqual(jobs.requeue_stale(), 0)
+        self.assertEqual(Job.objects.get(id=job.id).status, "running")
+
+    @override_settings(ADMIN_API_TOKEN="secret")
+    def test_status_endpoint_requires_admin(self):
+        job = jobs.enqueue("tests.record", {"value": 3})
+        jobs.work_once("test-worker")
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/").status_code, 403)
+        self.assertEqual(self.client.get("/api/jobs/").status_code, 403)
+        data = self.client.get(f"/api/jobs/{job.id}/", HTTP_X_ADMIN_TOKEN="secret").json()["data"]
+        self.assertEqual((data["status"], data["result"]), ("succeeded", {"value": 3}))
+        self.assertEqual(self.client.get("/api/jobs/", HTTP_X_ADMIN_TOKEN="secret").json()["data"]["succeeded"], 1)
+
+
+class InvoicePdfTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        today = date.today()
+        self.rental = Rental.objects.create(
+            customer=make_customer(), car=make_car(), start_date=today, end_date=today + timedelta(days=2)
+        )
+
+    def complete(self):
+        return self.client.post(
+            "/api/rentals/complete/", {"rental_id": self.rental.id}, content_type="application/json"
+        ).json()
+
+    def test_complete_queues_render_and_download_uses_artifact(self):
+        body = self.complete()
+        invoice = Invoice.objects.get(id=body["invoice_id"])
+        self.assertFalse(invoice.pdf_file)
+        self.assertEqual(Job.objects.get(id=body["job_id"]).task, "invoices.render_pdf")
+        status_url = f"/api/invoices/jobs/{body['job_id']}/"
+        self.assertEqual(self.client.get(status_url).json()["data"],
+                         {"id": body["job_id"], "status": "queued", "invoice_id": invoice.id})
+        other = jobs.enqueue("tests.record", {"value": 1})
+        self.assertEqual(self.client.get(f"/api/invoices/jobs/{other.id}/").status_code, 404)
+
+        self.assertTrue(jobs.work_once("test-worker"))
+        invoice.refresh_from_db()
+        self.assertTrue(invoice.pdf_file.name.startswith("invoices/"))
+
+        with mock.patch("rentcars.invoices.render_invoice_pdf") as render:
+            response = self.client.get(f"/api/invoices/{invoice.id}/pdf/")
+        render.assert_not_called()
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response.content.startswith(b"%PDF"))
+
+    def test_change_during_render_is_not_stored(self):
+        body = self.complete()
+
+        def render(invoice):
+            Violation.objects.create(rental=self.rental, description="Speeding", fine_amount=Decimal("50.00"))
+            return b"%PDF stale"
+
+        with mock.patch("rentcars.invoices.render_invoice_pdf", side_effect=render):
+            self.assertTrue(jobs.work_once("test-worker"))
+        self.assertFalse(Invoice.objects.get(id=body["invoice_id"]).pdf_file)
+        self.assertEqual(Job.objects.get(id=body["job_id"]).result, {"skipped": "invoice changed while rendering"})
+
+    def test_new_violation_invalidates_artifact(self):
+        invoice = Invoice.objects.get(id=self.complete()["invoice_id"])
+        jobs.work_once("test-worker")
+        Violation.objects.create(rental=self.rental, description="Speeding", fine_amount=Decimal("50.00"))
+        invoice.refresh_from_db()
+        self.assertFalse(invoice.pdf_file)
+
+        response = self.client.get(f"/api/invoices/{invoice.id}/pdf/")
+        self.assertEqual(response.status_code, 200)
+        invoice.refresh_from_db()
+        self.assertTrue(invoice.pdf_file)
+
+
+def bump_many(location, times):
+    from .version_cache import LockedFileBasedCache
+    cache = LockedFileBasedCache(location, {})
+    for _ in range(times):
+        cache.incr("version")
+
+
+class CarCatalogTests(TestCase):
+    def setUp(self):
+        self.cheap = make_car(1, "80.00")
+        self.mid = Car.objects.create(brand="BMW", model="X5", year=2023, license_plate="BMW00001",
+                                      price_per_day=Decimal("300.00"))
+        self.rented = make_car(3, "150.00")
+        Car.objects.filter(id=self.rented.id).update(available=False)
+        catalog.bump_version()
+
+    def ids(self, url):
+        return [car["id"] for car in self.client.get(url).json()["data"]]
+
+    def test_filters_match_database_queries(self):
+        self.assertEqual(self.ids("/api/cars/available/"),
+                         list(Car.objects.filter(available=True).values_list("id", flat=True)))
+        self.assertEqual(self.ids("/api/cars/available/?brand=BMW"), [self.mid.id])
+        self.assertEqual(self.ids("/api/cars/available/?min_price=50&max_price=100"), [self.cheap.id])
+        self.assertEqual(self.ids("/api/cars/available/?model=coro"), [self.cheap.id])
+        self.assertEqual(len(self.ids("/api/cars/")), 3)
+
+    def test_lost_version_does_not_match_an_older_snapshot(self):
+        version = catalog.get_snapshot().version
+        caches["versions"].delete(catalog.VERSION_KEY)
+        self.assertNotEqual(catalog.get_snapshot().version, version)
+
+    def test_version_bumps_from_concurrent_processes_are_not_lost(self):
+        import multiprocessing
+        from .version_cache import LockedFileBasedCache
+
+        with tempfile.TemporaryDirectory() as location:
+            LockedFileBasedCache(location, {}).add("version", 0, timeout=None)
+            context = multiprocessing.get_context("fork")
+            workers = [context.Process(target=bump_many, args=(location, 50)) for _ in range(4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            self.assertEqual(LockedFileBasedCache(location, {}).get("version"), 200)
+
+    def test_snapshot_is_reused_until_a_write(self):
+        self.client.get("/api/cars/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/cars/")
+        self.assertEqual(self.client.get("/api/cars/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        self.cheap.price_per_day = Decimal("500.00")
+        self.cheap.save()
+        response = self.client.get("/api/cars/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        prices = {car["id"]: car["price_per_day"] for car in response.json()["data"]}
+        self.assertEqual(prices[self.cheap.id], 500.0)
+
+
+class CustomerSearchTests(TestCase):
+    def setUp(self):
+        names = ["John Smith", "Johanna Smithers", "Mary Johnson", "Ali Hassan"]
+        self.customers = [
+            Customer.objects.create(full_name=name, email=f"user{n}@example.com", National_ID=f"NID{n:05d}",
+                                    License_Number=f"LIC{n:05d}")
+            for n, name in enumerate(names)
+        ]
+
+    def names(self, q):
+        response = self.client.get("/api/customers/search/", {"q": q})
+        return [c["full_name"] for c in response.json()["data"]]
+
+    def test_prefix_terms_must_all_match(self):
+        self.assertEqual(sorted(self.names("joh")), ["Johanna Smithers", "John Smith", "Mary Johnson"])
+        self.assertEqual(sorted(self.names("jo smi")), ["Johanna Smithers", "John Smith"])
+        self.assertEqual(self.names("nid00003"), ["Ali Hassan"])
+        self.assertEqual(self.names(""), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        ali = self.customers[3]
+        ali.full_name = "Ali Zayed"
+        ali.save()
+        self.assertEqual(self.names("hassan"), [])
+        self.assertEqual(self.names("zay"), ["Ali Zayed"])
+        ali.delete()
+        self.assertEqual(self.names("zay"), [])
+
+    def test_best_match_survives_the_candidate_cap(self):
+        Customer.objects.create(full_name="Smith", email="smith@example.com", National_ID="NID00009",
+                                License_Number="LIC00009")
+        with mock.patch("rentcars.search.RANK_CANDIDATES", 1):
+            self.assertEqual(self.names("smith"), ["Smith"])
+
+    def test_admin_search_uses_index(self):
+        from django.contrib.admin.sites import site
+        model_admin = site._registry[Customer]
+        queryset, _ = model_admin.get_search_results(None, Customer.objects.all(), "smith")
+        self.assertEqual(queryset.count(), 2)
+
+
+class CarSearchTests(TestCase):
+    def setUp(self):
+        self.corolla = make_car(1)
+        self.camry = Car.objects.create(brand="Toyota", model="Camry", year=2020, license_plate="DXB-777",
+                                        price_per_day=Decimal("120.00"))
+        self.x5 = Car.objects.create(brand="BMW", model="X5", year=2022, license_plate="AUH-123",
+                                     price_per_day=Decimal("300.00"), available=False)
+
+    def search(self, **params):
+        return self.client.get("/api/cars/search/", params).json()
+
+    def test_search_key_is_normalized_on_save(self):
+        self.assertEqual(self.camry.search_key, "toyota camry dxb 777")
+
+    def test_prefix_fuzzy_and_plate_matching(self):
+        ids = lambda body: {car["id"] for car in body["data"]}
+        self.assertEqual(ids(self.search(q="toy")), {self.corolla.id, self.camry.id})
+        self.assertEqual(ids(self.search(q="corola")), {self.corolla.id})  # typo
+        self.assertEqual(ids(self.search(q="dxb 77")), {self.camry.id})
+        self.assertEqual(ids(self.search(q="x5")), set())  # rented
+        self.assertEqual(ids(self.search(q="x5", available="all")), {self.x5.id})
+
+    def test_limit_is_validated(self):
+        body = self.search(q="toy", limit=-1)
+        self.assertEqual((len(body["data"]), body["count"]), (1, 2))
+        self.assertEqual(self.client.get("/api/cars/search/", {"q": "toy", "limit": "ten"}).status_code, 400)
+
+    def test_available_cars_by_model_matches_model_substring_only(self):
+        self.assertEqual(list(Car.available_cars_by_model("amr")), [self.camry])
+        self.assertEqual(list(Car.available_cars_by_model("toyota")), [])  # brand, not model
+        self.assertEqual(list(Car.available_cars_by_model("x5")), [])  # rented
+        self.assertEqual(list(Car.available_cars_by_model("a")), [self.camry, self.corolla])  # below trigram size
+        with CaptureQueriesContext(connection) as queries:
+            list(Car.available_cars_by_model("amr"))
+        self.assertFalse(any("LIKE" in query["sql"] for query in queries.captured_queries))
+
+    def test_facets_cover_all_matches(self):
+        body = self.search(available="all", brand="BMW")
+        self.assertEqual([car["id"] for car in body["data"]], [self.x5.id])
+        self.assertEqual(body["facets"]["brand"], [{"brand": "BMW", "count": 1}, {"brand": "Toyota", "count": 2}])
+        self.assertEqual(body["facets"]["year"][0], {"year": 2022, "count": 2})
+
+
+class ColumnarFormatTests(TestCase):
+    def setUp(self):
+        customer, today = make_customer(), date.today()
+        for n in range(3):
+            rental = Rental.objects.create(customer=customer, car=make_car(n), start_date=today,
+                                           end_date=today + timedelta(days=n + 1))
+            Violation.objects.create(rental=rental, description="Late", fine_amount=Decimal("25.50") * n)
+            if n:
+                Invoice.objects.create(rental=rental, discount_amount=Decimal("10.00"))
+
+    def assert_same_records(self, url, **columnar_params):
+        rows = self.client.get(url).json()["data"]
+        body = self.client.get(url, {"format": "columnar", **columnar_params}).json()
+        if "arrays" in body:
+            body["rows"] = [list(row) for row in zip(*body["arrays"])]
+        records = [dict(zip(body["columns"], row)) for row in body["rows"]]
+        self.assertEqual(body["count"], len(rows))
+        by_id = lambda item: item["id"]
+        for row, record in zip(sorted(rows, key=by_id), sorted(records, key=by_id)):
+            self.assertEqual({key: record[key] for key in row}, row)
+
+    def test_columnar_matches_row_format(self):
+        self.assert_same_records("/api/rentals/history/")
+        self.assert_same_records("/api/customers/")
+        self.assert_same_records("/api/cars/", layout="arrays")
+
+
+class RendererAndCompressionTests(TestCase):
+    def test_renderers_match_django_encoding(self):
+        import json
+        from django.core.serializers.json import DjangoJSONEncoder
+        from .renderers import render_json
+        data = {"price": Decimal("12.50"), "day": date(2024, 1, 2), "at": timezone.now(), 3: None}
+        expected = json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+        for renderer in ("auto", "stdlib"):
+            with self.subTest(renderer=renderer), override_settings(JSON_RENDERER=renderer):
+                self.assertEqual(json.loads(render_json(data)), expected)
+
+    def test_negotiation_honours_quality_values(self):
+        from .compression import negotiate_encoding
+        self.assertEqual(negotiate_encoding("gzip, br;q=0.5", ["br", "gzip"]), "gzip")
+        self.assertEqual(negotiate_encoding("*;q=0.1, gzip;q=0", ["gzip"]), None)
+        self.assertEqual(negotiate_encoding("identity", ["gzip"]), None)
+
+    def test_large_json_is_compressed_and_etag_still_validates(self):
+        import gzip, json
+        for n in range(30):
+            make_car(n)
+        response = self.client.get("/api/cars/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))["data"]), 30)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        again = self.client.get("/api/cars/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_small_bodies_and_pdfs_are_left_alone(self):
+        from .compression import CompressionMiddleware
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        pdf = HttpResponse(b"%PDF" + b"0" * 5000, content_type="application/pdf")
+        small = HttpResponse(b"{}", content_type="application/json")
+        for response in (pdf, small):
+            self.assertFalse(CompressionMiddleware(lambda r: response)(request).has_header("Content-Encoding"))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        customer, today = make_customer(), date.today()
+        self.rentals = [
+            Rental.objects.create(customer=customer, car=make_car(n), start_date=today + timedelta(days=10 * n),
+                                  end_date=today + timedelta(days=10 * n + 2))
+            for n in range(3)
+        ]
+
+    def content(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_with_columns_and_date_filter(self):
+        start = self.rentals[1].start_date.isoformat()
+        lines = self.content("/api/export/rentals/", columns="id,license_plate,total_price", **{"from": start})
+        self.assertEqual(lines.splitlines(), [
+            "id,license_plate,total_price",
+            f"{self.rentals[1].id},PLT00001,200.00",
+            f"{self.rentals[2].id},PLT00002,200.00",
+        ])
+
+    def test_csv_and_ndjson_timestamps_match(self):
+        import csv
+        import json
+        params = {"columns": "id,start_date,created_at"}
+        csv_rows = list(csv.DictReader(io.StringIO(self.content("/api/export/rentals/", **params))))
+        ndjson_rows = [json.loads(line)
+                       for line in self.content("/api/export/rentals/", format="ndjson", **params).splitlines()]
+        self.assertEqual([{key: str(value) for key, value in row.items()} for row in ndjson_rows], csv_rows)
+        self.assertIn("T", csv_rows[0]["created_at"])
+
+    def test_ndjson_rows(self):
+        import json
+        Invoice.objects.create(rental=self.rentals[0])
+        rows = [json.loads(line) for line in self.content("/api/export/invoices/", format="ndjson").splitlines()]
+        self.assertEqual(rows[0]["invoice_number"], "INV-000001")
+        self.assertEqual(rows[0]["final_price"], 210.0)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get("/api/export/customers/").status_code, 404)
+        self.assertEqual(self.client.get("/api/export/rentals/", {"columns": "id,secret"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/export/rentals/", {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/export/rentals/", {"from": "2024-02-30"}).status_code, 400)
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class AnalyticsExportTests(TestCase):
+    def setUp(self):
+        output = tempfile.TemporaryDirectory()
+        self.addCleanup(output.cleanup)
+        self.output = Path(output.name)
+        today = date.today()
+        self.rental = Rental.objects.create(customer=make_customer(), car=make_car(),
+                                            start_date=today, end_date=today + timedelta(days=3))
+
+    def read(self, path):
+        import pyarrow.parquet as pq
+        return pq.read_table(path).to_pylist()
+
+    def test_incremental_export(self):
+        from .analytics_export import export_analytics
+        first = export_analytics(self.output, entities=["rentals", "cars"])
+        self.assertEqual(first["rentals"]["rows"], 1)
+        row = self.read(first["rentals"]["path"])[0]
+        self.assertEqual((row["id"], row["total_price"]), (self.rental.id, Decimal("300.00")))
+        self.assertNotIn("search_key", self.read(first["cars"]["path"])[0])
+
+        self.assertEqual(export_analytics(self.output, entities=["rentals"])["rentals"], {"rows": 0, "path": None})
+        self.rental.status = "completed"
+        self.rental.save()
+        changed = export_analytics(self.output, entities=["rentals"])["rentals"]
+        self.assertEqual([r["status"] for r in self.read(changed["path"])], ["completed"])
+
+    def test_rows_committed_after_the_cutoff_are_exported_once(self):
+        from .analytics_export import export_analytics
+        export_analytics(self.output, entities=["rentals"])
+        # A transaction that commits late: its row is stamped before the previous run's cut-off
+        late = Rental.objects.create(customer=self.rental.customer, car=make_car(2), start_date=date.today(),
+                                     end_date=date.today() + timedelta(days=1))
+        Rental.objects.filter(id=late.id).update(updated_at=timezone.now() - timedelta(minutes=1))
+        rows = self.read(export_analytics(self.output, entities=["rentals"])["rentals"]["path"])
+        self.assertEqual([row["id"] for row in rows], [late.id])
+        self.assertEqual(export_analytics(self.output, entities=["rentals"])["rentals"]["rows"], 0)
+
+    def test_endpoint_requires_admin_and_queues_job(self):
+        self.assertEqual(self.client.post("/api/analytics/export/").status_code, 403)
+        with override_settings(ADMIN_API_TOKEN="secret", ANALYTICS_EXPORT_DIR=self.output):
+            response = self.client.post("/api/analytics/export/", {"format": "arrow", "entities": ["invoices"]},
+                                        content_type="application/json", HTTP_X_ADMIN_TOKEN="secret")
+            self.assertEqual(response.status_code, 202)
+            jobs.work_once("test-worker")
+        job = Job.objects.get(id=response.json()["job_id"])
+        self.assertEqual((job.status, job.result), ("succeeded", {"invoices": {"rows": 0, "path": None}}))
+
+
+class UtilizationTests(TestCase):
+    def test_occupancy_matrix_metrics(self):
+        from .utilization import fleet_utilization
+        start = date(2024, 3, 1)
+        customer = make_customer()
+        busy, idle, bmw = make_car(1), make_car(2), Car.objects.create(
+            brand="BMW", model="X5", year=2022, license_plate="BMW00001", price_per_day=Decimal("100.00"))
+        Rental.objects.create(customer=customer, car=busy, start_date=start, end_date=start + timedelta(days=5))
+        # Starts before the window: only the 3 days inside it count, at 100/day
+        Rental.objects.create(customer=customer, car=bmw, start_date=start - timedelta(days=2),
+                              end_date=start + timedelta(days=3))
+        Rental.objects.create(customer=customer, car=idle, start_date=start, end_date=start + timedelta(days=9),
+                              status="cancelled")
+
+        report = fleet_utilization(start, start + timedelta(days=9))
+        self.assertEqual(report["fleet"]["occupied_car_days"], 8)
+        self.assertEqual(report["fleet"]["utilization"], round(8 / 30 * 100, 2))
+        self.assertEqual(report["fleet"]["revenue"], 800.0)
+        self.assertEqual(report["fleet"]["revenue_per_available_car_day"], round(800 / 30, 2))
+        self.assertEqual(report["daily_utilization"][:4], [66.67, 66.67, 66.67, 33.33])
+        cars = {car["car_id"]: car for car in report["cars"]}
+        self.assertEqual((cars[busy.id]["longest_idle_streak"], cars[busy.id]["current_idle_streak"]), (5, 5))
+        self.assertEqual(cars[idle.id]["longest_idle_streak"], 10)
+        self.assertEqual(cars[bmw.id]["revenue"], 300.0)
+        brands = {b["brand"]: b for b in report["brands"]}
+        self.assertEqual((brands["BMW"]["cars"], brands["BMW"]["utilization"]), (1, 30.0))
+
+    def test_endpoint_validates_period(self):
+        make_car()
+        response = self.client.get("/api/analytics/utilization/", {"limit": 1})
+        self.assertEqual(response.json()["data"]["period"]["days"], 90)
+        self.assertEqual(len(response.json()["data"]["cars"]), 1)
+        bad = self.client.get("/api/analytics/utilization/", {"start": "2024-02-01", "end": "2024-01-01"})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_cached_report_refreshes_after_rental_write(self):
+        from .utilization import cached_fleet_utilization
+        start = date(2024, 3, 1)
+        car = make_car()
+        self.assertEqual(cached_fleet_utilization(start, start)["fleet"]["occupied_car_days"], 0)
+        Rental.objects.create(customer=make_customer(), car=car, start_date=start, end_date=start + timedelta(days=1))
+        self.assertEqual(cached_fleet_utilization(start, start)["fleet"]["occupied_car_days"], 1)
+
+
+class CarProfitabilityTests(TestCase):
+    def test_ledger_per_car(self):
+        from .profitability import car_profitability
+        today = date.today()
+        customer = make_customer()
+        earner, lossy = make_car(1), make_car(2)
+        rental = Rental.objects.create(customer=customer, car=earner, start_date=today,
+                                       end_date=today + timedelta(days=3), total_price=Decimal("300.00"))
+        Violation.objects.create(rental=rental, description="Speeding", fine_amount=Decimal("40.00"))
+        Violation.objects.create(rental=rental, description="Parking", fine_amount=Decimal("25.00"), is_paid=True)
+        Maintenance.objects.create(car=earner, amount=Decimal("60.00"), date=today)
+        Maintenance.objects.create(car=lossy, amount=Decimal("80.00"), date=today)
+        Maintenance.objects.create(car=lossy, amount=Decimal("500.00"), date=today - timedelta(days=400))
+
+        with self.assertNumQueries(4):
+            report = car_profitability(today - timedelta(days=30), today)
+        cars = {car["car_id"]: car for car in report["cars"]}
+        self.assertEqual(
+            (cars[earner.id]["revenue"], cars[earner.id]["unpaid_violations"],
+             cars[earner.id]["maintenance_cost"], cars[earner.id]["net_margin"]),
+            (300.0, 40.0, 60.0, 200.0),
+        )
+        self.assertEqual(cars[earner.id]["margin_pct"], 66.67)
+        self.assertEqual((cars[lossy.id]["net_margin"], cars[lossy.id]["margin_pct"]), (-80.0, None))
+        self.assertEqual((report["totals"]["net_margin"], report["totals"]["loss_making_cars"]), (120.0, 1))
+
+    def test_endpoint_is_cached_until_a_ledger_write(self):
+        car = make_car()
+        url = "/api/analytics/cars/profitability/"
+        self.assertEqual(self.client.get(url).json()["data"]["totals"]["maintenance_cost"], 0.0)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        Maintenance.objects.create(car=car, amount=Decimal("75.00"))
+        response = self.client.get(url, {"sort": "loss", "limit": 1})
+        self.assertEqual(response.json()["data"]["cars"][0]["net_margin"], -75.0)
+
+
+class AgentLeaderboardTests(TestCase):
+    def counters(self):
+        fields = ("agent_id", "day", "rentals", "cancelled", "revenue", "rental_days", "violations", "completed",
+                  "timed_completions")
+        return {row[:2]: row[2:] for row in AgentDailyStats.objects.values_list(*fields) if any(row[2:])}
+
+    def assert_matches_rebuild(self):
+        from .agent_stats import rebuild
+        incremental = self.counters()
+        rebuild()
+        self.assertEqual(incremental, self.counters())
+        return incremental
+
+    def test_counters_follow_rental_lifecycle(self):
+        ana = CustomUser.objects.create(username="ana", is_agent=True)
+        ben = CustomUser.objects.create(username="ben", is_agent=True)
+        day = date(2024, 5, 1)
+        rental = Rental.objects.create(customer=make_customer(), car=make_car(), agent=ana, start_date=day,
+                                       end_date=day + timedelta(days=4))
+        Violation.objects.create(rental=rental, description="Speeding", fine_amount=Decimal("50.00"))
+        self.assertEqual(self.assert_matches_rebuild(), {(ana.id, day): (1, 0, Decimal("400.00"), 4, 1, 0, 0)})
+
+        rental.status = "completed"
+        rental.save()
+        self.assertIsNotNone(rental.completed_at)
+        rental.agent = ben
+        rental.save()
+        self.assertEqual(self.assert_matches_rebuild(), {(ben.id, day): (1, 0, Decimal("400.00"), 4, 1, 1, 1)})
+
+        rental.delete()
+        self.assertEqual(self.assert_matches_rebuild(), {})
+
+    def test_leaderboard_endpoint(self):
+        ana = CustomUser.objects.create(username="ana", is_agent=True, first_name="Ana")
+        ben = CustomUser.objects.create(username="ben", is_agent=True)
+        customer, today = make_customer(), date.today()
+        for n, (agent, days) in enumerate([(ana, 2), (ana, 4), (ben, 10)], 1):
+            Rental.objects.create(customer=customer, car=make_car(n), agent=agent, start_date=today,
+                                  end_date=today + timedelta(days=days))
+        Rental.objects.create(customer=customer, car=make_car(4), agent=ana, start_date=today,
+                              end_date=today + timedelta(days=1), status="cancelled")
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/analytics/agents/", {"sort": "rentals"})
+        agents = response.json()["agents"]
+        self.assertEqual([agent["username"] for agent in agents], ["ana", "ben"])
+        self.assertEqual(
+            (agents[0]["name"], agents[0]["rentals"], agents[0]["cancelled"], agents[0]["average_rental_days"]),
+            ("Ana", 2, 1, 3.0),
+        )
+        self.assertEqual(self.client.get("/api/analytics/agents/").json()["agents"][0]["username"], "ben")
+        self.assertEqual(self.client.get("/api/analytics/agents/", {"sort": "name"}).status_code, 400)
+
+
+class CustomerSummaryTests(TestCase):
+    def counters(self, *customers):
+        return [tuple(Customer.objects.filter(pk=c.pk).values_list(*Customer.COUNTER_FIELDS).get()) for c in customers]
+
+    def assert_matches_rebuild(self, *customers):
+        from .customer_stats import rebuild
+        incremental = self.counters(*customers)
+        rebuild()
+        self.assertEqual(incremental, self.counters(*customers))
+        return incremental
+
+    def test_counters_follow_rentals_violations_and_invoices(self):
+        alice, bob = make_customer(1), make_customer(2)
+        today = date.today()
+        rental = Rental.objects.create(customer=alice, car=make_car(1), start_date=today,
+                                       end_date=today + timedelta(days=2))
+        Rental.objects.create(customer=alice, car=make_car(2), start_date=today, end_date=today + timedelta(days=1),
+                              status="cancelled")
+        violation = Violation.objects.create(rental=rental, description="Parking", fine_amount=Decimal("30.00"))
+        self.assertEqual(self.assert_matches_rebuild(alice)[0][:5], (1, 1, Decimal("200.00"), 1, Decimal("30.00")))
+
+        rental.status = "completed"
+        rental.save()
+        invoice = Invoice.objects.create(rental=rental)
+        violation.is_paid = True
+        violation.save()
+        self.assertEqual(self.assert_matches_rebuild(alice)[0],
+                         (1, 0, Decimal("200.00"), 0, Decimal("0.00"), 1, invoice.final_price))
+
+        # Plain saves of the customer must not overwrite the counters with stale values
+        stale = Customer.objects.get(pk=alice.pk)
+        invoice.is_paid = True
+        invoice.save()
+        stale.full_name = "Alice Renamed"
+        stale.save()
+        self.assertEqual(self.counters(alice)[0][5:], (0, Decimal("0.00")))
+
+        rental.customer = bob
+        rental.save()
+        alice_counters, bob_counters = self.assert_matches_rebuild(alice, bob)
+        self.assertEqual((alice_counters[0], bob_counters[0]), (0, 1))
+
+        rental.delete()
+        self.assertEqual(self.assert_matches_rebuild(bob)[0], (0, 0, Decimal("0.00"), 0, Decimal("0.00"), 0,
+                                                               Decimal("0.00")))
+
+    def test_summary_endpoint(self):
+        customer = make_customer()
+        for n in range(3):
+            Rental.objects.create(customer=customer, car=make_car(n), start_date=date(2024, 1, 1 + n),
+                                  end_date=date(2024, 1, 5 + n), status="completed")
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/customers/{customer.id}/summary/", {"limit": 2})
+        data = response.json()["data"]
+        self.assertEqual((data["rentals_count"], data["lifetime_spend"]), (3, 1200.0))
+        self.assertEqual([r["start_date"] for r in data["recent_rentals"]], ["2024-01-03", "2024-01-02"])
+        self.assertEqual(self.client.get("/api/customers/999999/summary/").status_code, 404)
@@ -2,6 +2,10 @@
 from django.urls import path
 from . import views
 from . import user_management_views as user_views
+from . import monitoring_views
+from . import job_views
+from . import export_views
+from . import analytics_views
 
 urlpatterns = [
     
@@ -9,6 +13,7 @@ urlpatterns = [
         
     # Car endpoints
     path('api/cars/available/', views.available_cars, name='available_cars'),
+    path('api/cars/search/', views.search_cars, name='search_cars'),
     
     # Customer endpoints
     path('api/customers/register/', views.register_customer, name='register_customer'),
@@ -30,6 +35,7 @@ urlpatterns = [
     
     path('api/cars/add/', views.add_car),
     path('api/cars/', views.get_all_cars),
+    path('api/customers/search/', views.search_customers, name='search_customers'),
     path('api/customers/', views.get_customers),    
 
     path('api/violations/add/', views.add_violation, name='add_violation'),
@@ -37,6 +43,7 @@ urlpatterns = [
     # --- Invoice URLs ---
     path('api/invoices/<int:invoice_id>/pdf/', views.generate_invoice_pdf, name='generate_invoice_pdf'),
 
+    path('api/customers/<int:customer_id>/summary/', views.customer_summary, name='customer_summary'),
     path('api/customers/<int:customer_id>/update/', views.update_customer, name='update_customer'),
     path('api/customers/<int:customer_id>/delete/', views.delete_customer, name='delete_customer'),
 
@@ -60,4 +67,23 @@ urlpatterns = [
     
     # Contract generation
     path('api/rentals/<int:rental_id>/contract/', views.generate_rental_contract, name='generate_rental_contract'),
+
+    # Monitoring
+    path('api/metrics/', monitoring_views.metrics, name='metrics'),
+    path('api/profiles/', monitoring_views.list_profiles, name='list_profiles'),
+    path('api/profiles/<str:name>/', monitoring_views.download_profile, name='download_profile'),
+
+    # Background jobs
+    path('api/jobs/', job_views.job_summary, name='job_summary'),
+    path('api/jobs/<int:job_id>/', job_views.job_status, name='job_status'),
+    path('api/invoices/jobs/<int:job_id>/', job_views.invoice_job_status, name='invoice_job_status'),
+
+    # Bulk export
+    path('api/export/<str:entity>/', export_views.export_entity, name='export_entity'),
+
+    # Analytics
+    path('api/analytics/export/', analytics_views.export_analytics, name='export_analytics'),
+    path('api/analytics/utilization/', analytics_views.fleet_utilization, name='fleet_utilization'),
+    path('api/analytics/cars/profitability/', analytics_views.car_profitability, name='car_profitability'),
+    path('api/analytics/agents/', analytics_views.agent_leaderboard, name='agent_leaderboard'),
 ]
@@ -1,9 +1,9 @@
 # User Management Endpoints (Admin Only)
-from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.shortcuts import get_object_or_404
 from .models import CustomUser, Rental
+from .responses import JsonResponse
 import json
 
 @csrf_exempt
@@ -0,0 +1,159 @@
+"""Fleet utilization analytics on a car-by-day occupancy matrix.
+
+Rentals overlapping the reporting window are loaded as NumPy arrays and
+painted onto an (n_cars x n_days) boolean matrix with a difference array:
++1 on each rental's first day, -1 on the day it ends, cumulative sum along
+the day axis. A rental occupies [start_date, end_date), matching
+Rental.rental_days, and its total_price is spread evenly over those days.
+Cancelled rentals are ignored. Every car counts as available on every day of
+the window, so "revenue per available car-day" is revenue / (cars x days).
+Results are cached per window under the catalog version, which every Car and
+Rental write bumps.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import FloatField, Func, IntegerField
+from django.db.models.functions import Cast
+
+from . import catalog
+from .models import Car, Rental
+
+BOOKED_STATUSES = ('active', 'completed')
+EPOCH = date(1970, 1, 1)
+CACHE_TIMEOUT = 15 * 60
+
+
+class EpochDay(Func):
+    """Days since 1970-01-01 as an integer, computed by the database."""
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="CAST(julianday(%(expressions)s) - 2440587.5 AS INTEGER)",
+                           **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="(%(expressions)s - DATE '1970-01-01')", **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="(TO_DAYS(%(expressions)s) - 719528)", **extra_context)
+
+
+def raw_rows(queryset):
+    """Execute a values_list() queryset without Django's per-value converters."""
+    sql, params = queryset.query.sql_with_params()
+    with connections[router.db_for_read(queryset.model)].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def longest_runs(mask):
+    """Per row: (longest run of True, run of True ending at the last column)."""
+    counts = np.cumsum(mask, axis=1, dtype=np.int32)
+    # Running count minus the count at the most recent False resets at each gap
+    resets = np.maximum.accumulate(np.where(mask, 0, counts), axis=1)
+    runs = counts - resets
+    return runs.max(axis=1, initial=0), runs[:, -1]
+
+
+def fleet_utilization(start, end, brand=None):
+    """Utilization, idle streaks and revenue for every car between start and end (inclusive)."""
+    n_days = (end - start).days + 1
+    cars = Car.objects.order_by('id')
+    if brand:
+        cars = cars.filter(brand=brand)
+    car_rows = raw_rows(cars.values_list('id', 'brand', 'model', 'license_plate'))
+    car_ids = np.array([row[0] for row in car_rows], dtype=np.int64)
+    n_cars = len(car_ids)
+
+    rentals = Rental.objects.filter(status__in=BOOKED_STATUSES, start_date__lte=end, end_date__gt=start).order_by()
+    if brand:
+        rentals = rentals.filter(car__brand=brand)
+    # Dates arrive as day numbers and prices as floats, so no per-value Python conversion is needed
+    rental_rows = raw_rows(rentals.values_list(
+        'car_id', EpochDay('start_date'), EpochDay('end_date'), Cast('total_price', FloatField())
+    ))
+
+    occupied = np.zeros((n_cars, n_days), dtype=bool)
+    revenue = np.zeros(n_cars)
+    if rental_rows and n_cars:
+        matrix = np.array(rental_rows, dtype=np.float64)
+        rows = np.searchsorted(car_ids, matrix[:, 0].astype(np.int64))
+        origin = (start - EPOCH).days
+        first = matrix[:, 1].astype(np.int64) - origin
+        last = matrix[:, 2].astype(np.int64) - origin  # exclusive
+        price_col = matrix[:, 3]
+        length = np.maximum(last - first, 1)
+        first_in, last_in = np.clip(first, 0, n_days), np.clip(last, 0, n_days)
+
+        # Difference array painting, flattened so bincount does the scatter-add
+        width = n_days + 1
+        diff = (np.bincount(rows * width + first_in, minlength=n_cars * width)
+                - np.bincount(rows * width + last_in, minlength=n_cars * width))
+        occupied = np.cumsum(diff.reshape(n_cars, width), axis=1)[:, :n_days] > 0
+
+        daily_rate = price_col / length
+        revenue = np.bincount(rows, weights=daily_rate * (last_in - first_in), minlength=n_cars)
+
+    occupied_days = occupied.sum(axis=1)
+    longest_idle, current_idle = longest_runs(~occupied) if n_cars else (np.zeros(0), np.zeros(0))
+    car_days = n_cars * n_days
+
+    brand_names = sorted({row[1] for row in car_rows})
+    brand_index = np.searchsorted(brand_names, [row[1] for row in car_rows]) if n_cars else np.zeros(0, int)
+    brand_cars = np.bincount(brand_index, minlength=len(brand_names))
+    brand_occupied = np.bincount(brand_index, weights=occupied_days, minlength=len(brand_names))
+    brand_revenue = np.bincount(brand_index, weights=revenue, minlength=len(brand_names))
+
+    return {
+        'period': {'start': start.isoformat(), 'end': end.isoformat(), 'days': n_days},
+        'fleet': {
+            'cars': n_cars,
+            'car_days': car_days,
+            'occupied_car_days': int(occupied_days.sum()),
+            'utilization': round(float(occupied_days.sum()) / car_days * 100, 2) if car_days else 0.0,
+            'revenue': round(float(revenue.sum()), 2),
+            'revenue_per_available_car_day': round(float(revenue.sum()) / car_days, 2) if car_days else 0.0,
+            'idle_cars_today': int((~occupied[:, -1]).sum()) if n_cars else 0,
+        },
+        'daily_utilization': [round(float(v), 2) for v in occupied.mean(axis=0) * 100] if n_cars else [],
+        'brands': [
+            {
+                'brand': name,
+                'cars': int(brand_cars[i]),
+                'utilization': round(float(brand_occupied[i]) / (int(brand_cars[i]) * n_days) * 100, 2),
+                'revenue': round(float(brand_revenue[i]), 2),
+                'revenue_per_available_car_day': round(float(brand_revenue[i]) / (int(brand_cars[i]) * n_days), 2),
+            }
+            for i, name in enumerate(brand_names)
+        ],
+        'cars': [
+            {
+                'car_id': int(car_ids[i]),
+                'car': f"{car_rows[i][1]} {car_rows[i][2]}",
+                'license_plate': car_rows[i][3],
+                'occupied_days': int(occupied_days[i]),
+                'utilization': round(float(occupied_days[i]) / n_days * 100, 2),
+                'longest_idle_streak': int(longest_idle[i]),
+                'current_idle_streak': int(current_idle[i]),
+                'revenue': round(float(revenue[i]), 2),
+            }
+            for i in range(n_cars)
+        ],
+    }
+
+
+def cached_fleet_utilization(start, end, brand=None):
+    """fleet_utilization() cached until the next Car/Rental write bumps the catalog version."""
+    key = f'rentcars:utilization:{catalog.current_version()}:{start}:{end}:{brand or ""}'
+    report = cache.get(key)
+    if report is None:
+        report = fleet_utilization(start, end, brand)
+        cache.set(key, report, CACHE_TIMEOUT)
+    return report
+
+
+def default_window(today, days=90):
+    return today - timedelta(days=days - 1), today
@@ -1,69 +1,70 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponse
 from .models import Car, Customer, Rental, Invoice, Violation, CustomUser, Maintenance
+from .responses import ColumnarResponse, JsonResponse, wants_columnar
+from .query_inspection import query_budget
+from .invoices import cached_invoice_pdf, store_invoice_pdf
+from . import catalog, customer_stats, jobs, search
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.dateparse import parse_date
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.db import transaction
-from django.db.models import Sum
+from django.db import transaction, IntegrityError
+from django.db.models import (
+    BooleanField, Case, CharField, Count, ExpressionWrapper, F, FloatField, Q, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Concat, LPad, Round
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 import json
+import logging
 from datetime import date, datetime
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-import io
+from decimal import Decimal
 import base64
 from django.template.loader import render_to_string
 from django.template import Template, Context
 
+logger = logging.getLogger(__name__)
+
+def catalog_response(request, snapshot, payload=None, body=None):
+    """Catalog listing tagged with the catalog version, 304 when the client is current"""
+    etag = f'"cars-{snapshot.version}"'
+    # Compression weakens the ETag (W/"..."); either form identifies the version
+    client_tags = [tag.strip().removeprefix('W/') for tag in request.headers.get('If-None-Match', '').split(',')]
+    if etag in client_tags:
+        response = HttpResponse(status=304)
+    elif body is not None:
+        response = HttpResponse(body, content_type='application/json')
+    else:
+        response = JsonResponse(payload)
+    response['ETag'] = etag
+    return response
+
+@query_budget(1)
 def available_cars(request):
     """Get available cars with optional filtering"""
     try:
-        model_name = request.GET.get('model')
-        brand_name = request.GET.get('brand')
-        min_price = request.GET.get('min_price')
-        max_price = request.GET.get('max_price')
-        
-        cars = Car.objects.filter(available=True)
-        
-        if model_name:
-            cars = cars.filter(model__icontains=model_name)
-        if brand_name:
-            cars = cars.filter(brand=brand_name)
-        if min_price:
-            cars = cars.filter(price_per_day__gte=min_price)
-        if max_price:
-            cars = cars.filter(price_per_day__lte=max_price)
-            
-        data = [
-            {
-                "id": car.id,
-                "brand": car.brand,
-                "model": car.model,
-                "year": car.year,
-                "license_plate": car.license_plate,
-                "color": car.color,
-                "price_per_day": float(car.price_per_day),
-                "description": car.description,
-                "main_image_url": car.main_image.url if car.main_image else None,
-                "interior_image_url": car.interior_image.url if car.interior_image else None,
-                "exterior_image_url": car.exterior_image.url if car.exterior_image else None,
+        filters = {
+            'model': request.GET.get('model'),
+            'brand': request.GET.get('brand'),
+            'min_price': catalog.parse_price(request.GET.get('min_price')),
+            'max_price': catalog.parse_price(request.GET.get('max_price')),
+        }
+        snapshot = catalog.get_snapshot()
+        
+        def payload():
+            data = snapshot.filter(available_only=True, **filters)
+            return {
+                'status': 'success',
+                'data': data,
+                'count': len(data)
             }
-            for car in cars
-        ]
-        return JsonResponse({
-            'status': 'success',
-            'data': data,
-            'count': len(data)
-        })
+        
+        if not any(value is not None and value != '' for value in filters.values()):
+            return catalog_response(request, snapshot, body=snapshot.encoded('available', payload))
+        return catalog_response(request, snapshot, payload())
     except Exception as e:
         return JsonResponse({
             'status': 'error',
@@ -152,10 +153,9 @@ def register_customer(request):
 @require_http_methods(["POST"])
 @transaction.atomic
 def create_rental(request):
-    print("Request body:", request.body)
     try:
         data = json.loads(request.body)
-        print("Parsed data:", data)
+        logger.debug("create_rental payload: %s", data)
         
         # Validate required fields
         required_fields = ['customer_id', 'car_id', 'start_date', 'end_date']
@@ -199,7 +199,12 @@ def create_rental(request):
             end_date=end_date
         )
         rental.full_clean()  # This will raise ValidationError if double booking
-        rental.save()
+        try:
+            # On PostgreSQL the exclusion constraint catches races that slip past clean()
+            with transaction.atomic():
+                rental.save()
+        except IntegrityError:
+            raise ValidationError("This car is already rented for the selected period.")
         
         # Create invoice with tax and discount if provided
         tax_amount = float(data.get('tax_amount', 0))
@@ -290,14 +295,17 @@ def complete_rental(request):
         rental.car.available = True
         rental.car.save()
         
-        # Create or get invoice
+        # Create or get invoice; the PDF is rendered by a background worker,
+        # poll /api/invoices/jobs/<job_id>/ for its state
         invoice, created = Invoice.objects.get_or_create(rental=rental)
+        job = jobs.enqueue('invoices.render_pdf', {'invoice_id': invoice.id}, priority=10)
         
         return JsonResponse({
             'status': 'success',
             'invoice_id': invoice.id,
             'invoice_number': invoice.invoice_number,
             'final_price': float(invoice.final_price),
+            'job_id': job.id,
             'message': 'Rental completed and invoice generated'
         })
         
@@ -308,161 +316,18 @@ def complete_rental(request):
         }, status=500)
 
 def generate_invoice_pdf(request, invoice_id):
-    """Generate PDF invoice"""
+    """Serve the invoice PDF, from the pre-rendered artifact when available"""
     try:
-        invoice = get_object_or_404(Invoice, id=invoice_id)
-        rental = invoice.rental
-        
-        # Create PDF buffer
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.darkblue,
-            alignment=1  # Center alignment
+        invoice = get_object_or_404(
+            Invoice.objects.select_related('rental', 'rental__customer', 'rental__car'),
+            id=invoice_id
         )
-        
-        # Build PDF content
-        story = []
-        
-        # Title
-        story.append(Paragraph("RENTAL INVOICE", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Invoice info
-        invoice_data = [
-            ['Invoice Number:', invoice.invoice_number],
-            ['Issue Date:', invoice.issued_date.strftime('%Y-%m-%d %H:%M')],
-            ['Status:', 'Paid' if invoice.is_paid else 'Unpaid'],
-        ]
-        
-        invoice_table = Table(invoice_data, colWidths=[2*inch, 3*inch])
-        invoice_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(invoice_table)
-        story.append(Spacer(1, 30))
-        
-        # Customer info
-        story.append(Paragraph("Customer Information", styles['Heading2']))
-        customer_data = [
-            ['Name:', rental.customer.full_name],
-            ['Email:', rental.customer.email],
-            ['Phone:', rental.customer.phone_number or 'N/A'],
-            ['National ID:', rental.customer.National_ID],
-            ['License Number:', rental.customer.License_Number],
-        ]
-        
-        customer_table = Table(customer_data, colWidths=[2*inch, 3*inch])
-        customer_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(customer_table)
-        story.append(Spacer(1, 20))
-        
-        # Car and rental info
-        story.append(Paragraph("Rental Details", styles['Heading2']))
-        rental_data = [
-            ['Car:', f"{rental.car.brand} {rental.car.model} {rental.car.year}"],
-            ['License Plate:', rental.car.license_plate],
-            ['Color:', rental.car.color or 'N/A'],
-            ['Start Date:', rental.start_date.strftime('%Y-%m-%d')],
-            ['End Date:', rental.end_date.strftime('%Y-%m-%d')],
-            ['Rental Days:', str(rental.rental_days)],
-            ['Price per Day:', f"{rental.car.price_per_day} AED"],
-        ]
-        
-        rental_table = Table(rental_data, colWidths=[2*inch, 3*inch])
-        rental_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(rental_table)
-        story.append(Spacer(1, 20))
-        
-        # Violations (if any)
-        violations = rental.violations.all()
-        if violations:
-            story.append(Paragraph("Violations", styles['Heading2']))
-            violation_data = [['Type', 'Description', 'Fine Amount']]
-            for violation in violations:
-                violation_data.append([
-                    violation.get_violation_type_display(),
-                    violation.description[:50] + '...' if len(violation.description) > 50 else violation.description,
-                    f"{violation.fine_amount} AED"
-                ])
-            
-            violation_table = Table(violation_data, colWidths=[1.5*inch, 3*inch, 1.5*inch])
-            violation_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(violation_table)
-            story.append(Spacer(1, 20))
-        
-        # Price breakdown
-        story.append(Paragraph("Price Breakdown", styles['Heading2']))
-        price_data = [
-            ['Rental Cost:', f"{rental.total_price} AED"],
-            ['Violations:', f"{rental.total_violations_amount} AED"],
-            ['Subtotal:', f"{rental.final_amount} AED"],
-            ['Discount:', f"-{invoice.discount_amount} AED"],
-            ['Tax (5%):', f"{invoice.tax_amount} AED"],
-            ['Final Total:', f"{invoice.final_price} AED"],
-        ]
-        
-        price_table = Table(price_data, colWidths=[3*inch, 2*inch])
-        price_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, -1), (-1, -1), colors.darkblue),
-            ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
-            ('BACKGROUND', (0, 0), (0, -2), colors.lightgrey),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(price_table)
-        
-        # Build PDF
-        doc.build(story)
+        content = cached_invoice_pdf(invoice)
+        if content is None:
+            content = store_invoice_pdf(invoice)
         
         # Return PDF response
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
+        response = HttpResponse(content, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="invoice_{invoice.invoice_number}.pdf"'
         
         return response
@@ -473,18 +338,59 @@ def generate_invoice_pdf(request, invoice_id):
             'message': str(e)
         }, status=500)
 
+# ?format=columnar: the same fields as the row format, computed in SQL so
+# values_list() yields plain JSON types
+RENTAL_HISTORY_COLUMNS = [
+    'id', 'customer', 'car', 'start_date', 'end_date', 'total_price', 'status', 'violations_count',
+    'violations_amount', 'final_amount', 'has_invoice', 'tax_amount', 'discount_amount', 'invoice_id',
+    'invoice_number',
+]
+
+def money(expression):
+    # Rounded in SQL like the DecimalField converters would, then sent as a float
+    return Cast(Round(expression, 2), FloatField())
+
+def rental_history_rows(rentals):
+    violations_amount = Coalesce(Sum('violations__fine_amount'), Value(Decimal('0')))
+    # Aggregating queries ignore Meta.ordering, so restate it
+    rentals = rentals.select_related(None).prefetch_related(None).order_by(*Rental._meta.ordering)
+    return rentals.values_list(
+        'id',
+        'customer__full_name',
+        Concat('car__brand', Value(' '), 'car__model', Value(' '), Cast('car__year', CharField()),
+               Value(' ('), 'car__license_plate', Value(')'), output_field=CharField()),
+        Cast('start_date', CharField()),
+        Cast('end_date', CharField()),
+        money('total_price'),
+        'status',
+        Count('violations'),
+        money(violations_amount),
+        money(F('total_price') + violations_amount),
+        ExpressionWrapper(Q(invoice__isnull=False), output_field=BooleanField()),
+        money(Coalesce('invoice__tax_amount', Value(Decimal('0')))),
+        money(Coalesce('invoice__discount_amount', Value(Decimal('0')))),
+        'invoice__id',
+        Case(When(invoice__isnull=False, then=Concat(
+            Value('INV-'), LPad(Cast('invoice__id', CharField()), 6, Value('0')))), default=None,
+            output_field=CharField()),
+    )
+
+@query_budget(2)
 def get_rental_history(request):
     """Get rental history with filtering"""
     try:
         customer_id = request.GET.get('customer_id')
         status = request.GET.get('status')
         
-        rentals = Rental.objects.all()
+        rentals = Rental.objects.select_related('customer', 'car', 'invoice').prefetch_related('violations')
         
         if customer_id:
             rentals = rentals.filter(customer_id=customer_id)
         if status:
             rentals = rentals.filter(status=status)
+        
+        if wants_columnar(request):
+            return ColumnarResponse(request, RENTAL_HISTORY_COLUMNS, rental_history_rows(rentals))
             
         data = []
         for rental in rentals:
@@ -523,6 +429,7 @@ def get_rental_history(request):
         }, status=500)
 
 @csrf_exempt
+@query_budget(1)
 def get_customers(request):
     customers = Customer.objects.all()
     data = [{
@@ -535,6 +442,57 @@ def get_customers(request):
     } for c in customers]
     return JsonResponse({'status': 'success', 'data': data})
 
+@query_budget(1)
+def search_customers(request):
+    """Full-text customer search: every word is a prefix, best matches first"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 100)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'limit must be an integer'}, status=400)
+    data = [{
+        'id': c.id,
+        'full_name': c.full_name,
+        'email': c.email,
+        'phone_number': c.phone_number,
+        'National_ID': c.National_ID,
+        'License_Number': c.License_Number
+    } for c in search.search_customers(query, limit=max(limit, 1))]
+    return JsonResponse({'status': 'success', 'data': data, 'count': len(data)})
+
+@require_http_methods(["GET"])
+@query_budget(2)
+def customer_summary(request, customer_id):
+    """Rental count, lifetime spend, unpaid balances and the latest rentals of one customer"""
+    try:
+        limit = min(int(request.GET.get('limit', 10)), 100)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'limit must be an integer'}, status=400)
+    customer = get_object_or_404(Customer, id=customer_id)
+    rentals = (
+        Rental.objects.filter(customer_id=customer_id)
+        .order_by('-start_date', '-id')
+        .values_list('id', 'car_id', 'car__brand', 'car__model', 'car__year', 'car__license_plate',
+                     'start_date', 'end_date', 'total_price', 'status', 'invoice__id', 'invoice__is_paid')
+    )[:max(limit, 0)]
+    recent = [{
+        'id': rental_id,
+        'car_id': car_id,
+        'car': f"{brand} {model} {year} ({plate})",
+        'start_date': start.strftime('%Y-%m-%d'),
+        'end_date': end.strftime('%Y-%m-%d'),
+        'total_price': float(total_price or 0),
+        'status': status,
+        'invoice_id': invoice_id,
+        'invoice_paid': invoice_paid,
+    } for rental_id, car_id, brand, model, year, plate, start, end, total_price, status, invoice_id, invoice_paid
+        in rentals]
+    return JsonResponse({'status': 'success', 'data': {
+        'customer': {'id': customer.id, 'full_name': customer.full_name, 'email': customer.email},
+        **customer_stats.summary(customer),
+        'recent_rentals': recent,
+    }})
+
 @csrf_exempt  
 def get_cars(request):
     cars = Car.objects.all()
@@ -607,6 +565,7 @@ def signup_user(request):
             return JsonResponse({"status": "error", "message": str(e)}, status=500)
     return JsonResponse({"status": "error", "message": "Invalid method"}, status=405)
 
+@query_budget(6)
 def dashboard_stats(request):
     stats = {
         'total_cars': Car.objects.count(),
@@ -770,8 +729,12 @@ def add_car(request):
             'message': str(e)
         }, status=500)
 
+@query_budget(1)
 def get_customers(request):
     customers = Customer.objects.all()
+    if wants_columnar(request):
+        columns = ['id', 'full_name', 'email', 'phone_number', 'National_ID', 'License_Number']
+        return ColumnarResponse(request, columns, customers.values_list(*columns))
     data = [{
         'id': c.id,
         'full_name': c.full_name,
@@ -782,24 +745,43 @@ def get_customers(request):
     } for c in customers]
     return JsonResponse({'status': 'success', 'data': data})
 
+@query_budget(1)
 def get_all_cars(request):
-    cars = Car.objects.all()
-    data = [{
-        'id': c.id,
-        'brand': c.brand,
-        'model': c.model,
-        'year': c.year,
-        'license_plate': c.license_plate,
-        'color': c.color,
-        'price_per_day': float(c.price_per_day),
-        'available': c.available,
-        'main_image_url': c.main_image.url if c.main_image else None,
-        'interior_image_url': c.interior_image.url if c.interior_image else None,
-        'exterior_image_url': c.exterior_image.url if c.exterior_image else None
-    } for c in cars]
-    return JsonResponse({'status': 'success', 'data': data})
+    snapshot = catalog.get_snapshot()
+    if wants_columnar(request):
+        return ColumnarResponse(request, catalog.CAR_COLUMNS, snapshot.rows())
+    body = snapshot.encoded('all', lambda: {'status': 'success', 'data': snapshot.cars})
+    return catalog_response(request, snapshot, body=body)
+
+@query_budget(1)
+def search_cars(request):
+    """Prefix/fuzzy car search with brand and year facet counts"""
+    try:
+        query = request.GET.get('q', '')
+        brand = request.GET.get('brand')
+        year = int(request.GET['year']) if request.GET.get('year') else None
+        limit = max(min(int(request.GET.get('limit', 50)), 500), 1)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'year and limit must be integers'}, status=400)
+    available_only = request.GET.get('available', '1').lower() not in ('0', 'false', 'all')
+    
+    snapshot = catalog.get_snapshot()
+    positions = snapshot.search_positions(query, available_only=available_only)
+    # Facets cover every match for the query so the UI can show counts for other brands/years
+    facets = snapshot.facets(positions)
+    if brand:
+        positions = [pos for pos in positions if snapshot.cars[pos]['brand'] == brand]
+    if year is not None:
+        positions = [pos for pos in positions if snapshot.cars[pos]['year'] == year]
+    return catalog_response(request, snapshot, {
+        'status': 'success',
+        'data': [snapshot.cars[pos] for pos in positions[:limit]],
+        'count': len(positions),
+        'facets': facets,
+    })
 
 @csrf_exempt
+@query_budget(1)
 def get_violations(request):
     """Get all violations with rental info"""
     violations = Violation.objects.select_related('rental', 'rental__customer', 'rental__car').all()
@@ -820,6 +802,7 @@ def get_violations(request):
     return JsonResponse({'status': 'success', 'data': data})
 
 @csrf_exempt
+@query_budget(1)
 def get_all_invoices(request):
     """Get all invoices"""
     invoices = Invoice.objects.select_related('rental', 'rental__customer', 'rental__car').all()
@@ -869,9 +852,13 @@ def mark_violation_paid(request):
     })
 
 @csrf_exempt
+@query_budget(2)
 def get_rental_details(request, rental_id):
     """Get detailed rental information including violations"""
-    rental = get_object_or_404(Rental, id=rental_id)
+    rental = get_object_or_404(
+        Rental.objects.select_related('customer', 'car', 'invoice').prefetch_related('violations'),
+        id=rental_id
+    )
     violations = rental.violations.all()
     
     violations_data = []